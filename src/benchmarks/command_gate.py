@@ -0,0 +1,132 @@
+"""
+Benchmark the command gate in `utils.application_hooks.cmd_check`,
+comparing the old gate (`is_present` -> `create_profile` -> `check_in_inter`) with `Player.get_command_gate`.
+
+Run it from `src/` against a scratch local Postgres database:
+    python -m benchmarks.command_gate --scratch --name boss_bench --rtt-ms 20
+
+The benchmark creates and deletes players in `players.players`, so it refuses to run without `--scratch`,
+which confirms that the database is a scratch database and not the real one.
+
+`--rtt-ms` adds an artificial delay before every query to emulate the round trip to the hosted database.
+"""
+# default modules
+import argparse
+import asyncio
+import statistics
+import time
+from types import SimpleNamespace
+
+# my modules
+from utils.player import Player
+from utils.postgres_db import Database
+
+
+class DelayedDatabase(Database):
+    """A `Database` which waits for `rtt` seconds before every query."""
+
+    def __init__(self, rtt: float, **kwargs):
+        super().__init__(**kwargs)
+        self.rtt = rtt
+
+    async def _execute_method(self, method, *args, **kwargs):
+        await asyncio.sleep(self.rtt)
+        return await super()._execute_method(method, *args, **kwargs)
+
+
+async def old_gate(player: Player):
+    if not await player.is_present():
+        await player.create_profile()
+        return False
+    return not await player.check_in_inter()
+
+
+async def new_gate(player: Player):
+    gate = await player.get_command_gate()
+    return gate["present"] and not gate["in_interaction"]
+
+
+async def time_gate(gate, db: Database, player_ids: list[int]):
+    timings = []
+    for player_id in player_ids:
+        player = Player(db, SimpleNamespace(id=player_id))
+        start = time.perf_counter()
+        await gate(player)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(name: str, timings: list[float]):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(
+        f"{name:<24} n={len(timings):<6} "
+        f"mean={statistics.mean(timings) * 1000:8.3f}ms  "
+        f"p50={statistics.median(timings) * 1000:8.3f}ms  "
+        f"p95={p95 * 1000:8.3f}ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=5432)
+    parser.add_argument("--user", default="postgres")
+    parser.add_argument("--password", default="postgres")
+    parser.add_argument("--name", default="boss_bench")
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--rtt-ms", type=float, default=0)
+    parser.add_argument(
+        "--scratch",
+        action="store_true",
+        help="confirm that the database is a scratch database, whose players can be deleted",
+    )
+    args = parser.parse_args()
+    if not args.scratch:
+        parser.error("the benchmark deletes players from the database, pass --scratch to run it on a scratch database")
+
+    db = DelayedDatabase(
+        args.rtt_ms / 1000,
+        host=args.host,
+        port=args.port,
+        user=args.user,
+        password=args.password,
+        name=args.name,
+    )
+    await db.connect()
+    try:
+        await db.execute(
+            """
+            CREATE SCHEMA IF NOT EXISTS players;
+            CREATE TABLE IF NOT EXISTS players.players (
+                player_id bigint PRIMARY KEY,
+                in_interaction boolean NOT NULL DEFAULT FALSE,
+                experience integer NOT NULL DEFAULT 0
+            );
+            """
+        )
+        # use player ids which no real discord user can have
+        base_id = 1
+        existing_ids = list(range(base_id, base_id + args.iterations))
+        await db.execute("DELETE FROM players.players WHERE player_id < $1", base_id + 3 * args.iterations)
+        await db.executemany(
+            "INSERT INTO players.players (player_id) VALUES ($1)", [(player_id,) for player_id in existing_ids]
+        )
+
+        print(f"{args.iterations} iterations, {args.rtt_ms}ms artificial round trip")
+        # existing players --> the path taken by almost every command
+        report("old gate (existing)", await time_gate(old_gate, db, existing_ids))
+        report("new gate (existing)", await time_gate(new_gate, db, existing_ids))
+        # new players --> their profiles are created
+        new_ids = range(base_id + args.iterations, base_id + 2 * args.iterations)
+        report("old gate (new player)", await time_gate(old_gate, db, list(new_ids)))
+        new_ids = range(base_id + 2 * args.iterations, base_id + 3 * args.iterations)
+        report("new gate (new player)", await time_gate(new_gate, db, list(new_ids)))
+
+        await db.execute("DELETE FROM players.players WHERE player_id < $1", base_id + 3 * args.iterations)
+    finally:
+        await db.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+"""
+Benchmark the time to render a frame of the maze (`Maze.draw_camera`) as the maze and the number of entities grow,
+comparing the old renderer, which scanned every item and enemy for every visible cell, with the indexed one.
+
+Run it from `src/`:
+    python -m benchmarks.maze_render --frames 200
+"""
+# default modules
+import argparse
+import asyncio
+import statistics
+import time
+from types import SimpleNamespace
+
+# my modules
+from modules.maze.maze import Maze
+
+
+def scan_draw_camera(view: Maze, camera, x_start_index, y_start_index):
+    """The old renderer, which scans the lists of items and enemies for every visible cell."""
+    items = list(view.game.items.values())
+    camera_str = view.FRAME_CORNER + view.FRAME_TOP * view.cam_width + view.FRAME_CORNER + "\n"
+    for y in range(view.cam_width):
+        camera_str += view.FRAME_SIDE
+        for x in range(view.cam_width):
+            if x + x_start_index == view.player.x and y + y_start_index == view.player.y:
+                camera_str += view.player.emoji
+            elif item := [item for item in items if x + x_start_index == item.x and y + y_start_index == item.y]:
+                camera_str += item[0].emoji
+            elif enemy := [
+                enemy for enemy in view.game.enemies if x + x_start_index == enemy.x and y + y_start_index == enemy.y
+            ]:
+                camera_str += enemy[0].emoji
+            else:
+                camera_str += view.CELL_EMOJIS[camera[y][x]]
+        camera_str += view.FRAME_SIDE + "\n"
+    camera_str += view.FRAME_CORNER + view.FRAME_TOP * view.cam_width + view.FRAME_CORNER
+    return camera_str
+
+
+def time_frames(draw, view: Maze, frames: int) -> list[float]:
+    timings = []
+    for _ in range(frames):
+        camera = view.get_camera()
+        start = time.perf_counter()
+        draw(*camera)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(name: str, timings: list[float]):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(
+        f"{name:<32} "
+        f"mean={statistics.mean(timings) * 1000:8.3f}ms  "
+        f"p50={statistics.median(timings) * 1000:8.3f}ms  "
+        f"p95={p95 * 1000:8.3f}ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[12, 25, 50])
+    parser.add_argument("--entities", type=int, nargs="+", default=[37, 200, 1000])
+    args = parser.parse_args()
+
+    interaction = SimpleNamespace(user=None, client=None)
+    for size in args.sizes:
+        for entities in args.entities:
+            view = Maze(interaction, (size, size))
+            game = view.game
+            # a maze of `size` has (2 * size + 1) ** 2 cells and about half of them are walls, leave some free
+            entities = min(entities, (2 * size + 1) ** 2 // 8)
+            while len(game.items) + len(game.enemies) < entities:
+                game.spawn_enemy()
+                if len(game.items) + len(game.enemies) < entities:
+                    game.spawn_item()
+
+            print(f"size={size}x{size}, {len(game.items)} items, {len(game.enemies)} enemies")
+            report("  scan", time_frames(lambda *cam: scan_draw_camera(view, *cam), view, args.frames))
+            report("  indexed", time_frames(view.draw_camera, view, args.frames))
+            view.end_maze()
+            view.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+"""
+Benchmark the maze game core (`MazeGame`) without discord, by simulating many concurrent games.
+
+Every round, each game takes a random player action (walk, run, punch or use an item) and then ticks its enemies,
+like a player pressing a button between the ticks of the maze view. Games are seeded, so runs are reproducible.
+
+Run it from `src/`:
+    python -m benchmarks.maze_simulation --games 2000 --rounds 50
+"""
+# default modules
+import argparse
+import random
+import time
+import tracemalloc
+
+# my modules
+from modules.maze.maze_game import MazeGame
+from modules.maze.maze_layouts import generate_layout
+
+
+def play_round(game: MazeGame, rng: random.Random):
+    action = rng.random()
+    if action < 0.6:
+        game.walk(rng.randrange(4))
+    elif action < 0.8:
+        for _ in range(5):
+            if game.ended or game.player.hunger < game.MIN_RUN_HUNGER or game.run_step() is None:
+                break
+    elif action < 0.95:
+        game.punch()
+    else:
+        game.use_item(rng.choice(("food", "pill", "drill")))
+    game.tick()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--size", type=int, default=12)
+    parser.add_argument("--layouts", type=int, default=20, help="number of distinct layouts shared by the games")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # mazelib and the traps use the global random generator
+    random.seed(args.seed)
+    layouts = [generate_layout((args.size, args.size)) for _ in range(args.layouts)]
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    games = [MazeGame(layouts[i % len(layouts)], seed=args.seed + i) for i in range(args.games)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    rng = random.Random(args.seed)
+    ticks = 0
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        for game in games:
+            if not game.ended:
+                play_round(game, rng)
+                ticks += 1
+    elapsed = time.perf_counter() - start
+
+    won = sum(game.won for game in games)
+    died = sum(game.ended and not game.won for game in games)
+    print(f"{args.games} games of size {args.size}x{args.size}, {args.rounds} rounds")
+    print(f"memory per game: {(after - before) / args.games / 1024:8.1f} KiB")
+    print(f"ticks per second: {ticks / elapsed:10.0f}  ({ticks} ticks in {elapsed:.2f}s)")
+    print(f"won: {won}, died: {died}, still playing: {args.games - won - died}")
+
+
+if __name__ == "__main__":
+    main()
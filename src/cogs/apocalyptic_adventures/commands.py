@@ -25,7 +25,7 @@ from utils.helpers import BossInteraction, BossItem, check_if_not_dev_guild, com
 from utils.player import Player
 
 # database
-from utils.postgres_db import Database
+from utils.postgres_db import Database, recent_writes
 from utils.template_views import BaseView
 
 
@@ -46,6 +46,9 @@ class ApocalypticAdventures(commands.Cog, name="Apocalyptic Adventures"):
             """,
             interaction.user.id,
         )
+        # include the hunger changes which have not been written to the database yet
+        hunger = max(hunger + self.bot.player_stats.get_pending_hunger(interaction.user.id), 0)
+        interaction.attached["hunger"] = hunger
         # if the hunger is smaller than 30, wait for 3 seconds before continuing
         if hunger < 30:
             await interaction.send_text(
@@ -55,21 +58,16 @@ class ApocalypticAdventures(commands.Cog, name="Apocalyptic Adventures"):
             await asyncio.sleep(3)
 
     async def cog_application_command_after_invoke(self, interaction: BossInteraction) -> None:
-        # decrease the player's hunger
-        old_hunger, new_hunger = await self.bot.db.fetchrow(
-            """
-            UPDATE players.players
-            SET hunger = hunger - $1
-            WHERE player_id = $2
-            RETURNING 
-                (SELECT hunger
-                FROM players.players
-                WHERE player_id = $2) AS old_hunger, 
-                hunger
-            """,
-            random.randint(0, 1),
-            interaction.user.id,
-        )
+        # decrease the player's hunger, it is written to the database in batches by `bot.player_stats`
+        hunger_decrease = random.randint(0, 1)
+        if not hunger_decrease:
+            return
+        self.bot.player_stats.modify_hunger(interaction.user.id, -hunger_decrease)
+
+        old_hunger = interaction.attached.get("hunger")
+        if old_hunger is None:
+            return
+        new_hunger = max(old_hunger - hunger_decrease, 0)
         if old_hunger >= 30 and new_hunger < 30:
             embed = interaction.text_embed(
                 (
@@ -588,7 +586,7 @@ class ApocalypticAdventures(commands.Cog, name="Apocalyptic Adventures"):
             )
 
         db: Database = self.bot.db
-        async with db.pool.acquire() as conn:
+        async with db.acquire() as conn:
             async with conn.transaction():
                 await conn.execute("DELETE FROM players.missions WHERE player_id = $1", user.id)
                 # insert the missions into the database table
@@ -599,6 +597,7 @@ class ApocalypticAdventures(commands.Cog, name="Apocalyptic Adventures"):
                     """,
                     new_missions,
                 )
+        recent_writes.mark(user.id)
 
     async def fetch_missions(self, user: nextcord.User):
         """Fetch the player's missions, and claim if they haven't already."""
@@ -610,6 +609,8 @@ class ApocalypticAdventures(commands.Cog, name="Apocalyptic Adventures"):
             ORDER BY finished DESC, mission_id ASC
             """,
             user.id,
+            read_only=True,
+            player_id=user.id,
         )
 
     @nextcord.slash_command(description="Check your missions and complete them for some rewards!")
@@ -14,6 +14,7 @@ from nextcord.ui import Button
 from utils import helpers
 from utils.constants import CURRENCY_EMOJIS, EmbedColour
 from utils.helpers import BossInteraction, BossItem
+from utils.message_editor import message_editor
 from utils.player import Player
 
 # database
@@ -72,9 +73,10 @@ class ScoutButton(Button["ScoutView"]):
 
                 await interaction.response.edit_message(embed=embed, view=view)
 
-                await player.modify_currency(money_reward["type"], money)
-                if item_reward:
-                    await player.add_item(item_reward["id"])
+                async with player.transaction():
+                    await player.modify_currency(money_reward["type"], money)
+                    if item_reward:
+                        await player.add_item(item_reward["id"])
 
                 await player.update_missions(interaction, 4)
 
@@ -90,6 +92,7 @@ class ScoutButton(Button["ScoutView"]):
                 if punishment["type"] == "health":
                     await player.modify_health(-value)
                 elif punishment["type"] == "hunger":
+                    await interaction.client.player_stats.flush_hunger(interaction.user.id)
                     await player.modify_hunger(-value)
 
         view.scouting_finished = True
@@ -269,7 +272,8 @@ class RaidView(BaseView):
             await player.set_in_inter(False)
         else:
             content = None
-        await self.message.edit(
+        await message_editor.edit(
+            self.message,
             content=content,
             embed=self.get_embed(msgs),
         )
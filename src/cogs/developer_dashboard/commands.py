@@ -19,6 +19,7 @@ from cogs.developer_dashboard.views import ConfirmItemDelete, EditItemView, Emoj
 from utils import constants, helpers
 from utils.constants import EmbedColour
 from utils.helpers import BossInteraction, command_info
+from utils.item_catalog import item_catalog
 from utils.player import Player
 from utils.postgres_db import Database
 from utils.template_views import BaseView
@@ -118,6 +119,8 @@ class DeveloperDashboard(commands.Cog, name="Developer Dashboard"):
             experience,
             player.id,
         )
+        self.bot.player_stats.discard(player.id, "experience")
+        Player.invalidate_summaries(player.id)
         embed = interaction.text_embed(
             f"{interaction.user.mention} set `{player.name}`'s experience to `{experience}`!",
             show_macro_msg=False,
@@ -144,6 +147,8 @@ class DeveloperDashboard(commands.Cog, name="Developer Dashboard"):
             hunger,
             player.id,
         )
+        self.bot.player_stats.discard(player.id, "hunger")
+        Player.invalidate_summaries(player.id)
         embed = interaction.text_embed(
             f"{interaction.user.mention} set `{player.name}`'s hunger to `{hunger}`!",
             show_macro_msg=False,
@@ -170,6 +175,7 @@ class DeveloperDashboard(commands.Cog, name="Developer Dashboard"):
             health,
             player.id,
         )
+        Player.invalidate_summaries(player.id)
         embed = interaction.text_embed(
             f"{interaction.user.mention} set `{player.name}`'s health to `{health}`!",
             show_macro_msg=False,
@@ -217,7 +223,7 @@ class DeveloperDashboard(commands.Cog, name="Developer Dashboard"):
             return
 
         try:
-            async with db.pool.acquire() as conn:
+            async with db.acquire() as conn:
                 async with conn.transaction():
                     # moves item to to_place
                     quantities = await conn.fetchrow(
@@ -265,6 +271,8 @@ class DeveloperDashboard(commands.Cog, name="Developer Dashboard"):
         except MoveItemException as exc:
             await interaction.send_text(exc.text)
             return
+        # the inventory has been modified in a committed transaction
+        Player(db, player).invalidate_inventory()
 
         embed = interaction.embed(
             title=f"{interaction.user.name} **UPDATED** `{player.name}'s {constants.InventoryType(inv_type)}`",
@@ -340,6 +348,7 @@ class DeveloperDashboard(commands.Cog, name="Developer Dashboard"):
                 + ") RETURNING *"
             )  # add each column into the query
             item = await db.fetchrow(sql, *values.values())
+            item_catalog.invalidate()
         except asyncpg.PostgresError as exc:
             # only devs will be able to run this command,
             # so it is safe to show the complete error message to them
@@ -486,6 +495,49 @@ class DeveloperDashboard(commands.Cog, name="Developer Dashboard"):
         await cog.update_villagers()
         await interaction.send_text("Reloaded villagers.")
 
+    @nextcord.slash_command(name="query-stats", guild_ids=[constants.DEVS_SERVER_ID])
+    async def query_stats(
+        self,
+        interaction: BossInteraction,
+        limit: int = SlashOption(
+            description="Number of queries to show, sorted by total time",
+            required=False,
+            default=5,
+            min_value=1,
+            max_value=10,
+        ),
+        reset: bool = SlashOption(description="Reset the stats after showing them", required=False, default=False),
+    ):
+        """Show the queries which have taken the longest total time, and stats of the connection pool."""
+        db: Database = self.bot.db
+        pool_stats = db.get_stats()
+        embed = interaction.embed(title="Query Stats")
+        embed.description = (
+            f"**Pool**: `{pool_stats['size']}/{pool_stats['max_size']}` connections, `{pool_stats['idle']}` idle, "
+            f"`{pool_stats['acquired']}` acquired, `{pool_stats['waiters']}` waiting\n"
+            f"**Acquire latency**: avg `{pool_stats['avg_acquire_ms']:.1f}ms`, max `{pool_stats['max_acquire_ms']:.1f}ms`\n"
+        )
+        if db.replica_connected:
+            replica_stats = db.get_stats(replica=True)
+            embed.description += (
+                f"**Replica**: `{replica_stats['size']}/{replica_stats['max_size']}` connections, "
+                f"`{replica_stats['acquired']}` acquired, `{replica_stats['waiters']}` waiting, "
+                f"avg acquire `{replica_stats['avg_acquire_ms']:.1f}ms`\n"
+            )
+
+        for stats in db.get_top_queries(limit):
+            sql = stats.sql if len(stats.sql) <= 150 else stats.sql[:147] + "..."
+            embed.description += (
+                f"```sql\n{sql}```"
+                f"> Calls: `{stats.calls:,}` | Errors: `{stats.errors:,}` | Rows: `{stats.rows:,}`\n"
+                f"> Total: `{stats.total_time * 1000:,.0f}ms` | Avg: `{stats.total_time / stats.calls * 1000:.1f}ms`"
+                f" | p95: `≤{stats.percentile(95):.0f}ms` | Max: `{stats.max_time * 1000:.0f}ms`\n"
+            )
+
+        if reset:
+            db.query_stats.clear()
+        await interaction.send(embed=embed)
+
     async def emoji_autocomplete_callback(self, interaction: BossInteraction, data: str):
         """Returns a list of autocompleted choices of emojis of a server's emoji."""
         emojis = [emoji for guild in self.bot.guilds for emoji in guild.emojis]
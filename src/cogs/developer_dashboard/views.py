@@ -15,6 +15,7 @@ from nextcord.ui import Button, Modal, Select, TextInput, button, select
 from utils import constants, helpers
 from utils.constants import EmbedColour, IntEnum
 from utils.helpers import BossInteraction, TextEmbed
+from utils.item_catalog import item_catalog
 from utils.postgres_db import Database
 from utils.template_views import BaseView, ConfirmView
 
@@ -191,6 +192,7 @@ class EditItemModal(Modal):
                 + " RETURNING *"
             )  # basically add each changed column into the query
             new_item = await db.fetchrow(sql, self.item["item_id"], *changed_values.values())
+            item_catalog.invalidate()
 
         except asyncpg.PostgresError as exc:
             # since only devs use this command, we can send them the whole error message
@@ -240,6 +242,7 @@ class ConfirmItemDelete(ConfirmView):
             """,
             self.item["item_id"],
         )
+        item_catalog.invalidate()
         await interaction.guild.get_channel(988046548309016586).send(
             f"{self.interaction.user.mention} deleted the item `{item_name}`"
         )
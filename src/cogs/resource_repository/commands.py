@@ -21,16 +21,21 @@ from nextcord.ui import Button, View
 from numerize import numerize
 
 from cogs.resource_repository.views import FarmView, InventoryView
+# farm
+from modules.farm import farm_sprites
 # maze
 from modules.maze.maze import Maze
+from modules.maze.maze_layouts import JUNGLE_SIZES
 # trade
 from modules.village.village import TradeView
 from modules.village.villagers import Villager
 # my modules and constants
 from utils import constants, helpers
-from utils.constants import COPPER, COPPER_SCRAP_RATE, SCRAP_METAL, EmbedColour
+from utils.constants import COPPER, SCRAP_METAL, EmbedColour
 from utils.helpers import (BossCurrency, BossEmbed, BossInteraction, BossItem,
                            TextEmbed, check_if_not_dev_guild, command_info)
+from utils.inventory_cache import inventory_cache
+from utils.item_catalog import item_catalog
 from utils.player import Player
 from utils.postgres_db import Database
 # command views
@@ -45,14 +50,24 @@ class ResourceRepository(commands.Cog, name="Resource Repository"):
     cooldowns.define_shared_cooldown(1, 8, SlashBucket.author, cooldown_id="sell_items", check=check_if_not_dev_guild)
     cooldowns.define_shared_cooldown(1, 6, SlashBucket.author, cooldown_id="check_inv", check=check_if_not_dev_guild)
 
+    # the ranks shown in /balance and /profile are refreshed every this number of minutes
+    RANK_REFRESH_MINUTES = 10
+
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        # decode the farm sprites once, instead of on every render
+        farm_sprites.load()
         # pylint: disable=no-member
         self.update_villagers.start()
         self.update_villagers.add_exception_type(
             asyncpg.PostgresConnectionError,
             asyncpg.exceptions.InterfaceError,
         )
+        self.refresh_net_worth_ranks.start()
+        self.refresh_net_worth_ranks.add_exception_type(
+            asyncpg.PostgresConnectionError,
+            asyncpg.exceptions.InterfaceError,
+        )
         # pylint: enable=no-member
 
     GET_ITEM_SQL = """
@@ -63,9 +78,8 @@ class ResourceRepository(commands.Cog, name="Resource Repository"):
     """
 
     async def choose_item_autocomplete(self, interaction: Interaction, data: str):
-        db: Database = self.bot.db
-        items = await db.fetch(self.GET_ITEM_SQL, data)
-        await interaction.response.send_autocomplete([i["name"] for i in items][:25])
+        items = await item_catalog.search(self.bot.db, data)
+        await interaction.response.send_autocomplete([i.name for i in items])
 
     @nextcord.slash_command(name="item", description="Get information of an item.")
     async def item(
@@ -122,7 +136,7 @@ class ResourceRepository(commands.Cog, name="Resource Repository"):
             return
 
         await db.connect()
-        async with db.pool.acquire() as conn:
+        async with db.acquire() as conn:
             async with conn.transaction():
                 await conn.execute(
                     """
@@ -183,6 +197,16 @@ class ResourceRepository(commands.Cog, name="Resource Repository"):
         start_of_next_hour = (now + datetime.timedelta(hours=1)).replace(minute=0, second=0, microsecond=0)
         await nextcord.utils.sleep_until(start_of_next_hour)
 
+    @tasks.loop(minutes=RANK_REFRESH_MINUTES)
+    async def refresh_net_worth_ranks(self):
+        """Refresh the distribution of net worths, which the ranks in /balance and /profile are looked up in."""
+        db: Database = self.bot.db
+        if db.pool is None:
+            return
+
+        await db.connect()
+        await db.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY players.net_worth_percentiles")
+
     @nextcord.slash_command(name="farm")
     async def farm(self, interaction: BossInteraction):
         """Engage yourself in a virtual farm - plant, harvest, and discover new crops!"""
@@ -250,37 +274,37 @@ class ResourceRepository(commands.Cog, name="Resource Repository"):
         return embed
 
     async def sell_all_player_items(self, button, interaction: BossInteraction):
-        async with self.bot.db.pool.acquire() as conn:
-            async with conn.transaction():
-                sold_items = await conn.fetch(
-                    """
-                    UPDATE players.inventory AS inv
-                    SET quantity = 0
-                    FROM utility.items AS i
-                    WHERE 
-                        inv.item_id = i.item_id AND 
-
-                        player_id = $1 AND 
-                        inv_type = 0 AND 
-                        i.sell_price > 0 AND
-                        NOT i.item_id = ANY($2::int[])
-                    RETURNING 
-                        i.name, 
-                        CONCAT('<:_:', i.emoji_id, '>') AS emoji,
-                        i.sell_price,
-                        (SELECT quantity As old_quantity 
-                        FROM players.inventory 
-                        WHERE player_id = $1 AND inv_type = 0 AND item_id = i.item_id) As quantity 
-                    """,
-                    interaction.user.id,
-                    interaction.attached.exclude_items,
-                )
+        player = Player(self.bot.db, interaction.user)
+        async with player.transaction() as conn:
+            sold_items = await conn.fetch(
+                """
+                UPDATE players.inventory AS inv
+                SET quantity = 0
+                FROM utility.items AS i
+                WHERE 
+                    inv.item_id = i.item_id AND 
 
-                player = Player(self.bot.db, interaction.user)
-                total_price = 0
-                for item in sold_items:
-                    total_price += item["sell_price"] * item["quantity"]
-                await player.modify_scrap(total_price)
+                    player_id = $1 AND 
+                    inv_type = 0 AND 
+                    i.sell_price > 0 AND
+                    NOT i.item_id = ANY($2::int[])
+                RETURNING 
+                    i.name, 
+                    CONCAT('<:_:', i.emoji_id, '>') AS emoji,
+                    i.sell_price,
+                    (SELECT quantity As old_quantity 
+                    FROM players.inventory 
+                    WHERE player_id = $1 AND inv_type = 0 AND item_id = i.item_id) As quantity 
+                """,
+                interaction.user.id,
+                interaction.attached.exclude_items,
+            )
+            player.invalidate_inventory()
+
+            total_price = 0
+            for item in sold_items:
+                total_price += item["sell_price"] * item["quantity"]
+            await player.modify_scrap(total_price)
         return total_price
 
     GET_SELLABLE_SQL = """
@@ -299,8 +323,13 @@ class ResourceRepository(commands.Cog, name="Resource Repository"):
     async def choose_backpack_sellable_autocomplete(self, interaction: BossInteraction, data: str):
         """Returns a list of autocompleted choices of the sellable items in a user's backpack"""
         db: Database = self.bot.db
-        items = await db.fetch(self.GET_SELLABLE_SQL, interaction.user.id, data)
-        await interaction.response.send_autocomplete([i["name"] for i in items][:25])
+        items = await item_catalog.search(
+            db,
+            data,
+            item_ids=await inventory_cache.get_item_ids(db, interaction.user.id, inv_type=0),
+            check=lambda item: item.sell_price > 0,
+        )
+        await interaction.response.send_autocomplete([i.name for i in items])
 
     @nextcord.slash_command()
     async def sell(self, interaction):
@@ -436,11 +465,10 @@ class ResourceRepository(commands.Cog, name="Resource Repository"):
         total_price = item["sell_price"] * quantity
 
         async def sell_player_items(*args, **kwargs):
-            async with db.pool.acquire() as conn:
-                async with conn.transaction():
-                    player = Player(db, interaction.user)
-                    await player.modify_scrap(total_price)
-                    await player.add_item(item["item_id"], -quantity)
+            player = Player(db, interaction.user)
+            async with player.transaction():
+                await player.modify_scrap(total_price)
+                await player.add_item(item["item_id"], -quantity)
 
         if total_price > 100_000:
             view = ConfirmView(
@@ -508,16 +536,15 @@ class ResourceRepository(commands.Cog, name="Resource Repository"):
         db: Database = interaction.client.db
         player = Player(db, interaction.user)
 
-        # when we use transactions, if an error occurs/the function returns in the context manager,
+        # when we use transactions, if an error occurs in the context manager,
         # then changes will be rolled back
-        async with db.pool.acquire() as conn:
-            async with conn.transaction():
-                try:
-                    from_amount = await player.modify_currency(from_currency, -amount)
-                    to_amount = await player.modify_currency(to_currency, exchanged_amount)
-                except ValueError:
-                    await interaction.send_text(f"You don't have enough {from_currency_msg} to make this exchange.")
-                    return
+        try:
+            async with player.transaction():
+                from_amount = await player.modify_currency(from_currency, -amount)
+                to_amount = await player.modify_currency(to_currency, exchanged_amount)
+        except ValueError:
+            await interaction.send_text(f"You don't have enough {from_currency_msg} to make this exchange.")
+            return
 
         embed = interaction.embed()
         embed.description = (
@@ -594,8 +621,10 @@ class ResourceRepository(commands.Cog, name="Resource Repository"):
     async def choose_backpack_autocomplete(self, interaction: BossInteraction, data: str):
         """Returns a list of autocompleted choices of all the items in a user's backpack"""
         db: Database = self.bot.db
-        items = await db.fetch(self.GET_BACKPACK_SQL, interaction.user.id, data if data else "")
-        await interaction.response.send_autocomplete([i["name"] for i in items if i["quantity"] is not None][:25])
+        items = await item_catalog.search(
+            db, data, item_ids=await inventory_cache.get_item_ids(db, interaction.user.id, inv_type=0)
+        )
+        await interaction.response.send_autocomplete([i.name for i in items])
 
     @nextcord.slash_command(name="use", description="Use an item to activiate its unique ability!")
     @command_info(
@@ -650,6 +679,8 @@ class ResourceRepository(commands.Cog, name="Resource Repository"):
                     return
 
                 food_value = random.randint(food_min, food_max) * quantity
+                # write the pending hunger changes first, so that they are included and clamped in order
+                await self.bot.player_stats.flush_hunger(interaction.user.id)
                 old_hunger = await db.fetchval(
                     """
                         UPDATE players.players
@@ -663,6 +694,7 @@ class ResourceRepository(commands.Cog, name="Resource Repository"):
                     food_value,
                     interaction.user.id,
                 )
+                player.invalidate_summary()
                 if old_hunger >= 100:
                     await interaction.send_text("Your hunger is already full, why are you even eating???")
                     return
@@ -717,8 +749,9 @@ class ResourceRepository(commands.Cog, name="Resource Repository"):
                     return
 
                 async def confirm_func(button, btn_interaction: BossInteraction):
-                    maze_size = (random.randint(25, 30), random.randint(25, 30))
-                    view = Maze(
+                    # a few fixed sizes, so that the layouts are ready in the pool
+                    maze_size = random.choice(JUNGLE_SIZES)
+                    view = await Maze.create(
                         btn_interaction,
                         maze_size,
                         rewards=[
@@ -779,51 +812,24 @@ class ResourceRepository(commands.Cog, name="Resource Repository"):
         db: Database = self.bot.db
 
         player = Player(db, user)
-        if not await player.is_present():
+        # include the hunger changes which have not been written to the database yet
+        await self.bot.player_stats.flush_hunger(user.id)
+        profile = await player.get_summary()
+        if profile is None:
             await interaction.send_text("The user hasn't started playing BOSS yet! Maybe invite them over?")
             return
 
-        profile = await db.fetchrow(
-            """
-            SELECT scrap_metal, copper, safe_scrap, experience, health, hunger, commands_run
-            FROM players.players
-            WHERE player_id = $1
-            """,
-            user.id,
-        )
-
         embed = interaction.embed(title=f"{user.name}'s Profile", colour=EmbedColour.INFO, with_url=True)
         embed.set_thumbnail(url=user.display_avatar.url)
 
         exp = profile["experience"]
 
-        unique_items, total_items = await db.fetchrow(
-            """
-            SELECT COUNT(DISTINCT item_id) as unique_items, COALESCE(SUM(quantity), 0) as total_items
-            FROM players.inventory
-            WHERE player_id = $1
-            """,
-            user.id,
-        )
+        unique_items, total_items = profile["unique_items"], profile["total_items"]
 
-        item_worth = await db.fetchval(
-            """
-            SELECT SUM(items.trade_price * inv.quantity)::bigint As item_worth
-                FROM players.inventory As inv
-
-                INNER JOIN utility.items
-                ON inv.item_id = items.item_id
-                
-                INNER JOIN players.players
-                ON inv.player_id = players.player_id
-            WHERE inv.player_id = $1
-            """,
-            user.id,
-        )
-        if item_worth is None:
-            item_worth = 0
-        money_worth = profile["scrap_metal"] + profile["copper"] * COPPER_SCRAP_RATE + profile["safe_scrap"]
-        net_worth = item_worth + money_worth
+        # the worths are maintained by triggers in the database, see migrations/0001_net_worth.sql
+        item_worth = profile["item_worth"]
+        net_worth = profile["net_worth"]
+        money_worth = net_worth - item_worth
 
         # Fields row 1
         embed.add_field(
@@ -881,46 +887,17 @@ class ResourceRepository(commands.Cog, name="Resource Repository"):
             user = interaction.user
         db: Database = self.bot.db
         player = Player(db, user)
-        if not await player.is_present():
+        summary = await player.get_summary()
+        if summary is None:
             await interaction.send_text("The user hasn't started playing BOSS yet! Maybe invite them over?")
             return
 
-        scrap_metal, copper, safe_scrap, item_worth = await db.fetchrow(
-            """
-            SELECT scrap_metal, copper, safe_scrap, SUM(items.trade_price * inv.quantity)::bigint As item_worth
-                FROM players.inventory As inv
-                INNER JOIN utility.items
-                ON inv.item_id = items.item_id
-                INNER JOIN players.players
-                ON inv.player_id = players.player_id
-            WHERE inv.player_id = $1
-            GROUP BY scrap_metal, copper, safe_scrap
-            """,
-            user.id,
-        )
+        # the worths are maintained by triggers in the database, see migrations/0001_net_worth.sql
+        scrap_metal, copper, safe_scrap = summary["scrap_metal"], summary["copper"], summary["safe_scrap"]
+        item_worth, net_worth, rank = summary["item_worth"], summary["net_worth"], summary["rank"]
         safe_space = round(scrap_metal * 0.2)
         used_safe = round(safe_scrap / safe_space * 100)
 
-        if item_worth is None:
-            item_worth = 0
-
-        net_worth = item_worth + scrap_metal + copper * COPPER_SCRAP_RATE + safe_scrap
-
-        rank = await db.fetchval(
-            """
-            SELECT rank 
-            FROM (
-                SELECT 
-                    p.player_id, 
-                    PERCENT_RANK() OVER (ORDER BY (p.scrap_metal + $2)) AS rank
-                FROM players.players AS p
-            ) AS ranks
-            WHERE player_id = $1
-            """,
-            user.id,
-            item_worth,
-        )
-
         embed = interaction.embed(title=f"{user.name}'s Balance", colour=EmbedColour.INFO, with_url=True)
         # row 1
         embed.add_field(name="Scrap Metal", value=f"{SCRAP_METAL} {scrap_metal:,}")
@@ -945,20 +922,12 @@ class ResourceRepository(commands.Cog, name="Resource Repository"):
     async def leaderboard(self, interaction: BossInteraction):
         leaderboard = await self.bot.db.fetch(
             """
-            SELECT 
-                players.player_id, 
-                COALESCE(SUM(items.trade_price * inv.quantity)::bigint, 0) + players.scrap_metal + players.copper * $1
-                    AS net_worth
-                FROM players.players
-                LEFT JOIN players.inventory AS inv
-                    ON inv.player_id = players.player_id
-                LEFT JOIN utility.items
-                    ON inv.item_id = items.item_id
-            GROUP BY players.player_id
+            SELECT player_id, net_worth
+            FROM players.players
             ORDER BY net_worth DESC
             LIMIT 8
             """,
-            COPPER_SCRAP_RATE,
+            read_only=True,
         )
         embed = interaction.embed(title="Net Worth Leaderboard", description="", colour=EmbedColour.INFO)
         medal_emojis = {
@@ -966,10 +935,10 @@ class ResourceRepository(commands.Cog, name="Resource Repository"):
             2: "🥈",
             3: "🥉",
         }
+        names = await self.bot.user_resolver.get_names(user_id for user_id, _ in leaderboard)
         for i, (user_id, net_worth) in enumerate(leaderboard):
-            user = await self.bot.fetch_user(user_id)
             emoji = medal_emojis.get(i + 1, "🔹")
-            embed.description += f"{emoji} ` {net_worth:,} ` - {user.name}\n"
+            embed.description += f"{emoji} ` {net_worth:,} ` - {names[user_id]}\n"
         await interaction.send(embed=embed)
 
     @nextcord.slash_command()
@@ -1033,22 +1002,8 @@ class ResourceRepository(commands.Cog, name="Resource Repository"):
     async def choose_inv_autocomplete(self, interaction: BossInteraction, data: str):
         """Returns a list of autocompleted choices of a user's inventory"""
         db: Database = self.bot.db
-        items = await db.fetch(
-            """
-            SELECT i.name
-            FROM utility.items AS i
-            INNER JOIN utility.SearchItem($2) AS s
-            ON i.item_id = s.item_id
-            INNER JOIN 
-                (SELECT DISTINCT item_id
-                FROM players.inventory
-                WHERE player_id = $1) AS inv
-            ON inv.item_id = i.item_id
-            """,
-            interaction.user.id,
-            data,
-        )
-        await interaction.response.send_autocomplete([item[0] for item in items][:25])
+        items = await item_catalog.search(db, data, item_ids=await inventory_cache.get_item_ids(db, interaction.user.id))
+        await interaction.response.send_autocomplete([i.name for i in items])
 
     async def _move_items(
         self,
@@ -1069,7 +1024,7 @@ class ResourceRepository(commands.Cog, name="Resource Repository"):
         """
         db: Database = self.bot.db
         quantities_after = {}
-        async with db.pool.acquire() as conn:
+        async with db.acquire() as conn:
             async with conn.transaction():
                 if quantity is None:  # move all items of that name in that specific inv_type
                     quantity = await conn.fetchval(
@@ -1208,6 +1163,8 @@ class ResourceRepository(commands.Cog, name="Resource Repository"):
         except MoveItemException as exc:
             await interaction.send_text(exc.text, EmbedColour.FAIL)
             return
+        # the items have been moved in a committed transaction
+        Player(db, interaction.user).invalidate_inventory()
 
         msg = await interaction.send_text("Moving your items...\n||* intentional wait *||")
         await asyncio.sleep(random.uniform(3, 8))
@@ -1225,7 +1182,7 @@ class ResourceRepository(commands.Cog, name="Resource Repository"):
 
     async def _change_balance(self, interaction: BossInteraction, action: Literal["deposit", "withdraw"], amount: int):
         """Deposit or withdraw a user's scrap metals."""
-        async with interaction.client.db.pool.acquire() as conn:
+        async with interaction.client.db.acquire() as conn:
             async with conn.transaction():
                 new_scrap, new_safe = await conn.fetchrow(
                     """
@@ -1248,6 +1205,7 @@ class ResourceRepository(commands.Cog, name="Resource Repository"):
                         EmbedColour.WARNING,
                     )
                     raise ValueError
+        Player.invalidate_summaries(interaction.user.id)
 
         embed = interaction.embed(colour=EmbedColour.DEFAULT)
         embed.description = f"**{'Deposited' if action == 'deposit' else 'Withdrew'}**\n {SCRAP_METAL} {amount:,}"
@@ -1359,18 +1317,10 @@ class ResourceRepository(commands.Cog, name="Resource Repository"):
 
     async def choose_battlegear_autocomplete(self, interaction: BossInteraction, data: str):
         """Returns a list of autocompleted choices of all the items in a user's backpack"""
-        db: Database = self.bot.db
-        items = await db.fetch(
-            """
-                SELECT i.*, CONCAT('<:_:', i.emoji_id, '>') AS emoji
-                FROM utility.items AS i
-                INNER JOIN utility.SearchItem($1) AS s
-                ON i.item_id = s.item_id
-                WHERE i.other_attributes ? 'battlegear_type'
-            """,
-            data if data else "",
+        items = await item_catalog.search(
+            self.bot.db, data, check=lambda item: "battlegear_type" in item.other_attributes
         )
-        await interaction.response.send_autocomplete([i["name"] for i in items][:25])
+        await interaction.response.send_autocomplete([i.name for i in items])
 
     @battlegear.subcommand(description="Equip your battlegear")
     async def equip(
@@ -1436,19 +1386,11 @@ class ResourceRepository(commands.Cog, name="Resource Repository"):
             await change_battlegear()
             return
 
-        old_battlegear = await db.fetchrow(
-            """
-            SELECT 
-            name, CONCAT('<:_:', emoji_id, '>') AS emoji
-            FROM utility.items
-            WHERE item_id = $1
-            """,
-            old_battlegear_id,
-        )
+        old_battlegear = BossItem(old_battlegear_id)
         embed = interaction.embed(
             title="Pending Confirmation",
             description=(
-                f"Do you want to replace {old_battlegear['emoji']} **{old_battlegear['name']}**"
+                f"Do you want to replace {await old_battlegear.get_emoji(db)} **{await old_battlegear.get_name(db)}**"
                 f" with {item['emoji']} **{item['name']}** as your {battlegear_type}?"
             ),
         )
@@ -1479,17 +1421,11 @@ class ResourceRepository(commands.Cog, name="Resource Repository"):
         if old_battlegear_id is None:
             await interaction.send_text(f"You have not equipped any {battlegear_type} previously.", EmbedColour.WARNING)
             return
-        old_battlegear = await db.fetchrow(
-            """
-            SELECT 
-            name, CONCAT('<:_:', emoji_id, '>') AS emoji
-            FROM utility.items
-            WHERE item_id = $1
-            """,
-            old_battlegear_id,
-        )
+        old_battlegear = BossItem(old_battlegear_id)
         # tell the users that the battlegear has been removed
-        await interaction.send_text(f"Successfully un-equipped **{old_battlegear['name']}** {old_battlegear['emoji']}!")
+        await interaction.send_text(
+            f"Successfully un-equipped **{await old_battlegear.get_name(db)}** {await old_battlegear.get_emoji(db)}!"
+        )
 
     @battlegear.subcommand(description="View a user's list of equipped battlegear")
     async def view(
@@ -1523,6 +1459,8 @@ class ResourceRepository(commands.Cog, name="Resource Repository"):
                     ORDER BY type_name
                 """,
                 user.id,
+                read_only=True,
+                player_id=user.id,
             )
             embed = interaction.embed(title=f"{user.name}'s Equipped Battlegear", colour=EmbedColour.INFO)
             player = Player(db, user)
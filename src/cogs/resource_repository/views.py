@@ -1,7 +1,9 @@
 # default modules
+import asyncio
 import math
 import re
 from collections import Counter
+from contextlib import suppress
 from datetime import datetime
 from io import BytesIO
 from string import ascii_uppercase
@@ -14,9 +16,11 @@ import nextcord
 import pytz
 from nextcord import ButtonStyle, Embed, Interaction, SelectOption
 from nextcord.ui import Button, Select, button, select
-from PIL import Image, ImageDraw, ImageFont
 
 # my modules and constants
+from modules.farm.crop_types import crop_type_cache, get_growth_stage, get_next_stage_change
+from modules.farm.farm_image_cache import farm_image_cache
+from modules.farm.farm_render import farm_renderer
 from utils import constants, helpers
 from utils.constants import EmbedColour
 from utils.helpers import TextEmbed
@@ -24,8 +28,6 @@ from utils.player import Player
 from utils.postgres_db import Database
 from utils.template_views import BaseView
 
-TILE_SIZE = 128  # width, height of tiles
-
 
 async def _get_farm_embed_and_img(
     player: Player,
@@ -36,12 +38,14 @@ async def _get_farm_embed_and_img(
     embed: Embed = None,
     label_crops: bool = False,
     selected_crops: list[int] = None,
+    message: nextcord.Message = None,
 ):
     """
     ### Usage
     Returns a `dict` containing the following key-value pairs:
         `embed`: embed_of_farm
-        `file`: farm_image
+        `file`: farm_image, omitted if the image does not need to be uploaded
+        `image_key`: the key of the image in `farm_image_cache`, which must be popped before sending the message
 
     ### Parameters
     `player`: `Player`
@@ -49,6 +53,7 @@ async def _get_farm_embed_and_img(
     `farm_width`: value obtained from the database (`players.farm.width`)
     `embed`: `Embed` containing default titles, fields, etc. The description will be cleared.
     `selected_crops`: list of indices of crops that will be highlighted with a red rectangle
+    `message`: the message which will be edited, if its attachment is the same image it is kept
     """
     if selected_crops is None:
         selected_crops = []
@@ -57,102 +62,67 @@ async def _get_farm_embed_and_img(
         embed.set_author(name=f"{player.user.name}'s Farm")
     embed.colour = constants.EmbedColour.DEFAULT
 
-    db: Database = player.db
-    crop_types = await db.fetch(
-        """
-        SELECT crop_type_id, name, growth_period
-        FROM utility.crop_types
-        """
-    )
+    crop_types = await crop_type_cache.get_all(player.db)
 
     embed.description = ""
-    farm_img = Image.new("RGBA", (farm_width * TILE_SIZE, farm_height * TILE_SIZE))
-
-    x = y = 0  # top-left corner of crop image to be pasted in
 
     now = datetime.now(tz=pytz.UTC)
 
-    for index, crop in enumerate(farm):
+    # the name of the sprite of each tile
+    tiles = []
+    for crop in farm:
         if crop:
-            # find the relevant crop type
-            crop_type = [crop_type for crop_type in crop_types if crop_type["crop_type_id"] == crop["type"]][0]
-
-            planted_at: datetime = crop["planted_at"]
-            ready_at: datetime = planted_at + crop_type["growth_period"]
-
-            # check if the crop has finished growing
-            if now < ready_at:  # crop has not finished growing
-                # unready crops have 2 stages (0 and 1)
-                # this will choose 1 of them based on how long they have been growing
-                growth_stage = (now - planted_at) / crop_type["growth_period"] * 2
-                growth_stage = math.floor(growth_stage)
-
-            else:  # crop has finished growing
-                growth_stage = 2
-
-            # paste the crop image into the farm image
-            tile_img = Image.open(f"resources/crops/{crop_type['name']}_{growth_stage}.png")
+            crop_type = crop_types[crop["type"]]
+            tiles.append(f"{crop_type.name}_{get_growth_stage(crop, crop_type, now)}")
 
         else:
-            # tile is empty, paste farm_empty image
-            tile_img = Image.open("resources/crops/farm_empty.png")
-
-        # add a red rectangle into the image if the index is in the list of selected_crops
-        if index in selected_crops:
-            crop_draw = ImageDraw.Draw(tile_img)
-            # the image here is image of crop/empty tile, not `farm_img`
-            crop_draw.rectangle(
-                [
-                    (10, 10),
-                    (TILE_SIZE - 10, TILE_SIZE - 10),
-                ],  # top-left and bottom-right coords for the rectangle
-                outline="#58091F",
-                width=10,
-            )
-
-        # add a small label in bottom right corner of crop if `label_crops` is True
-        if label_crops:
-            crop_draw = ImageDraw.Draw(tile_img)
-            label = f"{ascii_uppercase[index // farm_width]}{index % farm_width + 1}"  # example label: A1
-
-            font = ImageFont.truetype("resources/font/font.ttf", 24)
-            txt_width, txt_height = font.getsize(label)
-
-            # draw a background rectangle with 5px padding around the text
-            crop_draw.rounded_rectangle(
-                (
-                    (TILE_SIZE - 5 - txt_width - 5, TILE_SIZE - 5 - txt_height - 5),
-                    (TILE_SIZE - 5, TILE_SIZE - 5),
-                ),
-                fill="#1e130e",
-                radius=5,
-            )
-
-            # draw the label
-            # same as the rectangle, the image here is image of crop/empty tile, not `farm_img`
-            # text will be white by default
-            crop_draw.text(
-                (TILE_SIZE - 5 - txt_width - 2, TILE_SIZE - 5 - txt_height - 5),
-                text=label,
-                font=font,
-            )
+            # tile is empty
+            tiles.append("farm_empty")
+
+    selected_crops = frozenset(selected_crops)
+    image_key = farm_image_cache.get_key(tiles, farm_width, farm_height, label_crops, selected_crops)
+
+    if message is not None and farm_image_cache.get_message_image(message.id) == image_key:
+        # the message already has the image, keep its attachment
+        embed.set_image("attachment://farm.png")
+        return dict(embed=embed, image_key=image_key)
+
+    if message is None and (url := farm_image_cache.get_url(image_key)):
+        # the image has been uploaded recently, show it in the new message without uploading it again
+        embed.set_image(url)
+        return dict(embed=embed, image_key=image_key)
+
+    image = farm_image_cache.get(image_key)
+    if image is None:
+        # composite and encode the image in the worker pool, so that it does not block the event loop
+        image = await farm_renderer.render(
+            tiles,
+            farm_width,
+            farm_height,
+            label_crops=label_crops,
+            selected_crops=selected_crops,
+        )
+        farm_image_cache.put(image_key, image)
 
-        farm_img.paste(tile_img, (x, y))
+    farm_img_file = nextcord.File(BytesIO(image), "farm.png")
+    embed.set_image("attachment://farm.png")
 
-        x += TILE_SIZE
-        # change to a new row. x % 3 should be modified to show number of columns in farm, not hard-coded
-        if x / TILE_SIZE == farm_width:
-            x = 0
-            y += TILE_SIZE
+    return dict(embed=embed, file=farm_img_file, image_key=image_key)
 
-    output = BytesIO()
-    farm_img.save(output, format="PNG")
-    output.seek(0)
 
-    farm_img_file = nextcord.File(output, "farm.png")
-    embed.set_image("attachment://farm.png")
-
-    return dict(embed=embed, file=farm_img_file)
+async def _edit_farm_message(interaction: Interaction, view, **kwargs):
+    """
+    Respond to a component interaction by editing its message to show the farm of `view`,
+    and remember the image in the message. `kwargs` are passed to `view.get_msg()`.
+    """
+    msg = await view.get_msg(message=interaction.message, **kwargs)
+    await interaction.response.edit_message(**msg)
+    edited_message = None
+    if "file" in msg:
+        # `edit_message()` returns the cached message from before the edit, whose attachment is the old image,
+        # so fetch the edited message for the url of the uploaded image
+        edited_message = await interaction.original_message()
+    farm_image_cache.remember(interaction.message.id, view.image_key, edited_message)
 
 
 class FarmView(BaseView):
@@ -163,8 +133,15 @@ class FarmView(BaseView):
     Inherited from `BaseView` (subclass of `nextcord.View`)
     """
 
+    TIMEOUT = 180
+    # refreshes are served from the last render until a crop's growth stage changes,
+    # unless the farm was last fetched this number of seconds ago (it may have been changed in another message)
+    MAX_RENDER_AGE = 60
+    # auto-refresh stops after this number of seconds
+    AUTO_REFRESH_DURATION = 60 * 60
+
     def __init__(self, interaction: Interaction, player: Player):
-        super().__init__(interaction, timeout=180)
+        super().__init__(interaction, timeout=self.TIMEOUT)
         self.player = player
 
         self.farm = None
@@ -174,6 +151,12 @@ class FarmView(BaseView):
         self.is_set_up = False
 
         self.msg: nextcord.PartialInteractionMessage | nextcord.WebhookMessage = None
+        self.image_key = None  # the key of the last rendered image in `farm_image_cache`
+
+        # the time the farm was fetched, and the next time any crop's growth stage changes (`None` if none will)
+        self.fetched_at: datetime = None
+        self.next_stage_change: datetime = None
+        self.auto_refresh_task: asyncio.Task = None
 
     async def set_up(self):
         """
@@ -185,16 +168,22 @@ class FarmView(BaseView):
         """
         self.is_set_up = True
         res = await self.player.get_farm()
+        self.fetched_at = datetime.now(tz=pytz.UTC)
 
         if res is None:
             self.farm = self.farm_width = self.farm_height = None
+            self.next_stage_change = None
         else:
             self.farm, self.farm_width, self.farm_height = res
+            crop_types = await crop_type_cache.get_all(self.player.db)
+            self.next_stage_change = get_next_stage_change(self.farm, crop_types, self.fetched_at)
 
     async def get_msg(self, embed: Embed = None, **kwargs):
         if not embed:
             embed = Embed()
         embed.set_author(name=f"{self.player.user.name}'s Farm")
+        if self.auto_refresh_task is not None:
+            embed.set_footer(text="Auto-refreshing when the crops grow")
 
         msg = await _get_farm_embed_and_img(
             self.player,
@@ -204,6 +193,7 @@ class FarmView(BaseView):
             embed=embed,
             **kwargs,
         )
+        self.image_key = msg.pop("image_key")
         msg.update(view=self)
         return msg
 
@@ -229,29 +219,72 @@ class FarmView(BaseView):
             msg.update(view=nextcord.utils.MISSING)
 
         self.msg = await interaction.send(**msg)
+        if "file" in msg:
+            # remember the url of the uploaded image, so that it can be shown again without uploading it
+            sent_message = self.msg
+            if isinstance(sent_message, nextcord.PartialInteractionMessage):
+                sent_message = await sent_message.fetch()
+            farm_image_cache.remember(sent_message.id, self.image_key, sent_message)
+
+    def stop_auto_refresh(self):
+        if self.auto_refresh_task is not None:
+            self.auto_refresh_task.cancel()
+            self.auto_refresh_task = None
+            self.timeout = self.TIMEOUT
+            auto_refresh_btn = [i for i in self.children if i.custom_id == "auto_refresh"][0]
+            auto_refresh_btn.style = ButtonStyle.grey
+
+    async def _auto_refresh(self, message: nextcord.Message):
+        """Edit the message whenever a crop's growth stage changes, for at most `AUTO_REFRESH_DURATION` seconds."""
+        stop_at = datetime.now(tz=pytz.UTC).timestamp() + self.AUTO_REFRESH_DURATION
+        try:
+            while self.next_stage_change is not None and self.next_stage_change.timestamp() < stop_at:
+                delay = (self.next_stage_change - datetime.now(tz=pytz.UTC)).total_seconds()
+                # wait for a second more, so that the stage has surely changed
+                await asyncio.sleep(max(delay, 0) + 1)
+
+                await self.set_up()
+                if not self.farm:
+                    break
+                msg = await self.get_msg(message=message)
+                edited_message = await message.edit(**msg)
+                farm_image_cache.remember(message.id, self.image_key, edited_message)
+        except nextcord.NotFound:  # the message has been deleted
+            return
+        finally:
+            self.auto_refresh_task = None
+            self.timeout = self.TIMEOUT
+            auto_refresh_btn = [i for i in self.children if i.custom_id == "auto_refresh"][0]
+            auto_refresh_btn.style = ButtonStyle.grey
+
+        # auto-refresh has ended by itself, show it in the button
+        # editing the message with the view also starts its timeout again, with `TIMEOUT`
+        with suppress(nextcord.NotFound):
+            await message.edit(view=self)
+
+    async def on_timeout(self) -> None:
+        self.stop_auto_refresh()
+        await super().on_timeout()
 
     @button(label="Plant", style=ButtonStyle.blurple)
     async def plant(self, btn: Button, interaction: Interaction):
         """Turn to a new page, `PlantView`, which allows users to plant the crops."""
+        self.stop_auto_refresh()
         view = PlantView(self.interaction, self.player, self.farm, self.farm_width, self.farm_height)
         await view.update_components()
-        await interaction.response.edit_message(**await view.get_msg())
+        await _edit_farm_message(interaction, view)
 
     @button(label="Harvest", style=ButtonStyle.blurple)
     async def harvest(self, btn: Button, interaction: Interaction):
         """Turn to a new page, `HarvestView`, which allows users to harvest the crops."""
+        self.stop_auto_refresh()
         view = HarvestView(self.interaction, self.player, self.farm, self.farm_width, self.farm_height)
         await view.update_components()
-        await interaction.response.edit_message(**await view.get_msg())
+        await _edit_farm_message(interaction, view)
 
     @button(label="Progress")
     async def progress(self, btn: Button, interaction: Interaction):
-        crop_types = await self.player.db.fetch(
-            """
-            SELECT crop_type_id AS id, name, growth_period, CONCAT('<:_:', grown_emoji_id, '>') AS emoji
-            FROM utility.crop_types
-            """
-        )
+        crop_types = await crop_type_cache.get_all(self.player.db)
 
         embed = Embed()
         now = datetime.now(tz=pytz.UTC)
@@ -263,24 +296,23 @@ class FarmView(BaseView):
 
         for index, crop in enumerate(self.farm):
             if crop:
-                # find the relevant crop type
-                crop_type = [crop_type for crop_type in crop_types if crop_type["id"] == crop["type"]][0]
+                crop_type = crop_types[crop["type"]]
 
                 planted_at: datetime = crop["planted_at"]
-                ready_at: datetime = planted_at + crop_type["growth_period"]
+                ready_at: datetime = planted_at + crop_type.growth_period
 
                 # update the embed description to show the crop's progress (i.e. when it will be ready)
                 if now < ready_at:
                     # crop has not fully grown
                     unready_msg += (
-                        f"` {index + 1: >{max_tile_length}} ` {crop_type['emoji']} **{crop_type['name'].capitalize()}**"
+                        f"` {index + 1: >{max_tile_length}} ` {crop_type.emoji} **{crop_type.name.capitalize()}**"
                         f" ready <t:{int(ready_at.timestamp())}:R>\n"
                     )
                 else:
                     # crop has fully grown
                     ready_msg += (
                         f"_` {index + 1: >{max_tile_length}} `_"
-                        f" {crop_type['emoji']} **{crop_type['name'].capitalize()}** ready to harvest!\n"
+                        f" {crop_type.emoji} **{crop_type.name.capitalize()}** ready to harvest!\n"
                     )
 
         if not (ready_msg or unready_msg):
@@ -328,7 +360,7 @@ class FarmView(BaseView):
         view = FarmView(interaction, self.player)
         await view.set_up()
 
-        await interaction.response.edit_message(**await view.get_msg())
+        await _edit_farm_message(interaction, view)
 
         await interaction.send(
             embed=TextEmbed(f"Farm size is now increased to `{view.farm_width}x{view.farm_height}`!"),
@@ -338,12 +370,36 @@ class FarmView(BaseView):
     @button(emoji="🔄")
     async def refresh_view(self, btn: Button, interaction: Interaction):
         """Refresh the page."""
-        view = FarmView(interaction, self.player)
-        await view.set_up()
+        now = datetime.now(tz=pytz.UTC)
+        if (
+            self.fetched_at is not None
+            and (now - self.fetched_at).total_seconds() < self.MAX_RENDER_AGE
+            and (self.next_stage_change is None or now < self.next_stage_change)
+        ):
+            # nothing has grown since the last render
+            await interaction.response.defer()
+            return
 
-        await interaction.response.edit_message(
-            **await self.get_msg(),
-        )
+        await self.set_up()
+        await _edit_farm_message(interaction, self)
+
+    @button(label="Auto-refresh", emoji="⏱️", custom_id="auto_refresh")
+    async def toggle_auto_refresh(self, btn: Button, interaction: Interaction):
+        """Opt in to editing the message automatically whenever a crop's growth stage changes."""
+        if self.auto_refresh_task is not None:
+            self.stop_auto_refresh()
+        else:
+            if self.next_stage_change is None:
+                await interaction.send(embed=TextEmbed("None of your crops are growing!"), ephemeral=True)
+                return
+            # nextcord has already set the expiry of the view from `TIMEOUT` before this callback,
+            # but its timeout task stops without timing out if the timeout is `None`.
+            # the timeout starts again when the message is edited with the view after auto-refresh stops
+            self.timeout = None
+            btn.style = ButtonStyle.green
+            self.auto_refresh_task = asyncio.create_task(self._auto_refresh(interaction.message))
+
+        await _edit_farm_message(interaction, self)
 
     async def interaction_check(self, interaction: Interaction) -> bool:
         if not self.is_set_up:  # halt the interaction if `FarmView` is not set up
@@ -369,6 +425,8 @@ class PlantView(BaseView):
         self.crops_to_plant = None
         self.type_to_plant = None
 
+        self.image_key = None  # the key of the last rendered image in `farm_image_cache`
+
     async def update_components(self):
         """Update the view's select options and buttons. Should be run before sending the message."""
         # update the crops_select select options and select_all button
@@ -416,20 +474,15 @@ class PlantView(BaseView):
         type_select = [i for i in self.children if i.custom_id == "type_select"][0]
         type_select.options = []
 
-        crop_types = await self.player.db.fetch(
-            """
-            SELECT crop_type_id AS id, name, growth_period, grown_emoji_id AS emoji
-            FROM utility.crop_types
-            """
-        )
+        crop_types = await crop_type_cache.get_all(self.player.db)
 
-        for crop_type in crop_types:
+        for crop_type in crop_types.values():
             type_select.options.append(
                 SelectOption(
-                    label=f"{crop_type['name'].capitalize()} ({crop_type['growth_period']})",
-                    value=crop_type["id"],
-                    emoji=f"<:_:{crop_type['emoji']}>",
-                    default=crop_type["id"] == self.type_to_plant,
+                    label=f"{crop_type.name.capitalize()} ({crop_type.growth_period})",
+                    value=crop_type.crop_type_id,
+                    emoji=crop_type.emoji,
+                    default=crop_type.crop_type_id == self.type_to_plant,
                 )
             )
 
@@ -453,6 +506,7 @@ class PlantView(BaseView):
             label_crops=True,
             **kwargs,
         )
+        self.image_key = msg.pop("image_key")
         msg.update(view=self)
         return msg
 
@@ -478,7 +532,7 @@ class PlantView(BaseView):
             if str(option.value) in sel.values:
                 option.default = True
 
-        await interaction.response.edit_message(**await self.get_msg(selected_crops=self.crops_to_plant))
+        await _edit_farm_message(interaction, self, selected_crops=self.crops_to_plant)
 
     @select(
         placeholder="Choose the crops to plant...",
@@ -500,7 +554,7 @@ class PlantView(BaseView):
                 option.default = True
                 embed.add_field(name="Planting", value=f"{option.emoji} **{option.label}**")
 
-        await interaction.response.edit_message(**await self.get_msg(embed, selected_crops=self.crops_to_plant))
+        await _edit_farm_message(interaction, self, embed=embed, selected_crops=self.crops_to_plant)
 
     @button(
         label="Select all empty tiles",
@@ -527,7 +581,7 @@ class PlantView(BaseView):
 
         await self.update_components()
 
-        await interaction.response.edit_message(**await self.get_msg(selected_crops=self.crops_to_plant))
+        await _edit_farm_message(interaction, self, selected_crops=self.crops_to_plant)
 
     @button(label="Go Back", row=3)
     async def return_to_main_view(self, btn: Button, interaction: Interaction):
@@ -535,7 +589,7 @@ class PlantView(BaseView):
         view = FarmView(interaction, self.player)
         await view.set_up()
 
-        await interaction.response.edit_message(**await view.get_msg())
+        await _edit_farm_message(interaction, view)
 
     @button(
         label="Plant",
@@ -593,7 +647,7 @@ class PlantView(BaseView):
         view = FarmView(interaction, self.player)
         await view.set_up()
 
-        await interaction.response.edit_message(**await view.get_msg())
+        await _edit_farm_message(interaction, view)
 
         # find the name and emoji of the crop type
         # the default option is the one the user chose, so here we fetch that and get its label and emoji
@@ -626,6 +680,23 @@ class HarvestView(BaseView):
 
         self.crops_to_harvest = None
 
+        self.image_key = None  # the key of the last rendered image in `farm_image_cache`
+
+    async def get_ready_tiles(self) -> list[int]:
+        """Get the indices of the tiles with fully grown crops."""
+        crop_types = await crop_type_cache.get_all(self.player.db)
+        now = datetime.now(tz=pytz.UTC)
+
+        ready_tiles = []
+        for index, crop in enumerate(self.farm):
+            if crop is not None:
+                # check if it has passed the `ready_at` time, which means the crop is ready to be harvested.
+                ready_at: datetime = crop["planted_at"] + crop_types[crop["type"]].growth_period
+
+                if now > ready_at:
+                    ready_tiles.append(index)
+        return ready_tiles
+
     async def update_components(self):
         """Update the view's select options and buttons. Should be run before sending the message."""
         crops_select = [i for i in self.children if i.custom_id == "crops_select"][0]
@@ -655,27 +726,7 @@ class HarvestView(BaseView):
 
             crops_select.disabled = False
 
-        ready_tiles = []
-
-        crop_types = await self.player.db.fetch(
-            """
-            SELECT crop_type_id AS id, name, growth_period
-            FROM utility.crop_types
-            """
-        )
-
-        now = datetime.now(tz=pytz.UTC)
-
-        for index, crop in enumerate(self.farm):
-            if crop is not None:
-                # find the relevant crop type
-                crop_type = [crop_type for crop_type in crop_types if crop_type["id"] == crop["type"]][0]
-
-                # check if it has passed the `ready_at` time, which means the crop is ready to be harvested.
-                ready_at: datetime = crop["planted_at"] + crop_type["growth_period"]
-
-                if now > ready_at:
-                    ready_tiles.append(index)
+        ready_tiles = await self.get_ready_tiles()
 
         select_all_btn = [i for i in self.children if i.custom_id == "select_all_ready"][0]
 
@@ -710,6 +761,7 @@ class HarvestView(BaseView):
             label_crops=True,
             **kwargs,
         )
+        self.image_key = msg.pop("image_key")
         msg.update(view=self)
         return msg
 
@@ -730,7 +782,7 @@ class HarvestView(BaseView):
 
         await self.update_components()
 
-        await interaction.response.edit_message(**await self.get_msg(selected_crops=self.crops_to_harvest))
+        await _edit_farm_message(interaction, self, selected_crops=self.crops_to_harvest)
 
     @button(
         label="Select all ready tiles",
@@ -741,27 +793,7 @@ class HarvestView(BaseView):
         if self.crops_to_harvest:  # deselect all
             self.crops_to_harvest = []
         else:  # select all
-            ready_tiles = []
-
-            crop_types = await self.player.db.fetch(
-                """
-                SELECT crop_type_id AS id, name, growth_period
-                FROM utility.crop_types
-                """
-            )
-
-            now = datetime.now(tz=pytz.UTC)
-
-            for index, crop in enumerate(self.farm):
-                if crop is not None:
-                    # find the relevant crop type
-                    crop_type = [crop_type for crop_type in crop_types if crop_type["id"] == crop["type"]][0]
-
-                    # check if it has passed the `ready_at` time, which means the crop is ready to be harvested.
-                    ready_at: datetime = crop["planted_at"] + crop_type["growth_period"]
-
-                    if now > ready_at:
-                        ready_tiles.append(index)
+            ready_tiles = await self.get_ready_tiles()
 
             if not ready_tiles:
                 await interaction.send(
@@ -774,7 +806,7 @@ class HarvestView(BaseView):
 
         await self.update_components()
 
-        await interaction.response.edit_message(**await self.get_msg(selected_crops=self.crops_to_harvest))
+        await _edit_farm_message(interaction, self, selected_crops=self.crops_to_harvest)
 
     @button(label="Go Back", row=3)
     async def return_to_main_view(self, btn: Button, interaction: Interaction):
@@ -782,7 +814,7 @@ class HarvestView(BaseView):
         view = FarmView(interaction, self.player)
         await view.set_up()
 
-        await interaction.response.edit_message(**await view.get_msg())
+        await _edit_farm_message(interaction, view)
 
     @button(
         label="Harvest",
@@ -799,17 +831,7 @@ class HarvestView(BaseView):
 
         self.farm, self.farm_width, self.farm_height = await self.player.get_farm()
 
-        crop_types = await self.player.db.fetch(
-            """
-            SELECT 
-                crop_type_id AS id, 
-                name, 
-                growth_period, 
-                CONCAT('<:_:', grown_emoji_id, '>') AS emoji, 
-                grown_item_id AS item
-            FROM utility.crop_types
-            """
-        )
+        crop_types = await crop_type_cache.get_all(self.player.db)
 
         now = datetime.now(tz=pytz.UTC)
 
@@ -820,19 +842,18 @@ class HarvestView(BaseView):
 
         for index, crop in enumerate(self.farm):
             if index in self.crops_to_harvest and crop is not None:
-                # find the relevant crop type
-                crop_type = [crop_type for crop_type in crop_types if crop_type["id"] == crop["type"]][0]
+                crop_type = crop_types[crop["type"]]
 
                 # harvest the crop and make the tile empty
                 self.farm[index] = None
 
                 # check if it has passed the `ready_at` time, which means the crop is ready to be harvested.
-                ready_at: datetime = crop["planted_at"] + crop_type["growth_period"]
+                ready_at: datetime = crop["planted_at"] + crop_type.growth_period
 
                 if now > ready_at:
-                    altered_crops["harvested"].update({crop_type["id"]: 1})
+                    altered_crops["harvested"].update({crop_type.crop_type_id: 1})
                 else:
-                    altered_crops["removed"].update({crop_type["id"]: 1})
+                    altered_crops["removed"].update({crop_type.crop_type_id: 1})
 
         farm_for_query = []
         for crop in self.farm:
@@ -842,33 +863,48 @@ class HarvestView(BaseView):
             else:
                 farm_for_query.append(crop)
 
-        # update the database
+        # the items of the harvested crops, several crop types may grow into the same item
+        harvested_items = Counter()
+        for crop_type_id, count in altered_crops["harvested"].items():
+            harvested_items[crop_types[crop_type_id].grown_item_id] += count
+
+        # update the farm and add the items into the backpack in a single statement, which runs in one transaction
         await self.player.db.execute(
             """
-            UPDATE players.farm
-            SET farm = $1
-            WHERE player_id = $2
+            WITH updated_farm AS (
+                UPDATE players.farm
+                SET farm = $1
+                WHERE player_id = $2
+                RETURNING player_id
+            )
+            INSERT INTO players.inventory (player_id, inv_type, item_id, quantity)
+            SELECT updated_farm.player_id, $3, harvested.item_id, harvested.quantity
+            FROM updated_farm
+            CROSS JOIN unnest($4::bigint[], $5::bigint[]) AS harvested(item_id, quantity)
+            ON CONFLICT(player_id, inv_type, item_id) DO UPDATE
+                SET quantity = inventory.quantity + excluded.quantity
             """,
             farm_for_query,
             interaction.user.id,
+            constants.InventoryType.BACKPACK.value,
+            list(harvested_items.keys()),
+            list(harvested_items.values()),
         )
-        for crop_type_id, count in altered_crops["harvested"].items():
-            crop_type = [i for i in crop_types if i["id"] == crop_type_id][0]
-            await self.player.add_item(crop_type["item"], quantity=count)
+        self.player.invalidate_inventory()
 
         # return to the main page
         view = FarmView(interaction, self.player)
         await view.set_up()
 
-        await interaction.response.edit_message(**await view.get_msg())
+        await _edit_farm_message(interaction, view)
 
         embed = Embed()
 
         for name, crops in altered_crops.items():
             msg = ""
             for crop_type_id, count in crops.items():
-                crop_type = [i for i in crop_types if i["id"] == crop_type_id][0]
-                msg += f"\n` {count}x ` {crop_type['emoji']} **{crop_type['name'].title()}**"
+                crop_type = crop_types[crop_type_id]
+                msg += f"\n` {count}x ` {crop_type.emoji} **{crop_type.name.title()}**"
 
             embed.add_field(name=name.capitalize(), value=msg if msg else "Nothing", inline=False)
 
@@ -876,6 +912,10 @@ class HarvestView(BaseView):
 
 
 class InventoryView(BaseView):
+    # the key items are sorted by, followed by their names:
+    # their trade prices in descending order (items without one last) if the player sorts by worth, otherwise nothing
+    SORT_KEY_SQL = "(CASE WHEN $3 THEN -COALESCE(i.trade_price, -1) ELSE 0 END)"
+
     def __init__(
         self,
         interaction: Interaction,
@@ -889,16 +929,21 @@ class InventoryView(BaseView):
         self.page = page
         self.items_per_page = 6
 
-        self.inv = []
-        self.items = []
+        # maps item types to the number of unique items and the total quantity of that type in the inventory
+        self.type_counts: dict[int, tuple[int, int]] = {}
+        self.items = []  # the items shown on the current page
         self.item_types = []
 
+        # read once per view
+        self.sort_by_worth = False
+        self.compact = False
+
         self.message: nextcord.Message = None
 
         self.old_selected_values = []
 
     def _get_types_options(self) -> list[SelectOption]:
-        """Gets a list of SelectOption objects for the item categories. Should be run *after* get_inv_embed() is run
+        """Gets a list of SelectOption objects for the item categories. Should be run *after* get_inv_content() is run
 
         Returns:
             A list of SelectOption objects.
@@ -908,7 +953,7 @@ class InventoryView(BaseView):
         options = []
         # Add an option for every category
         for i in constants.ItemType:
-            if next((j for j in self.inv if j["type"] == i.value), None):
+            if i.value in self.type_counts:
                 options.append(SelectOption(label=i.name.capitalize(), value=str(i.value), default=False))
 
         # Sort the options by label.
@@ -928,6 +973,7 @@ class InventoryView(BaseView):
     ):
         """Respond to the interaction by sending a message."""
         view = cls(interaction, user, inv_type, page)
+        await view.get_settings()
         await view.get_inv_content()
         embed = await view.get_inv_embed()
 
@@ -942,29 +988,110 @@ class InventoryView(BaseView):
         view.disable_buttons()
         view.message = await interaction.send(embed=embed, view=view)
 
+    async def get_settings(self):
+        """Read the settings which affect how the inventory is shown."""
+        db: Database = self.interaction.client.db
+        settings = await db.fetchrow(
+            """
+            SELECT
+                (SELECT inv_worth_sort FROM players.settings WHERE player_id = $1) AS inv_worth_sort,
+                (SELECT compact_mode FROM players.settings WHERE player_id = $2) AS compact_mode
+            """,
+            self.user.id,
+            self.interaction.user.id,
+            read_only=True,
+            player_id=self.user.id,
+        )
+        self.sort_by_worth = bool(settings["inv_worth_sort"])
+        self.compact = bool(settings["compact_mode"])
+
     async def get_inv_content(self):
+        """Count the items of each type in the inventory, without fetching the items themselves."""
         db: Database = self.interaction.client.db
-        self.inv = await db.fetch(
+        rows = await db.fetch(
             """
-            SELECT i.name, CONCAT('<:_:', i.emoji_id, '>') AS emoji, i.rarity, i.type, inv.quantity
+            SELECT i.type, COUNT(*) AS items, SUM(inv.quantity) AS quantity
+                FROM players.inventory AS inv
+                INNER JOIN utility.items AS i
+                ON inv.item_id = i.item_id
+            WHERE inv.player_id = $1 AND inv.inv_type = $2
+            GROUP BY i.type
+            """,
+            self.user.id,
+            self.inv_type,
+            read_only=True,
+            player_id=self.user.id,
+        )
+        self.type_counts = {row["type"]: (row["items"], row["quantity"]) for row in rows}
+        self.page = min(self.page, self.get_total_pages())
+        return self.type_counts
+
+    def get_item_counts(self) -> tuple[int, int]:
+        """Get the number of unique items and the total quantity of the items matching the current filter."""
+        counts = [
+            counts for item_type, counts in self.type_counts.items() if not self.item_types or item_type in self.item_types
+        ]
+        return sum(i[0] for i in counts), sum(i[1] for i in counts)
+
+    def get_total_pages(self) -> int:
+        return math.ceil(self.get_item_counts()[0] / self.items_per_page) or 1
+
+    async def fetch_page(
+        self,
+        *,
+        after: tuple = None,
+        before: tuple = None,
+        from_end: bool = False,
+        offset: int = 0,
+        limit: int = None,
+    ):
+        """
+        Fetch a page of items, ordered by `SORT_KEY_SQL` and their names.
+
+        Pages next to the current one are fetched with keyset pagination, by passing the (sort key, name) of the
+        last item in the current page as `after`, or of the first item as `before`.
+        If `from_end` is True, the items at the end of the inventory are fetched.
+        Other pages are fetched with `offset`.
+        """
+        limit = limit or self.items_per_page
+        cursor = after or before
+        descending = before is not None or from_end
+        db: Database = self.interaction.client.db
+        items = await db.fetch(
+            f"""
+            SELECT
+                i.name, CONCAT('<:_:', i.emoji_id, '>') AS emoji, i.rarity, i.type, inv.quantity,
+                {self.SORT_KEY_SQL} AS sort_key
                 FROM players.inventory AS inv
                 INNER JOIN utility.items AS i
                 ON inv.item_id = i.item_id
             WHERE inv.player_id = $1 AND inv.inv_type = $2
-            ORDER BY 
-                (CASE WHEN 
-                    (SELECT inv_worth_sort FROM players.settings WHERE player_id = $1) is True THEN i.trade_price 
-                END) DESC NULLS LAST, 
-                i.name ASC
+                AND ($4::int[] IS NULL OR i.type = ANY($4::int[]))
+                AND ($5::bigint IS NULL OR ({self.SORT_KEY_SQL}, i.name) {'<' if descending else '>'} ($5::bigint, $6::text))
+            ORDER BY sort_key {'DESC' if descending else 'ASC'}, i.name {'DESC' if descending else 'ASC'}
+            LIMIT $7 OFFSET $8
             """,
             self.user.id,
             self.inv_type,
+            self.sort_by_worth,
+            self.item_types or None,
+            cursor[0] if cursor else None,
+            cursor[1] if cursor else None,
+            limit,
+            offset,
+            read_only=True,
+            player_id=self.user.id,
         )
-        if self.page * self.items_per_page > len(self.inv):
-            self.page = math.ceil(len(self.inv) / self.items_per_page) or 1
-        return self.inv
+        if descending:
+            items.reverse()
+        return items
 
-    async def get_inv_embed(self):
+    async def get_inv_embed(self, *, after: tuple = None, before: tuple = None, last: bool = False):
+        """
+        Get the embed of the current page.
+        `after` and `before` are the keys of the items next to the current page, see `fetch_page()`.
+        If `last` is True, the last page is fetched from the end of the inventory.
+        """
         user = self.user
 
         inv_type = str(constants.InventoryType(self.inv_type))
@@ -981,55 +1108,42 @@ class InventoryView(BaseView):
         ]
         embed.set_thumbnail(url=storage_emojis_url[self.inv_type])
 
-        if self.item_types:  # if a filter is set, apply it, otherwise show the whole list
-            self.items = [i for i in self.inv if i["type"] in self.item_types]
-        else:
-            self.items = self.inv
-
-        if len(self.items) == 0:
+        unique_items, total_items = self.get_item_counts()
+        if unique_items == 0:
+            self.items = []
             embed.description = "Empty"
             return embed
 
-        compact = await self.interaction.client.db.fetchval(
-            "SELECT compact_mode FROM players.settings WHERE player_id = $1",
-            self.interaction.user.id,
-        )
+        if last:
+            # the last page may not be full
+            last_page_items = unique_items - (self.get_total_pages() - 1) * self.items_per_page
+            self.items = await self.fetch_page(from_end=True, limit=last_page_items)
+        elif after or before:
+            self.items = await self.fetch_page(after=after, before=before)
+        else:
+            self.items = await self.fetch_page(offset=(self.page - 1) * self.items_per_page)
 
-        for item in self.items[self.get_page_start_index() : self.get_page_end_index() + 1]:
+        for item in self.items:
             item_type = [i.name for i in constants.ItemType if i.value == item["type"]][0]
             item_rarity = [i.name for i in constants.ItemRarity if i.value == item["rarity"]][0]
             embed.description += f"{item['emoji']} **{item['name']}** ─ {item['quantity']}\n"
-            if not compact:
+            if not self.compact:
                 embed.description += f"➸ `{item_rarity} {item_type}`\n\n".replace("_", " ").title()
-        total_items = sum(i["quantity"] for i in self.items)
         embed.set_footer(
             text=(
-                f"Page {self.page}/{math.ceil(len(self.items) / self.items_per_page)} • {len(self.items)} unique items"
+                f"Page {self.page}/{self.get_total_pages()} • {unique_items} unique items"
                 f" • total {total_items} items"
             )
         )
         return embed
 
-    def get_page_start_index(self):
-        """
-        Returns the start index of the current page of commands.
-        For example, if `self.page` is 2 and `self.cmd_per_page` is 6, then the start index will be 6.
-        """
-        return (self.page - 1) * self.items_per_page
-
-    def get_page_end_index(self):
-        """
-        Returns the end index of the current page of commands.
-
-        For example, if `self.page` is 2 and `self.cmd_per_page` is 6, then the end index will be 11.
-        """
-        index = self.get_page_start_index() + self.items_per_page - 1
-        return index if index < len(self.items) else len(self.items) - 1
+    def _get_item_key(self, item) -> tuple:
+        return item["sort_key"], item["name"]
 
     def disable_buttons(self):
         """
         Updates the state of the buttons to disable the previous, current, and next buttons if they are not applicable.
-        Should be run *after* get_inv_embed() is run.
+        Should be run *after* get_inv_content() is run.
 
         - For example, if the first page is being shown, then the previous and back buttons will be disabled.
         - If the last page is being shown, then the next and last buttons will be disabled.
@@ -1044,7 +1158,7 @@ class InventoryView(BaseView):
             first_btn.disabled = False
         next_btn = [i for i in self.children if i.custom_id == "next"][0]
         last_btn = [i for i in self.children if i.custom_id == "last"][0]
-        if self.get_page_end_index() == len(self.items) - 1:
+        if self.page >= self.get_total_pages():
             next_btn.disabled = True
             last_btn.disabled = True
         else:
@@ -1101,7 +1215,7 @@ class InventoryView(BaseView):
         await interaction.response.defer()
         self.page -= 1
         self.disable_buttons()
-        embed = await self.get_inv_embed()
+        embed = await self.get_inv_embed(before=self._get_item_key(self.items[0]) if self.items else None)
         await self.message.edit(embed=embed, view=self)
 
     @button(emoji="🔄", style=nextcord.ButtonStyle.blurple, custom_id="refresh_msg")
@@ -1118,13 +1232,13 @@ class InventoryView(BaseView):
         await interaction.response.defer()
         self.page += 1
         self.disable_buttons()
-        embed = await self.get_inv_embed()
+        embed = await self.get_inv_embed(after=self._get_item_key(self.items[-1]) if self.items else None)
         await self.message.edit(embed=embed, view=self)
 
     @button(emoji="⏭️", style=nextcord.ButtonStyle.blurple, custom_id="last")
     async def last(self, btn: Button, interaction: Interaction):
         await interaction.response.defer()
-        self.page = math.ceil(len(self.items) / self.items_per_page)
+        self.page = self.get_total_pages()
         self.disable_buttons()
-        embed = await self.get_inv_embed()
+        embed = await self.get_inv_embed(last=True)
         await self.message.edit(embed=embed, view=self)
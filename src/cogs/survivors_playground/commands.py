@@ -253,9 +253,8 @@ class SurvivorsPlayground(commands.Cog, name="Survivor's Playground"):
         self,
         interaction: Interaction,
     ):
-        view = Maze(interaction)
-        embed = view.get_embed()
-        view.message = await interaction.send(embed=embed, view=view)
+        view = await Maze.create(interaction)
+        await view.send()
 
 
 def setup(bot: commands.Bot):
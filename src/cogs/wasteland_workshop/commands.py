@@ -1,5 +1,4 @@
 # default modules
-import asyncio
 import base64
 import datetime
 import html
@@ -16,13 +15,9 @@ import pytz
 from cooldowns import SlashBucket
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import pad, unpad
-from mazelib import Maze
-from mazelib.generate.Prims import Prims
-from mazelib.solve.BacktrackingSolver import BacktrackingSolver
 from nextcord import Embed, Interaction, SelectOption, SlashOption
 from nextcord.ext import application_checks, commands
 from nextcord.ui import Button, Select, View
-from PIL import Image
 from pytube import Search
 from quickchart import QuickChart
 
@@ -39,6 +34,7 @@ from cogs.wasteland_workshop.views import (
 )
 
 # my modules and constants
+from modules.maze.maze_generator import MazeQueueFull, maze_generator
 from utils import constants
 from utils.constants import EmbedColour
 from utils.helpers import TextEmbed, check_if_not_dev_guild, command_info
@@ -129,30 +125,21 @@ class WastelandWorkshop(commands.Cog, name="Wasteland Workshop"):
             await msg.edit(embed=TextEmbed("The maze must be at least 3x3 large!"))
             return
 
-        embed.description += "\n`1.` Generating maze... "
+        embed.description += "\n`1.` Generating maze and the image... "
+        if queue_length := maze_generator.get_queue_length():
+            embed.description += f"({queue_length} mazes in the queue) "
         await msg.edit(embed=embed)
 
-        maze = self._generate_maze(
-            width, height, difficulty / 10 if difficulty else None, start, end
-        )
-
-        embed.description += "**`Done`**!\n`2.` Generating the image... "
-        await msg.edit(embed=embed)
-
-        maze_str = maze.tostring(True, True)
-        solved_img = self._generate_solved_img(
-            maze_str, len(maze.grid[0]), len(maze.grid)
-        )
-        unsolved_img = self._generate_unsolved_img(
-            maze_str, self.SPRITE_WIDTH, solved_img
-        )
+        try:
+            maze = await maze_generator.generate(
+                interaction.user.id, width, height, difficulty / 10 if difficulty else None, start, end
+            )
+        except MazeQueueFull as e:
+            await msg.edit(embed=TextEmbed(f"{e} Try again later!"))
+            return
 
-        embed.add_field(
-            name="Solution length", value=f"`{len(maze.solutions[0])}` cells"
-        )
-        embed.add_field(
-            name="Start ➡ End", value=f"`{maze.start[::-1]}` ➡ `{maze.end[::-1]}`"
-        )
+        embed.add_field(name="Solution length", value=f"`{maze.solution_length}` cells")
+        embed.add_field(name="Start ➡ End", value=f"`{maze.start[::-1]}` ➡ `{maze.end[::-1]}`")
         if difficulty:
             embed.add_field(name="Difficulty", value=difficulty)
         embed.set_image("attachment://maze.png")
@@ -168,16 +155,16 @@ class WastelandWorkshop(commands.Cog, name="Wasteland Workshop"):
             embed.set_footer(text="Changing image, please wait...")
             solve_button.disabled = True
             await button_interaction.response.edit_message(embed=embed, view=solve_view)
+            # both images are encoded when the maze is generated
             if solve_button.label == "Solve":
                 # change the image to "solved" image
                 solve_button.label = "Unsolve"
-                future = loop.run_in_executor(None, self._save_img, solved_img)
+                output = maze.solved_img
             else:
                 # change the image to "unsolved" image
                 solve_button.label = "Solve"
-                future = loop.run_in_executor(None, self._save_img, unsolved_img)
-            output = loop.run_until_complete(future)
-            maze_img_file = nextcord.File(output, "maze.png")
+                output = maze.unsolved_img
+            maze_img_file = nextcord.File(BytesIO(output), "maze.png")
             solve_button.disabled = False
             embed.set_footer(text=None)  # clear the footer text
             await msg.edit(file=maze_img_file, embed=embed, view=solve_view)
@@ -185,11 +172,8 @@ class WastelandWorkshop(commands.Cog, name="Wasteland Workshop"):
         solve_button.callback = toggle_solve
         solve_view.add_item(solve_button)
 
-        loop = asyncio.get_running_loop()
         # default to the unsolved image
-        future = loop.run_in_executor(None, self._save_img, unsolved_img)
-        output = loop.run_until_complete(future)
-        maze_img_file = nextcord.File(output, "maze.png")
+        maze_img_file = nextcord.File(BytesIO(maze.unsolved_img), "maze.png")
 
         msg = await msg.edit(file=maze_img_file, embed=embed, view=solve_view)
 
@@ -209,78 +193,6 @@ class WastelandWorkshop(commands.Cog, name="Wasteland Workshop"):
             ephemeral=True,
         )
 
-    def _generate_maze(
-        self, width: int, height: int, difficulty: float | None, start: bool, end: bool
-    ) -> Maze:
-        maze = Maze()
-        maze.generator = Prims(height, width)
-        maze.solver = BacktrackingSolver()
-
-        loop = asyncio.get_running_loop()
-
-        if difficulty:
-            future = loop.run_in_executor(
-                None, maze.generate_monte_carlo, 10, 1, difficulty
-            )
-        else:
-            maze.generate()
-            maze.generate_entrances(start_outer=start, end_outer=end)
-            future = loop.run_in_executor(None, maze.solve)
-
-        loop.run_until_complete(future)
-        return maze
-
-    SPRITES = {
-        "ground": Image.open("resources/maze/ground.png"),
-        "wall": Image.open("resources/maze/wall.png"),
-        "path": Image.open("resources/maze/path.png"),
-        "start": Image.open("resources/maze/start.png"),
-        "finish": Image.open("resources/maze/finish.png"),
-    }
-    SPRITE_WIDTH = 36
-
-    def _generate_solved_img(self, maze_str, width, height):
-        solved_img = Image.new(
-            "RGBA", (self.SPRITE_WIDTH * width, self.SPRITE_WIDTH * height)
-        )
-
-        # generate the solved maze image
-        for y_i, y in enumerate(maze_str.splitlines()):
-            for x_i, x in enumerate(y):
-                if x == "#":
-                    sprite = self.SPRITES["wall"]
-                elif x == " ":
-                    sprite = self.SPRITES["ground"]
-                elif x == "S":
-                    sprite = self.SPRITES["start"]
-                elif x == "E":
-                    sprite = self.SPRITES["finish"]
-                elif x == "+":
-                    sprite = self.SPRITES["path"]
-                # paste the cell into solved image
-                solved_img.paste(
-                    sprite, (x_i * self.SPRITE_WIDTH, y_i * self.SPRITE_WIDTH)
-                )
-        return solved_img
-
-    def _generate_unsolved_img(self, maze_str, sprite_width, solved_img):
-        unsolved_img = solved_img.copy()
-        # convert every path image into ground image in unsolved image
-        for y_i, y in enumerate(maze_str.splitlines()):
-            for x_i, x in enumerate(y):
-                if x == "+":
-                    unsolved_img.paste(
-                        self.SPRITES["ground"], (x_i * sprite_width, y_i * sprite_width)
-                    )
-        return unsolved_img
-
-    def _save_img(self, image: Image.Image) -> BytesIO:
-        output = BytesIO()
-        image.thumbnail((1600, 1600))
-        image.save(output, format="PNG")
-        output.seek(0)
-        return output
-
     @nextcord.slash_command(
         name="encrypt",
         description="Send (truly) private messages with your friend using AES!",
@@ -7,8 +7,6 @@ import sys
 from datetime import timezone
 from typing import Optional, Union
 
-import nest_asyncio
-
 # third-party
 import nextcord
 from cooldowns import CallableOnCooldown
@@ -19,15 +17,20 @@ from nextcord.ext import commands
 #   lets uptimerobot ping the app to make it stay up, and
 #   uploads the boss' website (https://boss-bot.onrender.com/) to the internet
 from keep_alive import keep_alive
+from modules.farm.farm_render import farm_renderer
+from modules.maze.maze_generator import maze_generator
+from modules.maze.maze_layouts import maze_layout_pool
 from modules.macro.run_macro import RunMacroView
 
 # my modules
 from utils import constants, helpers
 from utils.constants import EmbedColour
 from utils.helpers import BossInteraction
+from utils.item_catalog import item_catalog
+from utils.player_stats import PlayerStatsBuffer
 from utils.postgres_db import Database
-
-nest_asyncio.apply()
+from utils.tick_scheduler import tick_scheduler
+from utils.user_resolver import UserResolver
 
 
 class BossBot(commands.Bot):
@@ -56,6 +59,9 @@ class BossBot(commands.Bot):
         self.db = Database()
         self.pool = self.db.pool
         self.has_connected_db = asyncio.Event()
+        # experience, commands_run and hunger changes, written to the database in batches
+        self.player_stats = PlayerStatsBuffer(self.db)
+        self.user_resolver = UserResolver(self)
 
     async def on_ready(self):
         if not self.persistent_views_added:
@@ -68,6 +74,10 @@ class BossBot(commands.Bot):
         if not self.db.connected:
             self.pool = await self.db.connect()
         self.has_connected_db.set()
+        if not item_catalog.loaded:
+            await item_catalog.load(self.db)
+        if not self.player_stats.flush_loop.is_running():
+            self.player_stats.flush_loop.start()
 
         logging.info(
             "\033[1;36m%s (ID: %s)\033[0m has connected to discord \033[0;34min %s servers!\033[0m",
@@ -77,13 +87,29 @@ class BossBot(commands.Bot):
         )
 
     async def on_disconnect(self):
+        await self.flush_player_stats()
         await self.db.disconnect()
         logging.info("Bot disconnected.")
 
     async def on_close(self):
+        self.player_stats.flush_loop.cancel()
+        await self.flush_player_stats()
         await self.db.disconnect()
+        farm_renderer.shutdown()
+        tick_scheduler.shutdown()
+        maze_layout_pool.shutdown()
+        maze_generator.shutdown()
         logging.info("Bot closed, event loop closing...")
 
+    async def flush_player_stats(self):
+        """Write the pending player stats to the database before it disconnects."""
+        if not self.db.connected:
+            return
+        try:
+            await self.player_stats.flush()
+        except Exception:  # pylint: disable=broad-except
+            logging.exception("Failed to write the player stats to the database.")
+
     def get_interaction(self, data, *, cls=nextcord.Interaction):  # pylint: disable=useless-parent-delegation
         # tell the bot to use `BossInteraction`s instead of normal `nextcord.Interaction`s
         return super().get_interaction(data, cls=BossInteraction)
@@ -154,13 +180,8 @@ class BossBot(commands.Bot):
         return guild
 
     async def get_or_fetch_user(self, user_id: int) -> Union[nextcord.User, None]:
-        """Looks up a user in cache or fetches if not found."""
-        user = self.get_user(user_id)
-        if user:
-            return user
-
-        user = await self.fetch_user(user_id)
-        return user
+        """Looks up a user in cache or fetches if not found. If the user does not exist, returns `None`."""
+        return await self.user_resolver.get(user_id)
 
 
 def get_cooldown_embed(interaction: Interaction, error: CallableOnCooldown) -> Embed:
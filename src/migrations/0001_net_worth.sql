@@ -0,0 +1,114 @@
+-- Maintain the net worth of every player incrementally, so that /leaderboard, /balance and /profile
+-- read an indexed column instead of aggregating every player's inventory.
+--
+--   item_worth = SUM(utility.items.trade_price * players.inventory.quantity), kept up to date by triggers
+--   net_worth  = scrap_metal + copper * COPPER_SCRAP_RATE + safe_scrap + item_worth
+--
+-- Run it once against the database:
+--   psql "$DSN" -f migrations/0001_net_worth.sql
+
+BEGIN;
+
+ALTER TABLE players.players
+    ADD COLUMN IF NOT EXISTS item_worth bigint NOT NULL DEFAULT 0;
+
+-- 500000 is `COPPER_SCRAP_RATE` in utils/constants.py
+ALTER TABLE players.players
+    ADD COLUMN IF NOT EXISTS net_worth bigint GENERATED ALWAYS AS (
+        scrap_metal::bigint + copper::bigint * 500000 + safe_scrap::bigint + item_worth
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS players_net_worth_idx ON players.players (net_worth DESC);
+
+
+-- inventory rows are inserted, updated or deleted --> adjust the item worth of their owners
+CREATE OR REPLACE FUNCTION players.update_item_worth_from_inventory() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE players.players AS p
+        SET item_worth = p.item_worth - i.trade_price::bigint * OLD.quantity
+        FROM utility.items AS i
+        WHERE p.player_id = OLD.player_id AND i.item_id = OLD.item_id AND i.trade_price IS NOT NULL;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE players.players AS p
+        SET item_worth = p.item_worth + i.trade_price::bigint * NEW.quantity
+        FROM utility.items AS i
+        WHERE p.player_id = NEW.player_id AND i.item_id = NEW.item_id AND i.trade_price IS NOT NULL;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS update_item_worth ON players.inventory;
+CREATE TRIGGER update_item_worth
+    AFTER INSERT OR DELETE OR UPDATE OF player_id, item_id, quantity ON players.inventory
+    FOR EACH ROW
+    EXECUTE FUNCTION players.update_item_worth_from_inventory();
+
+
+-- the trade price of an item changes --> adjust the item worth of everyone who owns it
+CREATE OR REPLACE FUNCTION utility.update_item_worth_from_price() RETURNS trigger AS $$
+BEGIN
+    UPDATE players.players AS p
+    SET item_worth = p.item_worth + owned.quantity * (
+        COALESCE(NEW.trade_price, 0)::bigint - COALESCE(OLD.trade_price, 0)::bigint
+    )
+    FROM (
+        SELECT player_id, SUM(quantity) AS quantity
+        FROM players.inventory
+        WHERE item_id = OLD.item_id
+        GROUP BY player_id
+    ) AS owned
+    WHERE p.player_id = owned.player_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS update_item_worth ON utility.items;
+CREATE TRIGGER update_item_worth
+    AFTER UPDATE OF trade_price ON utility.items
+    FOR EACH ROW
+    WHEN (OLD.trade_price IS DISTINCT FROM NEW.trade_price)
+    EXECUTE FUNCTION utility.update_item_worth_from_price();
+
+
+-- an item is deleted --> remove its worth before the inventory rows which reference it are removed,
+-- since the inventory trigger can no longer look up its trade price afterwards
+CREATE OR REPLACE FUNCTION utility.remove_item_worth() RETURNS trigger AS $$
+BEGIN
+    UPDATE players.players AS p
+    SET item_worth = p.item_worth - owned.quantity * OLD.trade_price::bigint
+    FROM (
+        SELECT player_id, SUM(quantity) AS quantity
+        FROM players.inventory
+        WHERE item_id = OLD.item_id
+        GROUP BY player_id
+    ) AS owned
+    WHERE p.player_id = owned.player_id AND OLD.trade_price IS NOT NULL;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS remove_item_worth ON utility.items;
+CREATE TRIGGER remove_item_worth
+    BEFORE DELETE ON utility.items
+    FOR EACH ROW
+    EXECUTE FUNCTION utility.remove_item_worth();
+
+
+-- backfill
+UPDATE players.players AS p
+SET item_worth = COALESCE(worth.item_worth, 0)
+FROM (
+    SELECT players.player_id, SUM(i.trade_price::bigint * inv.quantity) AS item_worth
+    FROM players.players
+    LEFT JOIN players.inventory AS inv
+        ON inv.player_id = players.player_id
+    LEFT JOIN utility.items AS i
+        ON inv.item_id = i.item_id
+    GROUP BY players.player_id
+) AS worth
+WHERE p.player_id = worth.player_id;
+
+COMMIT;
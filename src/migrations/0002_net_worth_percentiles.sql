@@ -0,0 +1,24 @@
+-- Keep the distribution of net worths in a materialized view, so that /balance and /profile read a player's rank
+-- with a constant-cost lookup instead of counting every player with a lower net worth.
+--
+--   bounds[k + 1] = the net worth at the k / 1000 percentile, for k = 0..1000
+--   rank          = (the number of bounds lower than the player's net worth - 1) / 1000, accurate to 0.1%
+--
+-- The bot refreshes it every `ResourceRepository.RANK_REFRESH_MINUTES` minutes.
+-- Run it once against the database:
+--   psql "$DSN" -f migrations/0002_net_worth_percentiles.sql
+
+BEGIN;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS players.net_worth_percentiles AS
+SELECT
+    1 AS id,
+    percentile_disc(
+        ARRAY(SELECT generate_series(0, 1000) / 1000.0)::float8[]
+    ) WITHIN GROUP (ORDER BY net_worth) AS bounds
+FROM players.players;
+
+-- required by REFRESH MATERIALIZED VIEW CONCURRENTLY, so that reads are not blocked while it is refreshed
+CREATE UNIQUE INDEX IF NOT EXISTS net_worth_percentiles_id_idx ON players.net_worth_percentiles (id);
+
+COMMIT;
@@ -0,0 +1,92 @@
+"""Module providing an in-memory copy of `utility.crop_types`, and the growth stages of crops."""
+# default modules
+import asyncio
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+# database
+from utils.postgres_db import Database
+
+# unready crops have 2 stages (0 and 1), and fully grown crops are in stage 2
+GROWTH_STAGES = 2
+
+
+@dataclass
+class CropType:
+    """A crop type in `utility.crop_types`."""
+
+    crop_type_id: int
+    name: str
+    growth_period: timedelta
+    grown_emoji_id: int
+    grown_item_id: int
+
+    @property
+    def emoji(self) -> str:
+        return f"<:_:{self.grown_emoji_id}>"
+
+
+class CropTypeCache:
+    """A process-wide cache of all crop types, reloaded every `TTL` seconds."""
+
+    TTL = 10 * 60
+
+    def __init__(self):
+        self.crop_types: dict[int, CropType] = {}
+        self.loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def load(self, db: Database):
+        """Load all crop types from the database."""
+        async with self._lock:
+            rows = await db.fetch(
+                """
+                SELECT crop_type_id, name, growth_period, grown_emoji_id, grown_item_id
+                FROM utility.crop_types
+                ORDER BY crop_type_id
+                """,
+                read_only=True,
+            )
+            self.crop_types = {row["crop_type_id"]: CropType(**row) for row in rows}
+            self.loaded_at = time.monotonic()
+
+    async def get_all(self, db: Database) -> dict[int, CropType]:
+        """Get all crop types, mapped by their ids."""
+        if self.loaded_at is None or time.monotonic() - self.loaded_at > self.TTL:
+            await self.load(db)
+        return self.crop_types
+
+
+def get_growth_stage(crop, crop_type: CropType, now: datetime) -> int:
+    """Get the growth stage of a planted crop. Fully grown crops are in stage `GROWTH_STAGES`."""
+    planted_at: datetime = crop["planted_at"]
+    ready_at: datetime = planted_at + crop_type.growth_period
+
+    # check if the crop has finished growing
+    if now < ready_at:  # crop has not finished growing
+        # this will choose 1 of the stages based on how long they have been growing
+        return math.floor((now - planted_at) / crop_type.growth_period * GROWTH_STAGES)
+    # crop has finished growing
+    return GROWTH_STAGES
+
+
+def get_next_stage_change(farm, crop_types: dict[int, CropType], now: datetime) -> Optional[datetime]:
+    """Get the next time at which the growth stage of any crop in the farm changes, `None` if none of them will."""
+    next_change = None
+    for crop in farm:
+        if not crop:
+            continue
+        crop_type = crop_types[crop["type"]]
+        stage = get_growth_stage(crop, crop_type, now)
+        if stage == GROWTH_STAGES:
+            continue
+        change_at = crop["planted_at"] + crop_type.growth_period * (stage + 1) / GROWTH_STAGES
+        if next_change is None or change_at < next_change:
+            next_change = change_at
+    return next_change
+
+
+crop_type_cache = CropTypeCache()
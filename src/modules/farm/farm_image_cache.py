@@ -0,0 +1,105 @@
+"""
+Module providing a cache of rendered farm images, keyed by a hash of everything which determines the image,
+and a memory of the discord attachments which already contain each image.
+"""
+# default modules
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional
+
+# nextcord
+import nextcord
+
+
+class FarmImageCache:
+    """
+    A LRU cache of encoded farm images, holding at most `MAX_BYTES` bytes.
+
+    It also remembers
+    - the image in every farm message, so that an unchanged image can be kept instead of uploaded again
+    - the CDN urls of uploaded images for `URL_TTL` seconds, so that new messages can show them without uploading
+    """
+
+    MAX_BYTES = 32 * 1024 * 1024
+    # discord's CDN urls expire, so they are only reused for a while
+    URL_TTL = 6 * 60 * 60
+    MAX_MESSAGES = 1000
+
+    def __init__(self):
+        self.images: OrderedDict[str, bytes] = OrderedDict()
+        self.size = 0
+        # maps the ids of farm messages to the key of the image in their attachment
+        self.message_images: OrderedDict[int, str] = OrderedDict()
+        # maps keys to (the time it was uploaded, the id of the message it is attached to, the url)
+        self.urls: dict[str, tuple[float, int, str]] = {}
+
+    @staticmethod
+    def get_key(
+        tiles: tuple[str, ...],
+        farm_width: int,
+        farm_height: int,
+        label_crops: bool,
+        selected_crops: frozenset[int],
+    ) -> str:
+        """Get the key of a render, the tiles include the crops and their growth stages."""
+        state = repr((tuple(tiles), farm_width, farm_height, label_crops, sorted(selected_crops)))
+        return hashlib.sha256(state.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Get an encoded image. Returns `None` if it is not cached."""
+        image = self.images.get(key)
+        if image is not None:
+            self.images.move_to_end(key)
+        return image
+
+    def put(self, key: str, image: bytes):
+        """Cache an encoded image, evicting the least recently used images if the cache is full."""
+        if key in self.images:
+            self.images.move_to_end(key)
+            return
+        self.images[key] = image
+        self.size += len(image)
+        while self.size > self.MAX_BYTES and len(self.images) > 1:
+            _, evicted = self.images.popitem(last=False)
+            self.size -= len(evicted)
+
+    def get_message_image(self, message_id: int) -> Optional[str]:
+        """Get the key of the image attached to a farm message."""
+        return self.message_images.get(message_id)
+
+    def get_url(self, key: str) -> Optional[str]:
+        """Get the CDN url of an uploaded image, if it has been uploaded recently."""
+        uploaded = self.urls.get(key)
+        if uploaded is None:
+            return None
+        if time.time() - uploaded[0] > self.URL_TTL:
+            del self.urls[key]
+            return None
+        return uploaded[2]
+
+    def remember(self, message_id: int, key: str, message: Optional[nextcord.Message] = None):
+        """
+        Remember that a farm message now has the image with the key.
+        `message` is the message returned by the edit request, which contains the url of the new attachment.
+        It must not be a cached message, whose attachment may be the old image.
+        """
+        if self.message_images.get(message_id) != key:
+            # the old attachment is replaced, so its url may stop working
+            for old_key in [k for k, (_, owner_id, _) in self.urls.items() if owner_id == message_id]:
+                del self.urls[old_key]
+
+        self.message_images.pop(message_id, None)
+        self.message_images[message_id] = key
+        if len(self.message_images) > self.MAX_MESSAGES:
+            self.message_images.popitem(last=False)
+
+        attachment = next((i for i in getattr(message, "attachments", ()) if i.filename == "farm.png"), None)
+        if attachment is not None and key not in self.urls:
+            self.urls[key] = (time.time(), message_id, attachment.url)
+            if len(self.urls) > self.MAX_MESSAGES:
+                # remove the url which was uploaded first
+                del self.urls[next(iter(self.urls))]
+
+
+farm_image_cache = FarmImageCache()
@@ -0,0 +1,129 @@
+"""
+Module providing the rendering of farm images, which runs in a worker pool instead of on the event loop.
+
+`render_farm()` is a pure function of picklable inputs, so it can run in either a thread or a process pool.
+"""
+# default modules
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from io import BytesIO
+from string import ascii_uppercase
+from typing import Literal, Optional
+
+from PIL import Image
+
+# my modules
+from modules.farm import farm_sprites
+from modules.farm.farm_sprites import TILE_SIZE
+
+# the kind of pool and the number of workers rendering farms, configurable with environment variables
+FARM_RENDER_EXECUTOR = os.getenv("FARM_RENDER_EXECUTOR", "thread")
+FARM_RENDER_WORKERS = int(os.getenv("FARM_RENDER_WORKERS", "2"))
+
+
+def render_farm(
+    tiles: tuple[str, ...],
+    farm_width: int,
+    farm_height: int,
+    *,
+    label_crops: bool = False,
+    selected_crops: frozenset[int] = frozenset(),
+) -> bytes:
+    """
+    Render a farm, and return the image encoded as PNG.
+
+    ### Parameters
+    `tiles`: the name of the sprite of every tile, e.g. "wheat_1" or "farm_empty"
+    `farm_width`, `farm_height`: the size of the farm, in tiles
+    `label_crops`: whether to add a small label (e.g. A1) in the bottom right corner of every tile
+    `selected_crops`: indices of tiles that will be highlighted with a red rectangle
+    """
+    farm_img = Image.new("RGBA", (farm_width * TILE_SIZE, farm_height * TILE_SIZE))
+
+    for index, sprite_name in enumerate(tiles):
+        # a red rectangle is drawn on the sprite if the index is in `selected_crops`
+        tile_img = farm_sprites.get_sprite(sprite_name, index in selected_crops)
+
+        if label_crops:
+            label = f"{ascii_uppercase[index // farm_width]}{index % farm_width + 1}"  # example label: A1
+            # `alpha_composite()` returns a new image, so the shared sprite is not modified
+            tile_img = Image.alpha_composite(tile_img, farm_sprites.get_label(label))
+
+        # top-left corner of the tile
+        farm_img.paste(tile_img, ((index % farm_width) * TILE_SIZE, (index // farm_width) * TILE_SIZE))
+
+    output = BytesIO()
+    farm_img.save(output, format="PNG")
+    return output.getvalue()
+
+
+class FarmRenderer:
+    """
+    Renders farms in a thread or process pool.
+
+    At most `max_pending` renders are submitted to the pool at the same time,
+    the rest wait on the event loop, so bursts of renders queue up instead of blocking it.
+    """
+
+    def __init__(
+        self,
+        executor: Literal["thread", "process"] = FARM_RENDER_EXECUTOR,
+        max_workers: int = FARM_RENDER_WORKERS,
+        max_pending: Optional[int] = None,
+    ):
+        if executor not in ("thread", "process"):
+            raise ValueError("executor must be either `thread` or `process`.")
+        self.executor_type = executor
+        self.max_workers = max_workers
+        self.max_pending = max_pending or max_workers * 2
+        self.executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_executor(self) -> Executor:
+        if self.executor is None:
+            if self.executor_type == "process":
+                # every process decodes the sprites once when it starts
+                self.executor = ProcessPoolExecutor(self.max_workers, initializer=farm_sprites.load)
+            else:
+                self.executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="farm-render")
+        return self.executor
+
+    async def render(
+        self,
+        tiles: tuple[str, ...],
+        farm_width: int,
+        farm_height: int,
+        *,
+        label_crops: bool = False,
+        selected_crops: frozenset[int] = frozenset(),
+    ) -> bytes:
+        """Render a farm in the pool. See `render_farm()` for the parameters."""
+        if self._semaphore is None:
+            # created lazily, so that it is bound to the running event loop
+            self._semaphore = asyncio.Semaphore(self.max_pending)
+
+        loop = asyncio.get_running_loop()
+        async with self._semaphore:
+            # `run_in_executor()` does not accept keyword arguments, partials of module-level functions can be pickled
+            return await loop.run_in_executor(
+                self._get_executor(),
+                partial(
+                    render_farm,
+                    tuple(tiles),
+                    farm_width,
+                    farm_height,
+                    label_crops=label_crops,
+                    selected_crops=frozenset(selected_crops),
+                ),
+            )
+
+    def shutdown(self):
+        """Shut down the pool, cancelling the renders which have not started."""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+farm_renderer = FarmRenderer()
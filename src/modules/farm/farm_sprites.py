@@ -0,0 +1,90 @@
+"""Module providing the sprites and font used to render farms, decoded once and kept in memory."""
+# default modules
+import os
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageFont
+
+TILE_SIZE = 128  # width, height of tiles
+
+CROPS_DIR = "resources/crops"
+FONT_PATH = "resources/font/font.ttf"
+LABEL_FONT_SIZE = 24
+
+
+def _draw_selection(tile: Image.Image) -> Image.Image:
+    """Draw a red rectangle on a tile, to highlight that it is selected."""
+    crop_draw = ImageDraw.Draw(tile)
+    crop_draw.rectangle(
+        [
+            (10, 10),
+            (TILE_SIZE - 10, TILE_SIZE - 10),
+        ],  # top-left and bottom-right coords for the rectangle
+        outline="#58091F",
+        width=10,
+    )
+    return tile
+
+
+@lru_cache(maxsize=None)
+def get_sprites() -> dict[tuple[str, bool], Image.Image]:
+    """
+    Decode every sprite in `CROPS_DIR`, and their selected variants.
+    Maps (name of the sprite, whether it is selected) to the image, e.g. ("wheat_2", False), ("farm_empty", True).
+
+    The images are shared, so they must be copied before being drawn on.
+    """
+    sprites = {}
+    for file_name in sorted(os.listdir(CROPS_DIR)):
+        name, ext = os.path.splitext(file_name)
+        if ext != ".png":
+            continue
+        with Image.open(os.path.join(CROPS_DIR, file_name)) as img:
+            sprite = img.convert("RGBA")
+        sprites[(name, False)] = sprite
+        sprites[(name, True)] = _draw_selection(sprite.copy())
+    return sprites
+
+
+def get_sprite(name: str, selected: bool = False) -> Image.Image:
+    """Get a sprite, e.g. `get_sprite("wheat_2")` or `get_sprite("farm_empty", selected=True)`."""
+    return get_sprites()[(name, selected)]
+
+
+@lru_cache(maxsize=None)
+def get_font(size: int = LABEL_FONT_SIZE) -> ImageFont.FreeTypeFont:
+    return ImageFont.truetype(FONT_PATH, size)
+
+
+@lru_cache(maxsize=256)
+def get_label(label: str) -> Image.Image:
+    """Get a transparent tile with a small label (e.g. A1) in the bottom right corner, to be pasted over a crop."""
+    label_img = Image.new("RGBA", (TILE_SIZE, TILE_SIZE))
+    crop_draw = ImageDraw.Draw(label_img)
+    font = get_font()
+    txt_width, txt_height = font.getsize(label)
+
+    # draw a background rectangle with 5px padding around the text
+    crop_draw.rounded_rectangle(
+        (
+            (TILE_SIZE - 5 - txt_width - 5, TILE_SIZE - 5 - txt_height - 5),
+            (TILE_SIZE - 5, TILE_SIZE - 5),
+        ),
+        fill="#1e130e",
+        radius=5,
+    )
+
+    # draw the label
+    # text will be white by default
+    crop_draw.text(
+        (TILE_SIZE - 5 - txt_width - 2, TILE_SIZE - 5 - txt_height - 5),
+        text=label,
+        font=font,
+    )
+    return label_img
+
+
+def load():
+    """Decode the sprites and load the font, so that the first render does not have to."""
+    get_sprites()
+    get_font()
@@ -97,8 +97,8 @@ class RecordMacroView(BaseView):
                 options_msg = []
                 for name, value in i["options"].items():
                     if cmd.options[name].type == OptionType.user.value:
-                        user = await interaction.client.get_or_fetch_user(value)
-                        value = user.mention
+                        user = await interaction.client.get_or_fetch_user(int(value))
+                        value = user.mention if user else value
                     options_msg.append(f"{name}: {value}")
                 options_msg = ", ".join(options_msg)
                 options_msg = f"[{options_msg}]"
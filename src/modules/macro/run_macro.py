@@ -99,15 +99,23 @@ class RunMacroView(View):
         next_cmds = self.macro_cmds[self.cmd_index :] + self.macro_cmds[: self.cmd_index]
         next_3_cmds = next_cmds[:3]  # Slice the next three values
 
-        for i in next_3_cmds:
-            cmd = helpers.find_command(interaction.client, i["command"])  # search for the command with the name
+        # look up the users in the options of the commands concurrently
+        cmds = [helpers.find_command(interaction.client, i["command"]) for i in next_3_cmds]
+        users = await interaction.client.user_resolver.get_many(
+            int(value)
+            for i, cmd in zip(next_3_cmds, cmds)
+            for name, value in i["options"].items()
+            if cmd.options[name].type == OptionType.user.value
+        )
+
+        for i, cmd in zip(next_3_cmds, cmds):
             # make a message denoting the options of the command
             if i["options"]:
                 options_msg = []
                 for name, value in i["options"].items():
                     if cmd.options[name].type == OptionType.user.value:
-                        user = await interaction.client.get_or_fetch_user(value)
-                        value = user.mention
+                        user = users[int(value)]
+                        value = user.mention if user else value
                     options_msg.append(f"{name}: {value}")
                 options_msg = ", ".join(options_msg)
                 options_msg = f"[{options_msg}]"
@@ -137,12 +145,14 @@ class RunMacroView(View):
 
     async def _get_current_cmd(
         self, interaction: BossInteraction, macro_cmd
-    ) -> tuple[nextcord.SlashApplicationSubcommand, list]:
+    ) -> tuple[nextcord.SlashApplicationSubcommand, list, list[int]]:
+        """Get the slash command, its options and the ids of the users in the options which do not exist anymore."""
         # find the slash command with the name
         slash_cmd = helpers.find_command(interaction.client, macro_cmd["command"])
 
         # handle the options before invoking the slash command
         options = []
+        missing_users = []
         for name, option in slash_cmd.options.items():
             value = macro_cmd["options"].get(name)
             # if the option is stored in the macro, use that value (but convert it into the right type)
@@ -150,7 +160,10 @@ class RunMacroView(View):
             if value is not None:
                 match option.type:
                     case OptionType.user:
-                        value = await self.bot.fetch_user(int(value))
+                        user_id = int(value)
+                        value = await self.bot.get_or_fetch_user(user_id)
+                        if value is None:
+                            missing_users.append(user_id)
                     case OptionType.channel:
                         value = await self.bot.fetch_channel(int(value))
                     case OptionType.role:
@@ -159,7 +172,7 @@ class RunMacroView(View):
                 value = option.default
             options.append(value)
 
-        return slash_cmd, options
+        return slash_cmd, options, missing_users
 
     async def _run_cmd(self, interaction: BossInteraction, skip: bool = False):
         """
@@ -179,7 +192,7 @@ class RunMacroView(View):
                 current_index -= len(self.macro_cmds)
             macro_cmd = self.macro_cmds[current_index]
 
-        slash_cmd, options = await self._get_current_cmd(interaction, macro_cmd)
+        slash_cmd, options, missing_users = await self._get_current_cmd(interaction, macro_cmd)
 
         self.cmd_index += 1 if not skip else 2
         if self.cmd_index > len(self.macro_cmds) - 1:
@@ -196,6 +209,12 @@ class RunMacroView(View):
             await interaction.send_text("This command could not be run in this server!", show_macro_msg=False)
             # the check fails and `after_invoke` is not run, so we manually send the message again
             await self.send_msg(interaction)
+        elif missing_users:
+            await interaction.send_text(
+                f"The user `{missing_users[0]}` in the options of this command could not be found!",
+                show_macro_msg=False,
+            )
+            await self.send_msg(interaction)
         else:
             # run the slash command. this will invoke it with the hooks (check, before_invoke, after_invoke)
             await slash_cmd.invoke_callback_with_hooks(interaction._state, interaction, args=options)
@@ -8,20 +8,21 @@ from datetime import datetime
 # nextcord
 import nextcord
 
-# mazelib
-from mazelib import Maze as Mazelib
-from mazelib.generate.Prims import Prims
 from nextcord import ButtonStyle, Embed, Interaction, SelectOption
 from nextcord.ui import Button, Select, TextInput, View, button, select
 
 from utils import constants
 from utils.helpers import BossCurrency, BossItem, EmbedColour, TextEmbed
+from utils.message_editor import message_editor
 from utils.player import Player as BossPlayer
+from utils.tick_scheduler import TickHandle, tick_scheduler
 
 # my modules and constants
 from utils.template_views import BaseModal, BaseView
 
-from .maze_enemies import MazeEnemy
+from .maze_game import MazeEvent, MazeGame
+from .maze_grid import DEST, EMPTY, TRAP, WALL
+from .maze_layouts import MazeLayout, generate_layout, maze_layout_pool
 
 # maze
 from .maze_player import MazePlayer
@@ -84,24 +85,19 @@ class MazeButton(Button["Maze"]):
         embed = None
 
         if "walk" in self.custom_id:
-            if abs(self.btn_func - player.direction) == 2:  # opposite direcitons:
-                player.direction = self.btn_func
-            else:
-                player.walking = True
+            player.walking = True
+            events = view.game.walk(self.btn_func)
+            update = await view.perform_event_results(interaction, events)
 
-                player.direction = self.btn_func
-                player.move()
-                update = await view.perform_event_results(interaction)
-
-                player.walking = False
-                if update:
-                    embed = view.get_embed()
-                    await view.update_msg(force_update=True, embed=embed)
+            player.walking = False
+            if update:
+                embed = view.get_embed()
+                await view.update_msg(embed=embed)
 
         elif "run" in self.custom_id:  # run
             if await self.check_in_cooldown(interaction, "run", "running"):
                 return
-            if player.hunger < 30:  # stop running if hunger is too low
+            if player.hunger < view.game.MIN_RUN_HUNGER:  # stop running if hunger is too low
                 await interaction.send(
                     embed=TextEmbed("I'm too tired to run! Find some food before sprinting again."),
                     ephemeral=True,
@@ -115,28 +111,23 @@ class MazeButton(Button["Maze"]):
                     if "walk" in item.custom_id:
                         item.disabled = True
 
-                old_x = None
-                old_y = None
                 player.walking = True
                 while player.walking == True:  # if player walked, continue to do so
-                    if player.hunger < 30:  # stop running if hunger is too low
+                    if player.hunger < view.game.MIN_RUN_HUNGER:  # stop running if hunger is too low
                         await interaction.send(
                             embed=TextEmbed("I'm too tired to run! Find some food before sprinting again."),
                             ephemeral=True,
                         )
                         break
-                    old_x, old_y = player.x, player.y
-                    player.move()
-                    player.hunger -= random.randint(1, 3)
-
-                    if (old_x, old_y) == (player.x, player.y):
+                    events = view.game.run_step()
+                    if events is None:  # the player hit a wall
                         break
 
-                    update = await view.perform_event_results(interaction)
+                    update = await view.perform_event_results(interaction, events)
 
                     if update:
                         embed = view.get_embed()
-                        await view.update_msg(force_update=True, embed=embed)
+                        await view.update_msg(embed=embed)
                     await asyncio.sleep(0.5)
 
                 player.walking = False
@@ -153,25 +144,12 @@ class MazeButton(Button["Maze"]):
         elif "punch" in self.custom_id:
             if await self.check_in_cooldown(interaction, "punch", "punching"):
                 return
-            punch_distance = 2
-            cam, x_start_index, y_start_index = view.get_camera()
-
-            for i in range(punch_distance + 1):
-                x, y = player.get_new_position(i)
-
-                if player.check_postion_valid(x, y):
-                    cam[y - y_start_index][x - x_start_index] = "💥"
-                    for enemy in view.enemies:
-                        if enemy.x == x and enemy.y == y:
-                            enemy.move.stop()
-                            view.enemies.remove(enemy)
-                            view.spawn_enemy()
-                else:
-                    break
+            # emojis drawn over the cells which are punched
+            overlays = {cell: "💥" for cell in view.game.punch()}
 
             self.style = ButtonStyle.green
-            embed = view.get_embed((cam, x_start_index, y_start_index))
-            await view.update_msg(force_update=True, embed=embed)
+            embed = view.get_embed(overlays)
+            await view.update_msg(embed=embed)
 
             await asyncio.sleep(1)
 
@@ -220,79 +198,61 @@ class MazeButton(Button["Maze"]):
         # 2. update last_ran and timeout
         player.cooldowns[action][0] = datetime.now()
 
-        await view.update_msg(interaction)
+        await view.update_msg()
 
         # wait for cooldown and change button style back to blurple again
         await asyncio.sleep(player.cooldowns[action][1])
         self.style = ButtonStyle.blurple
-        await view.update_msg(interaction)
+        await view.update_msg()
 
 
 class Maze(BaseView):
     """Shows buttons to control a player in Maze."""
 
+    # seconds between every move of the enemies
+    TICK_INTERVAL = 3
+
+    CELL_EMOJIS = {
+        EMPTY: "<:empty:1008231456650301450>",  # walkable space, empty emoji
+        WALL: "<:wall:1071645318845837404>",  # wall
+        DEST: "🟨",  # destination
+        TRAP: "<:trap:1028648275634573343>",  # trap, 25% opacity empty emoji
+    }
+    FRAME_CORNER = "<:frame1:1073794639758364844>"
+    FRAME_SIDE = "<:frame2:1073794643411619931>"
+    FRAME_TOP = "<:frame3:1073794645508763749>"
+
     def __init__(
         self,
         interaction,
         size: tuple[int] = (12, 12),
         rewards: list[BossItem | BossCurrency] = None,
+        layout: MazeLayout = None,
+        seed: int = None,
     ):
         """
-        `1.` Initalise the player, enemies and the view.
+        `0.` Use `Maze.create()` to get a ready-made layout. If `layout` is not given, it is generated here.
 
-        `2.` Adds buttons as the controller.
+        `1.` Initalise the game, which spawns the player, items and enemies, see `MazeGame`.
 
-        `3.` Make traps and spawn items/enemies in the maze.
+        `2.` Adds buttons as the controller.
 
-        `4.` Controls the logic for the maze, includes functions to decide whether the player wins the game.
+        `3.` Shows the game and reacts to its events, e.g. whether the player wins the game.
         """
 
         super().__init__(interaction=interaction, timeout=90)
 
-        # set up the map
-        # **MAPS**
-        # ----------
-        # 0 --> ⬜ --> walkable space
-        # 1 --> 🟦 --> walls
-        # 2 --> 🟨 --> destination
-        # 3 --> 🔺 --> trap
-
-        m = Mazelib()
-        m.generator = Prims(*size)
-        m.generate()
-        m.generate_entrances(end_outer=False)
-
-        self.start = m.start
-        self.end = m.end
-
-        self.maze_map = [list(i) for i in list(m.grid)]
-        for y_i, y in enumerate(self.maze_map):
-            for x_i, x in enumerate(y):
-                if random.randint(1, 25) == 1 and not x:
-                    self.maze_map[y_i][x_i] = 3
-
-        self.maze_map[m.end[0]][m.end[1]] = 2
-
-        # initalise the player
-        self.player = MazePlayer(self, self.start[1], self.start[0])
-
-        # initalise enemies
-        self.enemies = []
-        MAX_NUM_OF_ENEMIES = 12
+        # set up the map, see `MazeLayout` for the values of the cells
+        if layout is None:
+            layout = generate_layout(size)
 
-        self.items = []
-        MAX_NUM_OF_ITEMS = 25
-
-        for _ in range(MAX_NUM_OF_ITEMS):
-            self.spawn_item()
-
-        for _ in range(MAX_NUM_OF_ENEMIES):
-            self.spawn_enemy()
+        self.game = MazeGame(layout, seed)
+        self.player = self.game.player
+        self.end = layout.end
+        self.tick_handle: TickHandle = None
 
         self.cam_width = 10
 
-        self.updating = False
-
         # set up the controller and add buttons
         # MAZE_DIRECTIONS = ["⬆️", "⬅️", "⬇️", "➡️"]
         self.controller = [
@@ -310,42 +270,39 @@ class Maze(BaseView):
 
         self.rewards = rewards
 
+    @classmethod
+    async def create(
+        cls,
+        interaction,
+        size: tuple[int] = (12, 12),
+        rewards: list[BossItem | BossCurrency] = None,
+    ):
+        """Create a maze with a layout from the pool, which is generated in a worker if the pool is empty."""
+        layout = await maze_layout_pool.get(size)
+        return cls(interaction, size, rewards, layout=layout)
+
     async def send(self):
         embed = self.get_embed()
         self.message = await self.interaction.send(embed=embed, view=self)
+        # the enemies start moving after the first interval
+        self.tick_handle = tick_scheduler.schedule(self.tick, self.TICK_INTERVAL)
 
-    def spawn_enemy(self):
-        enemy = MazeEnemy(self, 0, 0)
-        while True:
-            enemy.x = random.randint(1, len(self.maze_map[0])) - 1
-            enemy.y = random.randint(1, len(self.maze_map)) - 1
-            distance_with_player = math.sqrt((self.player.x - enemy.x) ** 2 + (self.player.y - enemy.y) ** 2)
-            if (self.maze_map[enemy.y][enemy.x] not in enemy.unwalkable_cells) and (distance_with_player > 5):
-                break
-        enemy.move.start()
-        self.enemies.append(enemy)
-
-    def spawn_item(self):
-        item = random.choices(list(ITEMS.values()), [item.spawn_chance for item in ITEMS.values()])[0]
-        while True:
-            x = random.randint(1, len(self.maze_map[0])) - 1
-            y = random.randint(1, len(self.maze_map)) - 1
-            distance_with_player = math.sqrt((self.player.x - x) ** 2 + (self.player.y - y) ** 2)
-            if (
-                (self.maze_map[y][x] != 3)
-                and (self.maze_map[y][x] not in self.player.unwalkable_cells)
-                and (distance_with_player > 5)
-                and not [item for item in self.items if x == item.x and y == item.y]
-            ):
-                break
-        self.items.append(item(self, x, y))
+    async def tick(self):
+        """Move every enemy near the player, deal their damage and update the message once."""
+        if self.game.ended:
+            return
+
+        events = self.game.tick()
+        await self.perform_event_results(self.interaction, events)
+        # get the embed and edit the message
+        embed = self.get_embed()
+        await self.update_msg(embed=embed)
 
     def end_maze(self):
         self.clear_items()
-        for enemy in self.enemies:
-            enemy.move.stop()
-        self.enemies = []
-        self.player.walking = False
+        if self.tick_handle is not None:
+            self.tick_handle.cancel()
+        self.game.finish(won=self.game.won)
 
     def update_compass(self):
         compass = [i for i in self.children if "compass" in i.custom_id]
@@ -376,33 +333,34 @@ class Maze(BaseView):
 
         compass.emoji = dir_emojis[lookup]
 
-    async def perform_event_results(self, interaction: Interaction):
+    async def perform_event_results(self, interaction: Interaction, events: list[MazeEvent]):
+        """
+        React to the events of a step of the game.
+        Returns `False` if the message has already been updated, and `True` if it should be.
+        """
         self.update_compass()
 
-        player = self.player
-
-        if self.maze_map[player.y][player.x] == 3:  # trap
-            player.hp -= random.randint(10, 15)
-
-        if player.hp <= 0:  # die
-            player.emoji = "💀"
+        if MazeEvent.DIED in events:  # die
             self.end_maze()
             await interaction.send(embed=TextEmbed("You died!"), ephemeral=True)
 
-        if self.maze_map[player.y][player.x] == 2:  # win
-            player.emoji = "🤴🏻"
+        if MazeEvent.WON in events:  # win
             self.end_maze()
             db = self.interaction.client.db
             # add the list of rewards to the player's inventory, if any
             reward_msg = ""
             if self.rewards:
+                boss_player = BossPlayer(db, self.interaction.user)
+                async with boss_player.transaction():
+                    for i in self.rewards:
+                        if isinstance(i, BossItem):
+                            await boss_player.add_item(i.item_id, i.quantity)
+                        else:
+                            await boss_player.modify_currency(i.currency_type, i.price)
                 for i in self.rewards:
-                    boss_player = BossPlayer(db, self.interaction.user)
                     if isinstance(i, BossItem):
-                        await boss_player.add_item(i.item_id, i.quantity)
                         reward_msg += f"\n- ` {i.quantity}x ` {await i.get_emoji(db)} {await i.get_name(db)}"
                     else:
-                        await boss_player.modify_currency(i.currency_type, i.price)
                         reward_msg += f"\n- {constants.CURRENCY_EMOJIS[i.currency_type]} {i.price:,}"
 
             await interaction.send(
@@ -410,20 +368,12 @@ class Maze(BaseView):
                 ephemeral=True,
             )
 
-        if item := [item for item in self.items if player.x == item.x and player.y == item.y]:  # picked up item
-            item: MazeItem = item[0]
-            self.items.remove(item)
-
-            if not self.player.inventory.get(item.name):
-                self.player.inventory[item.name] = [item]
-            else:
-                self.player.inventory[item.name].append(item)
-
+        if MazeEvent.PICKED_UP_ITEM in events:  # picked up item
             inv_btn = [i for i in self.children if i.custom_id == "inventory"][0]
             inv_btn.style = ButtonStyle.green
 
             embed = self.get_embed()
-            await self.update_msg(force_update=True, embed=embed)
+            await self.update_msg(embed=embed)
             await asyncio.sleep(1)
             inv_btn.style = ButtonStyle.blurple
             embed = self.get_embed()
@@ -436,80 +386,42 @@ class Maze(BaseView):
         # make the camera view and return it
         if cam_width is None:
             cam_width = self.cam_width
-        y_start_index = self.player.y - math.floor(cam_width / 2)
-
-        if y_start_index < 0:
-            y_start_index = 0
-        y_end_index = y_start_index + cam_width
-        if y_end_index >= len(self.maze_map):
-            y_end_index = len(self.maze_map)
-            y_start_index = y_end_index - cam_width
-
-        x_start_index = self.player.x - math.floor(cam_width / 2)
-
-        if x_start_index < 0:
-            x_start_index = 0
-        x_end_index = x_start_index + cam_width
-        if x_end_index >= len(self.maze_map[0]):
-            x_end_index = len(self.maze_map[0])
-            x_start_index = x_end_index - cam_width
-
-        cam = [i[x_start_index:x_end_index] for i in self.maze_map[y_start_index:y_end_index]]
-        return cam, x_start_index, y_start_index
+        return self.game.get_camera(cam_width)
 
-    def draw_camera(self, camera, x_start_index, y_start_index):
-        camera_str = "<:frame1:1073794639758364844>"
-        camera_str += "<:frame3:1073794645508763749>" * (self.cam_width)
-        camera_str += "<:frame1:1073794639758364844>\n"
+    def draw_camera(self, camera, x_start_index, y_start_index, overlays: dict[tuple[int, int], str] = None):
+        overlays = overlays or {}
+        player_position = (self.player.x, self.player.y)
+        items = self.game.items
+        enemy_positions = self.game.enemy_positions
+        cell_emojis = self.CELL_EMOJIS
 
+        border = self.FRAME_CORNER + self.FRAME_TOP * self.cam_width + self.FRAME_CORNER
+        rows = [border]
         # set the embed description - map
         for y in range(self.cam_width):  # 0-8
-            camera_str += "<:frame2:1073794643411619931>"
+            row = [self.FRAME_SIDE]
             for x in range(self.cam_width):  # 0-8
-                if x + x_start_index == self.player.x and y + y_start_index == self.player.y:
-                    camera_str += self.player.emoji
-
-                elif isinstance(camera[y][x], str):  # specified text
-                    camera_str += camera[y][x]
-
-                elif item := [
-                    item for item in self.items if x + x_start_index == item.x and y + y_start_index == item.y
-                ]:
-                    camera_str += item[0].emoji
-
-                elif enemy := [
-                    enemy for enemy in self.enemies if x + x_start_index == enemy.x and y + y_start_index == enemy.y
-                ]:
-                    camera_str += enemy[0].emoji
-
-                elif camera[y][x] == 0:  # walkable space
-                    camera_str += "<:empty:1008231456650301450>"  # empty emoji
-
-                elif camera[y][x] == 1:  # wall
-                    camera_str += "<:wall:1071645318845837404>"
-
-                elif camera[y][x] == 2:  # destination
-                    camera_str += "🟨"
-
-                elif camera[y][x] == 3:  # trap
-                    camera_str += "<:trap:1028648275634573343>"  # 25% opacity empty emoji
-
-            camera_str += "<:frame2:1073794643411619931>\n"
-
-        camera_str += "<:frame1:1073794639758364844>"
-        camera_str += "<:frame3:1073794645508763749>" * (self.cam_width)
-        camera_str += "<:frame1:1073794639758364844>"
-        return camera_str
+                position = (x + x_start_index, y + y_start_index)
+                if position == player_position:
+                    row.append(self.player.emoji)
+                elif position in overlays:  # specified text
+                    row.append(overlays[position])
+                elif position in items:
+                    row.append(items[position].emoji)
+                elif position in enemy_positions:
+                    row.append(enemy_positions[position][0].emoji)
+                else:
+                    row.append(cell_emojis[camera[y][x]])
+            row.append(self.FRAME_SIDE)
+            rows.append("".join(row))
+        rows.append(border)
+        return "\n".join(rows)
 
-    def get_embed(self, set_cam: tuple = None):  # cam: (cam, x_start_index, y_start_index)
+    def get_embed(self, overlays: dict[tuple[int, int], str] = None):  # overlays: {(x, y): emoji}
         embed = Embed(colour=EmbedColour.DEFAULT)
 
-        if set_cam is not None:
-            cam, x_start_index, y_start_index = set_cam
-        else:
-            cam, x_start_index, y_start_index = self.get_camera()
-
-        embed.description = self.draw_camera(cam, x_start_index, y_start_index)
+        cam, x_start_index, y_start_index = self.get_camera()
+        embed.description = self.draw_camera(cam, x_start_index, y_start_index, overlays)
 
         prefixes = {}
 
@@ -536,27 +448,19 @@ class Maze(BaseView):
 
         return embed
 
-    async def update_msg(self, force_update=False, **kwargs):
-        if kwargs.get("embed"):
-            if force_update or self.updating == False:
-                self.updating = True
-                try:
-                    await self.message.edit(view=self, **kwargs)
-                except nextcord.errors.NotFound:  # the message is deleted
-                    self.on_timeout()
-                    return
-                else:
-                    await asyncio.sleep(0.4)
-                    self.updating = False
-        else:
-            await self.message.edit(view=self)
+    async def update_msg(self, **kwargs):
+        """Edit the message with the view and `kwargs`, merged with any edit of it which has not been sent yet."""
+        try:
+            await message_editor.edit(self.message, view=self, **kwargs)
+        except nextcord.errors.NotFound:  # the message is deleted
+            self.end_maze()
 
     async def on_timeout(self) -> None:
         if self.children:
             embed = self.get_embed()
             embed.set_author(name="You have been idle for too long!")
             self.end_maze()
-            await self.message.edit(embed=embed, view=self)
+            await self.update_msg(embed=embed)
 
 
 class MazeInvView(View):
@@ -618,21 +522,13 @@ class MazeInvView(View):
         await self.msg.edit(embed=embed, view=self)
 
     async def _use_item(self, interaction: Interaction, quantity: int):
-        items = self.inventory[self.item.name]
-        if len(items) < quantity:
-            await interaction.send(
-                embed=TextEmbed(f"You don't have enough {self.item.emoji} {self.item.name}!"),
-                ephemeral=True,
-            )
-            return
-
-        res = await self.item.use(view=self.maze, interaction=interaction, quantity=quantity)
-        # item.use() will return `True` if the item should be consumed and `False` if not
-        if res:
-            if len(items) == quantity:
-                self.inventory.pop(self.item.name)
-            else:
-                self.inventory[self.item.name] = items[:-1]
+        error = self.maze.game.use_item(self.item.name, quantity)
+        # the items are only consumed if they could be used
+        if error is not None:
+            await interaction.send(embed=TextEmbed(error), ephemeral=True, delete_after=3)
+        else:
+            embed = self.maze.get_embed()
+            await self.maze.update_msg(embed=embed)
 
         await self.msg.delete()
 
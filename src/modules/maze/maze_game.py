@@ -0,0 +1,271 @@
+"""
+Module providing the rules of the maze minigame, independent of discord.
+
+`MazeGame` steps player actions, enemy ticks, item pickups, traps and winning/dying.
+Given the same layout and seed, a game plays out the same way, so it can be simulated and measured without discord.
+"""
+# default modules
+import enum
+import math
+import random
+from typing import Optional
+
+from .maze_enemies import MazeEnemy
+from .maze_grid import DEST, TRAP, MazeGrid
+from .maze_layouts import MazeLayout
+from .maze_pathfinding import NextStepField
+from .maze_player import MazePlayer
+from .maze_utils import ITEMS, MazeItem
+
+
+class MazeEvent(enum.Enum):
+    """Things that happened during a step of the game, which the interface can react to."""
+
+    TRAPPED = enum.auto()
+    PICKED_UP_ITEM = enum.auto()
+    DIED = enum.auto()
+    WON = enum.auto()
+
+
+class MazeGame:
+    """The state and rules of a maze game."""
+
+    MAX_NUM_OF_ENEMIES = 12
+    MAX_NUM_OF_ITEMS = 25
+    # only enemies within this area around the player move
+    ENEMY_CAMERA_WIDTH = 12
+    ENEMY_RANGE = 15
+    PUNCH_DISTANCE = 2
+    # the player cannot run if their hunger is lower than this
+    MIN_RUN_HUNGER = 30
+
+    def __init__(self, layout: MazeLayout, seed: Optional[int] = None):
+        self.rng = random.Random(seed)
+
+        # the grid is copied, since it is modified by drills
+        self.maze_map: MazeGrid = layout.maze_map.copy()
+        self.start = layout.start
+        self.end = layout.end
+        # cells where items and enemies can spawn
+        self.spawn_cells = layout.spawn_cells
+        # incremented whenever `maze_map` is modified
+        self.map_version = 0
+        self._next_step_field: NextStepField = None
+        self._next_step_field_key = None
+
+        self.ended = False
+        self.won = False
+        self.ticks = 0
+
+        # initalise the player
+        self.player = MazePlayer(self, self.start[1], self.start[0])
+
+        # initalise enemies
+        self.enemies: list[MazeEnemy] = []
+        # maps positions (x, y) to the enemies in them, kept in sync by `add_enemy()`, `move_enemy()` and `remove_enemy()`
+        self.enemy_positions: dict[tuple[int, int], list[MazeEnemy]] = {}
+
+        # maps positions (x, y) to the item in them, there is at most 1 item in every cell
+        self.items: dict[tuple[int, int], MazeItem] = {}
+
+        for _ in range(self.MAX_NUM_OF_ITEMS):
+            self.spawn_item()
+
+        for _ in range(self.MAX_NUM_OF_ENEMIES):
+            self.spawn_enemy()
+
+    def get_camera_bounds(self, cam_width: int) -> tuple[int, int]:
+        """Get the top-left corner (x, y) of the camera, centered on the player but kept inside the maze."""
+        y_start_index = self.player.y - math.floor(cam_width / 2)
+
+        if y_start_index < 0:
+            y_start_index = 0
+        if y_start_index + cam_width >= self.maze_map.height:
+            y_start_index = self.maze_map.height - cam_width
+
+        x_start_index = self.player.x - math.floor(cam_width / 2)
+
+        if x_start_index < 0:
+            x_start_index = 0
+        if x_start_index + cam_width >= self.maze_map.width:
+            x_start_index = self.maze_map.width - cam_width
+
+        return x_start_index, y_start_index
+
+    def get_camera(self, cam_width: int) -> tuple[list[bytes], int, int]:
+        """Get the cells around the player as rows, and the top-left corner (x, y) of the camera."""
+        x_start_index, y_start_index = self.get_camera_bounds(cam_width)
+        cam = self.maze_map.get_rows(
+            x_start_index, x_start_index + cam_width, y_start_index, y_start_index + cam_width
+        )
+        return cam, x_start_index, y_start_index
+
+    def get_next_step_field(self) -> NextStepField:
+        """
+        Get the next steps of every cell towards the player.
+        It is computed once whenever the player moves or the map changes, and shared by all enemies.
+        """
+        key = (self.player.x, self.player.y, self.map_version)
+        if self._next_step_field_key != key:
+            self._next_step_field = NextStepField(
+                self.maze_map, (self.player.x, self.player.y), MazeEnemy.UNWALKABLE_CELLS
+            )
+            self._next_step_field_key = key
+        return self._next_step_field
+
+    def get_enemies_at(self, x: int, y: int) -> list[MazeEnemy]:
+        """Get a copy of the list of enemies in a cell."""
+        return list(self.enemy_positions.get((x, y), ()))
+
+    def _index_enemy(self, enemy: MazeEnemy):
+        self.enemy_positions.setdefault((enemy.x, enemy.y), []).append(enemy)
+
+    def _unindex_enemy(self, enemy: MazeEnemy):
+        position = (enemy.x, enemy.y)
+        self.enemy_positions[position].remove(enemy)
+        if not self.enemy_positions[position]:
+            del self.enemy_positions[position]
+
+    def add_enemy(self, enemy: MazeEnemy):
+        self.enemies.append(enemy)
+        self._index_enemy(enemy)
+
+    def remove_enemy(self, enemy: MazeEnemy):
+        self.enemies.remove(enemy)
+        self._unindex_enemy(enemy)
+
+    def move_enemy(self, enemy: MazeEnemy, x: int, y: int):
+        """Move an enemy to a new cell, this must be used instead of setting its position directly."""
+        self._unindex_enemy(enemy)
+        enemy.x, enemy.y = x, y
+        self._index_enemy(enemy)
+
+    def get_spawn_cell(self, without_items: bool = False) -> tuple[int, int]:
+        """Choose a random spawn cell which is more than 5 cells away from the player."""
+        while True:
+            x, y = self.rng.choice(self.spawn_cells)
+            distance_with_player = math.sqrt((self.player.x - x) ** 2 + (self.player.y - y) ** 2)
+            if distance_with_player > 5 and not (without_items and (x, y) in self.items):
+                return x, y
+
+    def spawn_enemy(self):
+        x, y = self.get_spawn_cell()
+        self.add_enemy(MazeEnemy(self, x, y))
+
+    def spawn_item(self):
+        item = self.rng.choices(list(ITEMS.values()), [item.spawn_chance for item in ITEMS.values()])[0]
+        x, y = self.get_spawn_cell(without_items=True)
+        self.items[(x, y)] = item(self, x, y)
+
+    def finish(self, won: bool = False):
+        """End the game, the enemies stop moving."""
+        if self.ended:
+            return
+        self.ended = True
+        self.won = won
+        self.player.walking = False
+        self.enemies = []
+        self.enemy_positions = {}
+
+    def _resolve_cell(self) -> list[MazeEvent]:
+        """Trigger the cell the player is in: traps, the destination and items."""
+        player = self.player
+        events = []
+
+        if self.maze_map[player.x, player.y] == TRAP:
+            player.hp -= self.rng.randint(10, 15)
+            events.append(MazeEvent.TRAPPED)
+
+        if self.ended and not self.won:  # die
+            events.append(MazeEvent.DIED)
+            return events
+
+        if self.maze_map[player.x, player.y] == DEST:  # win
+            player.emoji = "🤴🏻"
+            self.finish(won=True)
+            events.append(MazeEvent.WON)
+            return events
+
+        if item := self.items.pop((player.x, player.y), None):  # picked up item
+            player.inventory.setdefault(item.name, []).append(item)
+            events.append(MazeEvent.PICKED_UP_ITEM)
+
+        return events
+
+    def walk(self, direction: int) -> list[MazeEvent]:
+        """
+        Walk 1 cell in a direction, the maze directions are ["⬆️", "⬅️", "⬇️", "➡️"].
+        Choosing the opposite direction only turns the player around.
+        """
+        player = self.player
+        if abs(direction - player.direction) == 2:  # opposite direcitons
+            player.direction = direction
+            return []
+
+        player.direction = direction
+        player.move()
+        return self._resolve_cell()
+
+    def run_step(self) -> Optional[list[MazeEvent]]:
+        """Run 1 cell in the direction the player faces. Returns `None` if the player could not move."""
+        player = self.player
+        old_x, old_y = player.x, player.y
+        player.move()
+        if (old_x, old_y) == (player.x, player.y):
+            return None
+        player.hunger -= self.rng.randint(1, 3)
+        return self._resolve_cell()
+
+    def punch(self) -> list[tuple[int, int]]:
+        """Punch the cells in front of the player, killing the enemies there. Returns the punched cells."""
+        player = self.player
+        punched = []
+        for i in range(self.PUNCH_DISTANCE + 1):
+            x, y = player.get_new_position(i)
+            if not player.check_postion_valid(x, y):
+                break
+            punched.append((x, y))
+            for enemy in self.get_enemies_at(x, y):
+                self.remove_enemy(enemy)
+                self.spawn_enemy()
+        return punched
+
+    def use_item(self, name: str, quantity: int = 1) -> Optional[str]:
+        """
+        Use items in the player's inventory.
+        Returns a message explaining why the items could not be used, they are only consumed if it is `None`.
+        """
+        items = self.player.inventory.get(name, [])
+        if len(items) < quantity:
+            item = ITEMS[name]
+            return f"You don't have enough {item.emoji} {item.name}!"
+
+        error = items[-1].apply(self, quantity)
+        if error is None:
+            if len(items) == quantity:
+                self.player.inventory.pop(name)
+            else:
+                del items[-quantity:]
+        return error
+
+    def tick(self) -> list[MazeEvent]:
+        """Move every enemy near the player and deal their damage."""
+        if self.ended:
+            return []
+        self.ticks += 1
+
+        player = self.player
+        x_start_index, y_start_index = self.get_camera_bounds(self.ENEMY_CAMERA_WIDTH)
+        damage = 0
+        for enemy in self.enemies:
+            if (
+                x_start_index < enemy.x < x_start_index + self.ENEMY_RANGE
+                and y_start_index < enemy.y < y_start_index + self.ENEMY_RANGE
+            ):
+                damage += enemy.move()
+        if damage:
+            player.hp -= damage
+
+        if self.ended and not self.won:
+            return [MazeEvent.DIED]
+        return []
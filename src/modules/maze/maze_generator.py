@@ -0,0 +1,244 @@
+"""
+Module providing the generation of maze images for `/generate-maze`, which runs in a dedicated process pool.
+
+Generating, solving and encoding large mazes takes seconds of CPU time, so it is done by `generate_maze()` in
+another process. `MazeGenerator` queues the requests and takes turns between users, so one user cannot hold up others.
+"""
+# default modules
+import asyncio
+import os
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from functools import lru_cache, partial
+from io import BytesIO
+from typing import Optional
+
+# mazelib
+from mazelib import Maze
+from mazelib.generate.Prims import Prims
+from mazelib.solve.BacktrackingSolver import BacktrackingSolver
+from PIL import Image
+
+# the number of processes generating mazes, configurable with an environment variable
+MAZE_GENERATOR_WORKERS = int(os.getenv("MAZE_GENERATOR_WORKERS", "1"))
+
+SPRITE_WIDTH = 36
+SPRITES_DIR = "resources/maze"
+
+
+@dataclass
+class GeneratedMaze:
+    """A generated and solved maze, with its images encoded as PNG."""
+
+    # (y, x) of the entrance and the exit, as in mazelib
+    start: tuple[int, int]
+    end: tuple[int, int]
+    solution_length: int
+    solved_img: bytes
+    unsolved_img: bytes
+
+
+@lru_cache(maxsize=None)
+def get_sprites() -> dict[str, Image.Image]:
+    """Decode the sprites once in every process. Maps the name of the sprite (e.g. "wall") to the image."""
+    sprites = {}
+    for name in ("ground", "wall", "path", "start", "finish"):
+        with Image.open(os.path.join(SPRITES_DIR, f"{name}.png")) as img:
+            sprites[name] = img.convert("RGBA")
+    return sprites
+
+
+def _generate_solved_img(maze_str: str, width: int, height: int) -> Image.Image:
+    sprites = get_sprites()
+    cell_sprites = {
+        "#": sprites["wall"],
+        " ": sprites["ground"],
+        "S": sprites["start"],
+        "E": sprites["finish"],
+        "+": sprites["path"],
+    }
+    solved_img = Image.new("RGBA", (SPRITE_WIDTH * width, SPRITE_WIDTH * height))
+
+    # generate the solved maze image
+    for y_i, y in enumerate(maze_str.splitlines()):
+        for x_i, x in enumerate(y):
+            # paste the cell into solved image
+            solved_img.paste(cell_sprites[x], (x_i * SPRITE_WIDTH, y_i * SPRITE_WIDTH))
+    return solved_img
+
+
+def _generate_unsolved_img(maze_str: str, solved_img: Image.Image) -> Image.Image:
+    ground = get_sprites()["ground"]
+    unsolved_img = solved_img.copy()
+    # convert every path image into ground image in unsolved image
+    for y_i, y in enumerate(maze_str.splitlines()):
+        for x_i, x in enumerate(y):
+            if x == "+":
+                unsolved_img.paste(ground, (x_i * SPRITE_WIDTH, y_i * SPRITE_WIDTH))
+    return unsolved_img
+
+
+def _encode_img(image: Image.Image) -> bytes:
+    output = BytesIO()
+    image.thumbnail((1600, 1600))
+    image.save(output, format="PNG")
+    return output.getvalue()
+
+
+def generate_maze(width: int, height: int, difficulty: Optional[float], start: bool, end: bool) -> GeneratedMaze:
+    """
+    Generate and solve a maze, and render its solved and unsolved images.
+
+    If `difficulty` (0 to 1) is set, 10 mazes are generated and the one at that percentile of solution lengths is chosen,
+    otherwise `start` and `end` decide whether the entrances are on the outer walls.
+    """
+    maze = Maze()
+    maze.generator = Prims(height, width)
+    maze.solver = BacktrackingSolver()
+
+    if difficulty:
+        maze.generate_monte_carlo(10, 1, difficulty)
+    else:
+        maze.generate()
+        maze.generate_entrances(start_outer=start, end_outer=end)
+        maze.solve()
+
+    maze_str = maze.tostring(True, True)
+    solved_img = _generate_solved_img(maze_str, len(maze.grid[0]), len(maze.grid))
+    unsolved_img = _generate_unsolved_img(maze_str, solved_img)
+    return GeneratedMaze(
+        start=tuple(maze.start),
+        end=tuple(maze.end),
+        solution_length=len(maze.solutions[0]),
+        solved_img=_encode_img(solved_img),
+        unsolved_img=_encode_img(unsolved_img),
+    )
+
+
+class MazeQueueFull(Exception):
+    """Raised when there are too many mazes waiting to be generated, overall or for a user."""
+
+
+class MazeGenerator:
+    """
+    Generates mazes in a process pool, at most `max_workers` at a time.
+
+    Waiting requests are kept in a queue per user, and the users take turns, so a user who queues mazes
+    only delays their own mazes. At most `MAX_QUEUED` requests can wait, and every user can have at most
+    `MAX_PER_USER` requests which are waiting or being generated.
+    """
+
+    MAX_QUEUED = 20
+    MAX_PER_USER = 2
+
+    def __init__(self, max_workers: int = MAZE_GENERATOR_WORKERS):
+        self.max_workers = max_workers
+        self.executor: Optional[ProcessPoolExecutor] = None
+        # maps user ids to their waiting requests, the user at the front takes the next free worker
+        self.queues: OrderedDict[int, deque[tuple[partial, asyncio.Future]]] = OrderedDict()
+        self.queued = 0
+        self.running = 0
+        # maps user ids to the number of their requests which are waiting or being generated
+        self.user_requests: dict[int, int] = {}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(self.max_workers)
+        return self.executor
+
+    def get_queue_length(self) -> int:
+        """Get the number of requests of all users which are waiting or being generated."""
+        return self.queued + self.running
+
+    async def generate(
+        self,
+        user_id: int,
+        width: int,
+        height: int,
+        difficulty: Optional[float] = None,
+        start: bool = True,
+        end: bool = True,
+    ) -> GeneratedMaze:
+        """Queue a maze for a user and wait for it. Raises `MazeQueueFull` if it cannot be queued."""
+        if self.queued >= self.MAX_QUEUED:
+            raise MazeQueueFull("There are too many mazes being generated right now.")
+        if self.user_requests.get(user_id, 0) >= self.MAX_PER_USER:
+            raise MazeQueueFull("You already have mazes being generated.")
+
+        future = asyncio.get_running_loop().create_future()
+        self.queues.setdefault(user_id, deque()).append(
+            (partial(generate_maze, width, height, difficulty, start, end), future)
+        )
+        self.queued += 1
+        self.user_requests[user_id] = self.user_requests.get(user_id, 0) + 1
+        self._dispatch()
+        return await future
+
+    def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while self.running < self.max_workers and self.queues:
+            user_id, requests = self.queues.popitem(last=False)
+            func, future = requests.popleft()
+            self.queued -= 1
+            if requests:
+                # the user goes to the back, after every other user with waiting requests
+                self.queues[user_id] = requests
+            if future.done():  # the caller was cancelled
+                self._release(user_id)
+                continue
+
+            self.running += 1
+            executor = self._get_executor()
+            try:
+                task = loop.run_in_executor(executor, func)
+            except BrokenProcessPool:
+                # a worker of the pool died after its last request finished, replace the pool
+                self._drop_executor(executor)
+                executor = self._get_executor()
+                task = loop.run_in_executor(executor, func)
+            task.add_done_callback(partial(self._on_done, user_id, future, executor))
+
+    def _release(self, user_id: int):
+        count = self.user_requests.get(user_id, 0) - 1
+        if count > 0:
+            self.user_requests[user_id] = count
+        else:
+            self.user_requests.pop(user_id, None)
+
+    def _drop_executor(self, executor: ProcessPoolExecutor):
+        """Stop using a broken pool, so that the next request creates a new one."""
+        executor.shutdown(wait=False, cancel_futures=True)
+        if self.executor is executor:
+            self.executor = None
+
+    def _on_done(self, user_id: int, future: asyncio.Future, executor: ProcessPoolExecutor, task: asyncio.Future):
+        self.running -= 1
+        self._release(user_id)
+        if not task.cancelled() and isinstance(task.exception(), BrokenProcessPool):
+            # a worker died (e.g. it ran out of memory), every request on the pool fails from now on
+            self._drop_executor(executor)
+        if not future.done():
+            if task.cancelled():
+                future.cancel()
+            elif task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result())
+        self._dispatch()
+
+    def shutdown(self):
+        """Shut down the process pool, cancelling the mazes which have not started generating."""
+        for requests in self.queues.values():
+            for _, future in requests:
+                future.cancel()
+        self.queues.clear()
+        self.queued = 0
+        self.user_requests.clear()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+maze_generator = MazeGenerator()
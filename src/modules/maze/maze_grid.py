@@ -0,0 +1,60 @@
+"""Module providing a compact grid of maze cells, stored as one byte per cell."""
+# default modules
+from typing import Iterable
+
+# the codes of the cells
+EMPTY = 0  # ⬜ walkable space
+WALL = 1  # 🟦 walls
+DEST = 2  # 🟨 destination
+TRAP = 3  # 🔺 trap
+
+
+class MazeGrid:
+    """
+    The cells of a maze, stored row by row in a `bytearray` with a stride of `width`.
+    Cells are indexed by `grid[x, y]`.
+
+    Only the cell codes are stored here, the player, items and enemies are overlays kept by the maze.
+    """
+
+    __slots__ = ("width", "height", "cells")
+
+    def __init__(self, width: int, height: int, cells: bytearray = None):
+        self.width = width
+        self.height = height
+        self.cells = cells if cells is not None else bytearray(width * height)
+        if len(self.cells) != width * height:
+            raise ValueError("The number of cells does not match the size of the grid.")
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Iterable[int]]):
+        """Create a grid from rows of cell codes, e.g. mazelib's grid."""
+        rows = [bytes(int(cell) for cell in row) for row in rows]
+        return cls(len(rows[0]), len(rows), bytearray(b"".join(rows)))
+
+    def copy(self):
+        return MazeGrid(self.width, self.height, bytearray(self.cells))
+
+    def in_bounds(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def __getitem__(self, position: tuple[int, int]) -> int:
+        x, y = position
+        return self.cells[y * self.width + x]
+
+    def __setitem__(self, position: tuple[int, int], code: int):
+        x, y = position
+        self.cells[y * self.width + x] = code
+
+    def get_rows(self, x_start: int, x_end: int, y_start: int, y_end: int) -> list[bytes]:
+        """Get the cells in a rectangle, as a list of rows. Indexing a row gives the codes of its cells."""
+        width = self.width
+        cells = self.cells
+        return [bytes(cells[y * width + x_start : y * width + x_end]) for y in range(y_start, y_end)]
+
+    def get_mask(self, codes: Iterable[int]) -> bytes:
+        """Get a mask of the grid with the same stride, in which cells with one of the codes are 1 and the rest are 0."""
+        table = bytearray(256)
+        for code in codes:
+            table[code] = 1
+        return bytes(self.cells.translate(table))
@@ -0,0 +1,155 @@
+"""
+Module providing the generation of maze layouts, and a pool of ready-made layouts per size.
+
+`generate_layout()` is a pure function of picklable inputs, so layouts are generated in a process pool
+instead of on the event loop.
+"""
+# default modules
+import asyncio
+import logging
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Optional
+
+# mazelib
+from mazelib import Maze as Mazelib
+from mazelib.generate.Prims import Prims
+
+from .maze_grid import DEST, EMPTY, TRAP, MazeGrid
+
+# the number of processes generating mazes, configurable with an environment variable
+MAZE_LAYOUT_WORKERS = int(os.getenv("MAZE_LAYOUT_WORKERS", "1"))
+
+# 1 in `TRAP_CHANCE` walkable cells is a trap
+TRAP_CHANCE = 25
+
+# the sizes of the mazes of the jungle explorer map
+JUNGLE_SIZES = ((25, 25), (28, 28), (30, 30))
+# the sizes kept in the pool (`/maze` and the jungle explorer map), layouts of other sizes are generated on request
+POOLED_SIZES = ((12, 12), *JUNGLE_SIZES)
+
+
+@dataclass
+class MazeLayout:
+    """A generated maze, ready to be played. See `maze_grid` for the codes of the cells."""
+
+    size: tuple[int, int]
+    maze_map: MazeGrid
+    # (y, x) of the entrance and the destination, as in mazelib
+    start: tuple[int, int]
+    end: tuple[int, int]
+    # (x, y) of every walkable cell which is not a trap or the destination, where items and enemies can spawn
+    spawn_cells: list[tuple[int, int]]
+
+
+def generate_layout(size: tuple[int, int]) -> MazeLayout:
+    """Generate a Prims maze with traps, and find the cells where items and enemies can spawn."""
+    m = Mazelib()
+    m.generator = Prims(*size)
+    m.generate()
+    m.generate_entrances(end_outer=False)
+
+    maze_map = MazeGrid.from_rows(m.grid)
+    cells = maze_map.cells
+    spawn_cells = []
+    for index, cell in enumerate(cells):
+        if cell != EMPTY:
+            continue
+        if random.randint(1, TRAP_CHANCE) == 1:
+            cells[index] = TRAP
+        else:
+            spawn_cells.append((index % maze_map.width, index // maze_map.width))
+
+    end = tuple(m.end)
+    maze_map[end[1], end[0]] = DEST
+    spawn_cells = [i for i in spawn_cells if i != (end[1], end[0])]
+    return MazeLayout(tuple(size), maze_map, tuple(m.start), end, spawn_cells)
+
+
+class MazeLayoutPool:
+    """
+    Keeps up to `POOL_SIZE` layouts of each of `sizes` which has been requested, generated in a process pool.
+
+    A popped layout is replaced in the background, so the next maze of the same size starts instantly.
+    Layouts of other sizes are generated when they are requested, without filling the pool with them.
+    """
+
+    POOL_SIZE = 3
+
+    def __init__(self, max_workers: int = MAZE_LAYOUT_WORKERS, sizes: tuple[tuple[int, int], ...] = POOLED_SIZES):
+        self.max_workers = max_workers
+        self.sizes = {tuple(size) for size in sizes}
+        self.executor: Optional[ProcessPoolExecutor] = None
+        # maps sizes to their ready layouts
+        self.layouts: dict[tuple[int, int], list[MazeLayout]] = {}
+        # maps sizes to the number of layouts being generated for the pool
+        self.generating: dict[tuple[int, int], int] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(self.max_workers)
+        return self.executor
+
+    async def generate(self, size: tuple[int, int]) -> MazeLayout:
+        """Generate a layout in the process pool, bypassing the pool of ready layouts."""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        try:
+            return await loop.run_in_executor(executor, generate_layout, tuple(size))
+        except BrokenProcessPool:
+            # a worker died, so every layout would fail in this pool, the next one creates a new pool
+            executor.shutdown(wait=False, cancel_futures=True)
+            if self.executor is executor:
+                self.executor = None
+            raise
+
+    async def get(self, size: tuple[int, int]) -> MazeLayout:
+        """Get a ready layout of the size, generating one only if there are none."""
+        size = tuple(size)
+        if size not in self.sizes:
+            return await self.generate(size)
+
+        layouts = self.layouts.setdefault(size, [])
+        if layouts:
+            layout = layouts.pop()
+        else:
+            # generated before refilling, so that it is not queued behind the layouts for the pool
+            layout = await self.generate(size)
+        self.refill(size)
+        return layout
+
+    def refill(self, size: tuple[int, int]):
+        """Generate layouts in the background until the pool of the size is full."""
+        missing = self.POOL_SIZE - len(self.layouts.get(size, ())) - self.generating.get(size, 0)
+        for _ in range(missing):
+            self.generating[size] = self.generating.get(size, 0) + 1
+            task = asyncio.create_task(self._produce(size))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _produce(self, size: tuple[int, int]):
+        try:
+            layout = await self.generate(size)
+        except Exception:  # pylint: disable=broad-except
+            logging.exception("Failed to generate a maze layout.")
+            return
+        finally:
+            self.generating[size] -= 1
+        layouts = self.layouts.setdefault(size, [])
+        if len(layouts) < self.POOL_SIZE:
+            layouts.append(layout)
+
+    def shutdown(self):
+        """Shut down the process pool, cancelling the layouts which have not started generating."""
+        for task in self._tasks:
+            task.cancel()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+maze_layout_pool = MazeLayoutPool()
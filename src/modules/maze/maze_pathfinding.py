@@ -0,0 +1,76 @@
+"""Module providing a breadth-first search from the player, shared by every enemy in a maze."""
+# default modules
+from collections import deque
+from typing import Optional
+
+from .maze_grid import MazeGrid
+
+
+class NextStepField:
+    """
+    The result of a breadth-first search from a target cell (the player) over the walkable cells of a maze.
+
+    Maps every cell which can reach the target to its distance from the target and the next cell towards it,
+    so that every enemy can find its next step with a lookup instead of searching for a route itself.
+    """
+
+    def __init__(self, grid: MazeGrid, target: tuple[int, int], unwalkable_cells: list):
+        self.height = grid.height
+        self.width = grid.width
+        self.target = target
+        # 1 for the cells which cannot be walked through, with the same stride as the grid
+        blocked = grid.get_mask(unwalkable_cells)
+
+        size = self.width * self.height
+        # indexed by `y * width + x` like the grid, -1 if the cell cannot reach the target
+        self.distances = [-1] * size
+        self.next_steps = [-1] * size
+
+        target_x, target_y = target
+        target_index = target_y * self.width + target_x
+        self.distances[target_index] = 0
+        queue = deque([target_index])
+
+        # local names are faster to look up in the loop
+        width = self.width
+        distances = self.distances
+        next_steps = self.next_steps
+        popleft = queue.popleft
+        append = queue.append
+        while queue:
+            index = popleft()
+            distance = distances[index] + 1
+            x = index % width
+            # the adjacent cells in the order up, right, down, left, -1 if the cell is outside of the grid
+            for new_index in (
+                index - width,
+                index + 1 if x < width - 1 else -1,
+                index + width,
+                index - 1 if x > 0 else -1,
+            ):
+                if not 0 <= new_index < size or distances[new_index] != -1 or blocked[new_index]:
+                    continue
+                distances[new_index] = distance
+                # the cell is reached from `index`, so that is its next step towards the target
+                next_steps[new_index] = index
+                append(new_index)
+
+    def _get_index(self, x: int, y: int) -> Optional[int]:
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return y * self.width + x
+        return None
+
+    def get_distance(self, x: int, y: int) -> Optional[int]:
+        """Get the number of steps from a cell to the target, `None` if it cannot reach the target."""
+        index = self._get_index(x, y)
+        if index is None or self.distances[index] == -1:
+            return None
+        return self.distances[index]
+
+    def get_next_step(self, x: int, y: int) -> Optional[tuple[int, int]]:
+        """Get the next cell from a cell towards the target, `None` if it is the target or cannot reach it."""
+        index = self._get_index(x, y)
+        if index is None or self.next_steps[index] == -1:
+            return None
+        next_y, next_x = divmod(self.next_steps[index], self.width)
+        return next_x, next_y
@@ -1,4 +1,7 @@
+# default modules
 from datetime import datetime
+
+from .maze_grid import WALL
 from .maze_utils import ITEMS
 
 
@@ -12,7 +15,7 @@ class MazePlayer:
         "<:WarriorRight:1121746580756779141>",
     ]
 
-    def __init__(self, view, x, y):
+    def __init__(self, game, x, y):
         self._hp = 100
         self.old_hp = self._hp
         self.hunger = 100
@@ -21,16 +24,16 @@ class MazePlayer:
         self.inventory = {"food": [], "pill": [], "drill": []}
 
         for name, items in self.inventory.items():
-            items.extend([ITEMS[name](view, 0, 0)] * len(INITIAL_INVENTORY[name]))
+            items.extend(ITEMS[name](game, 0, 0) for _ in range(INITIAL_INVENTORY[name]))
 
         self.direction = 2
 
         self.x = x
         self.y = y
         self.walking = False
-        self.unwalkable_cells = [1]
+        self.unwalkable_cells = [WALL]
 
-        self.view = view
+        self.game = game
         self.cooldowns = {  # "action": [last_did_at, cooldown(seconds)]
             "run": [datetime(2000, 1, 1), 5],
             "punch": [datetime(2000, 1, 1), 2],
@@ -62,7 +65,7 @@ class MazePlayer:
 
     def death(self):
         self.emoji = "💀"
-        self.view.end_maze()
+        self.game.finish(won=False)
 
     def get_new_position(self, num_of_cells: int = 1):
         x = self.x
@@ -84,10 +87,9 @@ class MazePlayer:
         x = self.x if x is None else x
         y = self.y if y is None else y
 
-        maze_map = self.view.maze_map
-        if y < len(maze_map) and y > 0 and x < len(maze_map[0]) and x > 0:
-            pos = maze_map[y][x]
-            return pos not in self.unwalkable_cells
+        maze_map = self.game.maze_map
+        if y < maze_map.height and y > 0 and x < maze_map.width and x > 0:
+            return maze_map[x, y] not in self.unwalkable_cells
         return False
 
     def move(self):
@@ -1,23 +1,7 @@
 # default modules
-import itertools
-import random
+from typing import Optional
 
-# nextcord
-from nextcord import Interaction, Embed
-
-
-class Cell:
-    """Represents a cell in the maze."""
-
-    id_iter = itertools.count()  # function to get the next cell ID
-
-    def __init__(self, x: int, y: int, *, counter: int, parent_id: int):
-        self.id = next(self.id_iter)
-        self.x = x
-        self.y = y
-        self.counter = counter  # counter is cells away from target (player) in a route
-        self.parent_id = parent_id
-        self.added_adjacent_cells = False
+from .maze_grid import EMPTY, WALL
 
 
 class MazeItem:
@@ -32,14 +16,17 @@ class MazeItem:
     max_use = 0
     spawn_chance = 0
 
-    def __init__(self, view, x, y) -> None:
-        self.view = view
+    def __init__(self, game, x, y) -> None:
+        self.game = game
         self.x = x
         self.y = y
 
-    async def use(self, *, view, interaction: Interaction, quantity: int = 1):
-        """Function that runs when player uses the item."""
-        pass
+    def apply(self, game, quantity: int = 1) -> Optional[str]:
+        """
+        Function that runs when player uses the item.
+        Returns a message if the item could not be used, and it is only consumed if it returns `None`.
+        """
+        return None
 
 
 class Food(MazeItem):
@@ -54,16 +41,14 @@ class Food(MazeItem):
     max_use = 2
     spawn_chance = 70
 
-    def __init__(self, view, x, y) -> None:
-        super().__init__(view, x, y)
+    def __init__(self, game, x, y) -> None:
+        super().__init__(game, x, y)
 
-    async def use(self, *, view, interaction: Interaction, quantity: int = 1):
-        player = view.player
+    def apply(self, game, quantity: int = 1) -> Optional[str]:
+        player = game.player
         player.hunger += 30 * quantity
         player.hunger = 100 if player.hunger > 100 else player.hunger
-        embed = view.get_embed()
-        await view.update_msg(embed=embed)
-        return True
+        return None
 
 
 class Pill(MazeItem):
@@ -78,16 +63,14 @@ class Pill(MazeItem):
     max_use = 3
     spawn_chance = 25
 
-    def __init__(self, view, x, y) -> None:
-        super().__init__(view, x, y)
+    def __init__(self, game, x, y) -> None:
+        super().__init__(game, x, y)
 
-    async def use(self, *, view, interaction: Interaction, quantity: int = 1):
-        player = view.player
-        player.hp += sum(random.randint(12 * quantity, 20 * quantity))
+    def apply(self, game, quantity: int = 1) -> Optional[str]:
+        player = game.player
+        player.hp += game.rng.randint(12 * quantity, 20 * quantity)
         player.hp = 100 if player.hp > 100 else player.hp
-        embed = view.get_embed()
-        await view.update_msg(embed=embed)
-        return True
+        return None
 
 
 class Drill(MazeItem):
@@ -102,34 +85,22 @@ class Drill(MazeItem):
     max_use = 1
     spawn_chance = 5
 
-    def __init__(self, view, x, y) -> None:
-        super().__init__(view, x, y)
+    def __init__(self, game, x, y) -> None:
+        super().__init__(game, x, y)
 
-    async def use(self, *, view, interaction: Interaction, quantity: int = 1):
-        player = view.player
+    def apply(self, game, quantity: int = 1) -> Optional[str]:
+        player = game.player
         x, y = player.get_new_position()
         if player.hp <= 50:
-            await interaction.send(
-                embed=Embed(
-                    description="You sure you gonna drill through the wall? You seem a bit low dude"
-                ),
-                ephemeral=True,
-                delete_after=3,
-            )
-            return False
-
-        if view.maze_map[y][x] == 1:
-            view.maze_map[y][x] = 0
-            player.hp -= 50
-        else:
-            await interaction.send(
-                embed=Embed(description="That's not a wall bruh."), ephemeral=True, delete_after=3
-            )
-            return False
-
-        embed = view.get_embed()
-        await view.update_msg(embed=embed)
-        return True
+            return "You sure you gonna drill through the wall? You seem a bit low dude"
+
+        if not game.maze_map.in_bounds(x, y) or game.maze_map[x, y] != WALL:
+            return "That's not a wall bruh."
+
+        game.maze_map[x, y] = EMPTY
+        game.map_version += 1  # the enemies can walk through the new path
+        player.hp -= 50
+        return None
 
 
 ITEMS = {item.name: item for item in MazeItem.__subclasses__()}
@@ -76,6 +76,8 @@ class TradeView(BaseView):
             FROM trades.villagers
             """,
             self.interaction.user.id,
+            read_only=True,
+            player_id=self.interaction.user.id,
         )
         for i in res:
             self.villagers.append(
@@ -270,9 +272,13 @@ class TradeView(BaseView):
         player = Player(db, interaction.user)
         remaining_currency = None
         remaining_inventory = []
+        inventory = []
+        failed_item = None  # the item which the player does not have enough of
 
-        async with db.pool.acquire() as conn:
-            async with conn.transaction():
+        # the whole trade is one unit of work --> if the player does not have enough of any item,
+        # the `ValueError` propagates out of the transaction and all changes are rolled back
+        try:
+            async with player.transaction() as conn:
                 # Retrieve the player's inventory from the database
                 inventory = await conn.fetch(
                     """
@@ -290,44 +296,27 @@ class TradeView(BaseView):
                 }.items():
                     multiplier = -1 if trade_type == "demand" else 1
                     for item in trade_items:
+                        failed_item = item
                         if isinstance(item, BossCurrency):
-                            try:
-                                # Deduct the required amount of currency from the player's account
-                                required_price = multiplier * item.price * trade_quantity
-                                remaining_currency = (
-                                    item.currency_type,
-                                    await player.modify_currency(item.currency_type, required_price),
-                                )
-                            except ValueError:
-                                # The player does not have enough currency, send a message to the player and return
-                                await interaction.send_text("You don't have enough scrap metal.", ephemeral=True)
-                                return
+                            # Deduct the required amount of currency from the player's account
+                            required_price = multiplier * item.price * trade_quantity
+                            remaining_currency = (
+                                item.currency_type,
+                                await player.modify_currency(item.currency_type, required_price),
+                            )
                         elif isinstance(item, BossItem):
-                            # get the quantity of the item the player owns with a generator expression
-                            owned_quantity = next((i["quantity"] for i in inventory if i["item_id"] == item.item_id), 0)
-                            try:
-                                # Add/remove the required amount of items to/from the player's inventory
-                                required_quantity = multiplier * item.quantity * trade_quantity
-                                new_quantity = await player.add_item(item.item_id, required_quantity)
-                                remaining_inventory.append(
-                                    BossItem(
-                                        item.item_id,
-                                        new_quantity,
-                                    )
-                                )
-                            except ValueError:
-                                # The player does not have enough of the item, send a message to the player and return
-                                await interaction.send_text(
-                                    (
-                                        f"You are {item.quantity * trade_quantity - owned_quantity} short in"
-                                        f" {await item.get_emoji(db)} {await item.get_name(db)}."
-                                    ),
-                                    ephemeral=True,
+                            # Add/remove the required amount of items to/from the player's inventory
+                            required_quantity = multiplier * item.quantity * trade_quantity
+                            new_quantity = await player.add_item(item.item_id, required_quantity)
+                            remaining_inventory.append(
+                                BossItem(
+                                    item.item_id,
+                                    new_quantity,
                                 )
-                                return
+                            )
 
                 # Update the remaining trades for the current villager with the player in the database
-                current_villager.remaining_trades = await db.fetchval(
+                remaining_trades = await conn.fetchval(
                     """
                     INSERT INTO trades.villager_remaining_trades AS t (player_id, villager_id, remaining_trades)
                     VALUES (
@@ -343,6 +332,23 @@ class TradeView(BaseView):
                     current_villager.villager_id,
                     trade_quantity,
                 )
+        except ValueError:
+            if isinstance(failed_item, BossCurrency):
+                # The player does not have enough currency, send a message to the player and return
+                await interaction.send_text("You don't have enough scrap metal.", ephemeral=True)
+            else:
+                # The player does not have enough of the item, send a message to the player and return
+                # get the quantity of the item the player owns with a generator expression
+                owned_quantity = next((i["quantity"] for i in inventory if i["item_id"] == failed_item.item_id), 0)
+                await interaction.send_text(
+                    (
+                        f"You are {failed_item.quantity * trade_quantity - owned_quantity} short in"
+                        f" {await failed_item.get_emoji(db)} {await failed_item.get_name(db)}."
+                    ),
+                    ephemeral=True,
+                )
+            return
+        current_villager.remaining_trades = remaining_trades
 
         # Update the message to show the new remaining trades
         embed = await self.get_embed()
@@ -37,11 +37,11 @@ async def cmd_check(interaction: BossInteraction):
         interaction.attached["reconnected"] = True
         return False
 
-    # Add player to database if he/she is new
+    # Add player to database if he/she is new, and check whether he/she is running a command.
+    # Both are done in one query since this runs before every command.
     player = Player(bot.db, interaction.user)
-    if not await player.is_present():
-        await player.create_profile()
-
+    gate = await player.get_command_gate()
+    if not gate["present"]:
         embed = interaction.embed(
             title="Welcome to BOSS!",
             description=f"Hi, {interaction.user.mention}! BOSS is a bot for set in the post-apocalyptic world after World War III, where everything is tarnished and resources are scarce. "
@@ -52,7 +52,10 @@ async def cmd_check(interaction: BossInteraction):
         await interaction.send(embed=embed)
         return False
 
-    if await player.check_in_inter():
+    # the experience is used in `after_invoke` to check whether the player levelled up
+    bot.player_stats.prime_experience(interaction.user.id, gate["experience"])
+
+    if gate["in_interaction"]:
         # The user is running a command
         await interaction.send_text(
             "You are locked from running any commands until all active commands are completed. Complete all ongoing ones or try again later.",
@@ -94,20 +97,10 @@ async def after_invoke(interaction: BossInteraction):
         if record_macro_view.recording:
             await record_macro_view.send_msg(interaction)
 
-    # Update the user's experience and other attributes
-    old_exp, new_exp = await interaction.client.db.fetchrow(
-        """
-        UPDATE players.players
-        SET experience = experience + $2, commands_run = commands_run + 1
-        WHERE player_id = $1
-        RETURNING 
-            (SELECT experience
-            FROM players.players
-            WHERE player_id = $1) AS old_experience, 
-            experience
-        """,
-        interaction.user.id,
-        random.randint(1, 5),
+    # Update the user's experience and other attributes,
+    # they are written to the database in batches by `bot.player_stats`
+    old_exp, new_exp = await interaction.client.player_stats.add_command_run(
+        interaction.user.id, random.randint(1, 5)
     )
     new_level = new_exp // 100
     old_level = old_exp // 100
@@ -6,7 +6,7 @@ TOKEN = os.getenv("DISCORD_TOKEN")
 SCRAP_METAL = "<:ScrapMetal:1102208993407021086>"
 COPPER = "<:Copper:1102223921778016309>"
 CURRENCY_EMOJIS = {"scrap_metal": SCRAP_METAL, "copper": COPPER}
-COPPER_SCRAP_RATE = 500_000
+COPPER_SCRAP_RATE = 500_000  # also used by `players.players.net_worth`, see migrations/0001_net_worth.sql
 
 DEVS_SERVER_ID = 919223073054539858
 LOG_CHANNEL_ID = 988046548309016586
@@ -15,6 +15,7 @@ from nextcord.ui import Button, View
 # constants
 from utils import constants
 from utils.constants import SCRAP_METAL, EmbedColour
+from utils.item_catalog import item_catalog
 from utils.postgres_db import Database
 
 
@@ -393,30 +394,20 @@ class BossItem:
         self._name = name
         self._emoji = emoji
 
+    async def _load(self, db: Database):
+        item = await item_catalog.get(db, self.item_id)
+        self._name, self._emoji = item.name, item.emoji
+
     async def get_name(self, db: Database):
-        """Retrieves the name of the item from the database, if not already cached."""
+        """Retrieves the name of the item from the item catalog, if not already cached."""
         if self._name is None:
-            self._name, self._emoji = await db.fetchrow(
-                """
-                SELECT name, CONCAT('<:_:', emoji_id, '>') AS emoji
-                FROM utility.items
-                WHERE item_id = $1
-                """,
-                self.item_id,
-            )
+            await self._load(db)
         return self._name
 
     async def get_emoji(self, db: Database):
-        """Retrieves the emoji representation of the item from the database, if not already cached."""
+        """Retrieves the emoji representation of the item from the item catalog, if not already cached."""
         if self._emoji is None:
-            self._name, self._emoji = await db.fetchrow(
-                """
-                SELECT name, CONCAT('<:_:', emoji_id, '>') AS emoji
-                FROM utility.items
-                WHERE item_id = $1
-                """,
-                self.item_id,
-            )
+            await self._load(db)
         return self._emoji
 
     def __eq__(self, other):
@@ -0,0 +1,63 @@
+"""Module providing a short-lived cache of the ids of the items in each player's inventories."""
+# default modules
+import time
+
+# database
+from utils.postgres_db import Database
+
+
+class InventoryCache:
+    """
+    Caches the ids of the items each player owns, in each inventory type, for `TTL` seconds.
+    Used by autocompletes, so that they can be answered without querying the database.
+    """
+
+    TTL = 30
+    MAX_PLAYERS = 5000
+
+    def __init__(self):
+        # maps player ids to (the time they were cached, {inv_type: {item_ids}})
+        self.inventories: dict[int, tuple[float, dict[int, set[int]]]] = {}
+
+    async def get(self, db: Database, player_id: int) -> dict[int, set[int]]:
+        """Get the ids of the items a player owns, grouped by the inventory type."""
+        cached = self.inventories.get(player_id)
+        if cached is not None and time.monotonic() - cached[0] < self.TTL:
+            return cached[1]
+
+        rows = await db.fetch(
+            """
+            SELECT inv_type, array_agg(item_id) AS item_ids
+            FROM players.inventory
+            WHERE player_id = $1 AND quantity > 0
+            GROUP BY inv_type
+            """,
+            player_id,
+            read_only=True,
+            player_id=player_id,
+        )
+        inventories = {row["inv_type"]: set(row["item_ids"]) for row in rows}
+
+        if len(self.inventories) >= self.MAX_PLAYERS:
+            # remove the entry which was cached first
+            del self.inventories[next(iter(self.inventories))]
+        self.inventories.pop(player_id, None)
+        self.inventories[player_id] = (time.monotonic(), inventories)
+        return inventories
+
+    async def get_item_ids(self, db: Database, player_id: int, inv_type: int = None) -> set[int]:
+        """Get the ids of the items a player owns in an inventory type, or in any inventory if it is not provided."""
+        inventories = await self.get(db, player_id)
+        if inv_type is not None:
+            return inventories.get(inv_type, set())
+        return set().union(*inventories.values())
+
+    def invalidate(self, player_id: int):
+        """
+        Remove the cached inventories of a player.
+        Writes to the inventory should use `Player.invalidate_inventory()`, which waits for the transaction to commit.
+        """
+        self.inventories.pop(player_id, None)
+
+
+inventory_cache = InventoryCache()
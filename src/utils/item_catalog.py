@@ -0,0 +1,200 @@
+"""Module providing an in-memory copy of the items in `utility.items`."""
+# default modules
+import asyncio
+import json
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+# database
+from utils.postgres_db import Database
+
+
+@dataclass
+class CatalogItem:
+    """An item in `utility.items`."""
+
+    item_id: int
+    name: str
+    description: str
+    emoji_id: Optional[int]
+    buy_price: int
+    sell_price: int
+    trade_price: int
+    rarity: int
+    type: int
+    other_attributes: dict
+
+    @property
+    def emoji(self) -> str:
+        """The emoji of the item, in the same format as `CONCAT('<:_:', emoji_id, '>')`."""
+        return f"<:_:{self.emoji_id if self.emoji_id is not None else ''}>"
+
+
+def get_trigrams(text: str) -> set[str]:
+    """
+    Get the trigrams of a text, in the same way as postgres' `pg_trgm`:
+    each word is lowercased and padded with 2 spaces in front and 1 space behind.
+    """
+    trigrams = set()
+    for word in re.findall(r"[^\W_]+", text.lower()):
+        word = f"  {word} "
+        trigrams.update(word[i : i + 3] for i in range(len(word) - 2))
+    return trigrams
+
+
+class ItemSearchIndex:
+    """
+    A trigram and prefix index over item names, used to answer autocompletes without querying the database.
+    Results are ranked like `utility.SearchItem`: exact matches, then prefixes, then substrings,
+    then by trigram similarity.
+    """
+
+    # the minimum similarity of fuzzy matches, same as the default `pg_trgm.similarity_threshold`
+    SIMILARITY_THRESHOLD = 0.3
+
+    def __init__(self, items: Iterable[CatalogItem]):
+        self.items = sorted(items, key=lambda item: item.name.lower())
+        self.names = {item.item_id: item.name.lower() for item in self.items}
+        self.trigrams = {item.item_id: get_trigrams(item.name) for item in self.items}
+        # maps trigrams to the ids of items with names containing them
+        self.postings: dict[str, set[int]] = {}
+        for item_id, trigrams in self.trigrams.items():
+            for trigram in trigrams:
+                self.postings.setdefault(trigram, set()).add(item_id)
+
+    def search(
+        self,
+        query: str,
+        *,
+        item_ids: Optional[set[int]] = None,
+        check: Optional[Callable[[CatalogItem], bool]] = None,
+        limit: int = 25,
+    ) -> list[CatalogItem]:
+        """
+        Search for items whose names match the query.
+
+        Args:
+            query (str): The search query
+            item_ids (set[int], optional): Only include items with these ids
+            check (Callable[[CatalogItem], bool], optional): Only include items which pass the check
+            limit (int): The maximum number of results
+        """
+        query = query.strip().lower()
+        items = self.items
+        if item_ids is not None:
+            items = [item for item in items if item.item_id in item_ids]
+        if check is not None:
+            items = [item for item in items if check(item)]
+        if not query:
+            return items[:limit]
+
+        # count the number of trigrams shared by the query and each item
+        query_trigrams = get_trigrams(query)
+        shared = Counter()
+        for trigram in query_trigrams:
+            shared.update(self.postings.get(trigram, ()))
+
+        results = []
+        for item in items:
+            name = self.names[item.item_id]
+            count = shared[item.item_id]
+            similarity = count / (len(query_trigrams) + len(self.trigrams[item.item_id]) - count) if count else 0
+            if query not in name and similarity < self.SIMILARITY_THRESHOLD:
+                continue
+            rank = (name == query, name.startswith(query), query in name, similarity)
+            results.append((rank, item))
+
+        results.sort(key=lambda result: result[0], reverse=True)
+        return [item for _, item in results[:limit]]
+
+
+class ItemCatalog:
+    """
+    A process-wide cache of all items, loaded when the bot starts.
+    It must be invalidated whenever items are added, edited or deleted.
+    """
+
+    # reload the catalog at most once every this number of seconds when an unknown item is requested
+    MISS_RELOAD_INTERVAL = 30
+
+    def __init__(self):
+        self.items: dict[int, CatalogItem] = {}
+        self.items_by_name: dict[str, CatalogItem] = {}
+        self.search_index = ItemSearchIndex([])
+        self.loaded = False
+        self.loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def load(self, db: Database):
+        """Load all items from the database."""
+        async with self._lock:
+            rows = await db.fetch(
+                """
+                SELECT item_id, name, description, emoji_id, buy_price, sell_price, trade_price, rarity, type, other_attributes
+                FROM utility.items
+                """,
+                read_only=True,
+            )
+            items = {}
+            for row in rows:
+                other_attributes = row["other_attributes"]
+                if isinstance(other_attributes, str):
+                    other_attributes = json.loads(other_attributes)
+                items[row["item_id"]] = CatalogItem(
+                    item_id=row["item_id"],
+                    name=row["name"],
+                    description=row["description"],
+                    emoji_id=row["emoji_id"],
+                    buy_price=row["buy_price"],
+                    sell_price=row["sell_price"],
+                    trade_price=row["trade_price"],
+                    rarity=row["rarity"],
+                    type=row["type"],
+                    other_attributes=other_attributes or {},
+                )
+            self.items = items
+            self.items_by_name = {item.name.lower(): item for item in items.values()}
+            self.search_index = ItemSearchIndex(items.values())
+            self.loaded = True
+            self.loaded_at = time.monotonic()
+
+    def invalidate(self):
+        """Mark the catalog as outdated, so that it is reloaded the next time it is used."""
+        self.loaded = False
+
+    async def _ensure_loaded(self, db: Database):
+        if not self.loaded:
+            # read the changes which invalidated the catalog
+            with db.primary():
+                await self.load(db)
+
+    async def get(self, db: Database, item_id: int) -> Optional[CatalogItem]:
+        """Get an item by its id. Returns `None` if the item does not exist."""
+        await self._ensure_loaded(db)
+        item = self.items.get(item_id)
+        if item is None and time.monotonic() - self.loaded_at > self.MISS_RELOAD_INTERVAL:
+            # the item may have been added by another process
+            await self.load(db)
+            item = self.items.get(item_id)
+        return item
+
+    async def get_by_name(self, db: Database, name: str) -> Optional[CatalogItem]:
+        """Get an item by its name, case-insensitively. Returns `None` if the item does not exist."""
+        await self._ensure_loaded(db)
+        return self.items_by_name.get(name.lower())
+
+    async def search(self, db: Database, query: str, **kwargs) -> list[CatalogItem]:
+        """Search for items by their names. See `ItemSearchIndex.search()` for the keyword arguments."""
+        await self._ensure_loaded(db)
+        return self.search_index.search(query, **kwargs)
+
+    async def get_all(self, db: Database) -> list[CatalogItem]:
+        """Get all items."""
+        await self._ensure_loaded(db)
+        return list(self.items.values())
+
+
+item_catalog = ItemCatalog()
@@ -0,0 +1,135 @@
+"""Module providing a shared scheduler of message edits, which coalesces edits of the same message."""
+# default modules
+import asyncio
+from typing import Optional
+
+# nextcord
+import nextcord
+
+
+class MessageEditor:
+    """
+    Edits messages with latest-state-wins semantics.
+
+    Every message has at most one edit in flight. Edits requested meanwhile are merged into one pending edit
+    (later keyword arguments override earlier ones), so a busy game sends its latest frame instead of a backlog.
+
+    Edits in the same channel are spaced by an interval, which grows when discord rate limits the channel
+    and shrinks back to `MIN_INTERVAL` when edits go through quickly.
+    """
+
+    MIN_INTERVAL = 0.25
+    MAX_INTERVAL = 5
+    # an edit taking longer than this has most likely been held back by nextcord for the rate limit
+    SLOW_EDIT = 1
+    MAX_CHANNELS = 1000
+
+    def __init__(self):
+        # maps message keys to (the message, the keyword arguments of the pending edit, the callers waiting for it)
+        self.pending: dict[int, tuple[nextcord.Message, dict, list[asyncio.Future]]] = {}
+        self.workers: dict[int, asyncio.Task] = {}
+        # maps channel ids to [seconds between edits, the loop time at which the next edit is allowed]
+        self.channel_limits: dict[int, list[float]] = {}
+
+    @staticmethod
+    def _get_key(message) -> int:
+        # partial interaction messages do not have ids, but the same object is used for every edit of them
+        return getattr(message, "id", None) or id(message)
+
+    @staticmethod
+    def _get_channel_id(message) -> int:
+        channel = getattr(message, "channel", None)
+        return getattr(channel, "id", None) or id(message)
+
+    def _queue(self, key: int, message, kwargs: dict, waiters: list[asyncio.Future]):
+        if key in self.pending:
+            _, pending_kwargs, pending_waiters = self.pending[key]
+            # the pending edit is newer, so its arguments win
+            kwargs = {**kwargs, **pending_kwargs}
+            waiters = waiters + pending_waiters
+        self.pending[key] = (message, kwargs, waiters)
+
+    async def edit(self, message, **kwargs) -> Optional[nextcord.Message]:
+        """
+        Edit a message, merging the edit with any edit of the message which has not been sent yet.
+        Returns the edited message once an edit including these arguments has been sent.
+        """
+        key = self._get_key(message)
+        future = asyncio.get_running_loop().create_future()
+        if key in self.pending:
+            _, pending_kwargs, waiters = self.pending[key]
+            pending_kwargs.update(kwargs)
+            waiters.append(future)
+        else:
+            self.pending[key] = (message, dict(kwargs), [future])
+
+        if key not in self.workers:
+            self.workers[key] = asyncio.create_task(self._run(key))
+        return await future
+
+    async def _run(self, key: int):
+        loop = asyncio.get_running_loop()
+        try:
+            while key in self.pending:
+                message = self.pending[key][0]
+                limit = self._get_channel_limit(self._get_channel_id(message))
+                if (delay := limit[1] - loop.time()) > 0:
+                    await asyncio.sleep(delay)
+
+                # take the latest state, which might have changed while waiting
+                message, kwargs, waiters = self.pending.pop(key)
+                limit[1] = loop.time() + limit[0]
+                started_at = loop.time()
+                try:
+                    result = await message.edit(**kwargs)
+                except nextcord.HTTPException as e:
+                    if e.status == 429:
+                        # try again later, merged with anything requested meanwhile
+                        self._slow_down(limit)
+                        self._queue(key, message, kwargs, waiters)
+                        continue
+                    self._resolve(waiters, exception=e)
+                    continue
+                except BaseException as e:
+                    # e.g. a connection error, or the worker being cancelled during the edit,
+                    # the waiters have been taken from `self.pending`, so they must be resolved here
+                    self._resolve(waiters, exception=e)
+                    if not isinstance(e, Exception):
+                        raise
+                    continue
+
+                if loop.time() - started_at > self.SLOW_EDIT:
+                    self._slow_down(limit)
+                else:
+                    limit[0] = max(self.MIN_INTERVAL, limit[0] * 0.8)
+                self._resolve(waiters, result=result)
+        finally:
+            # there is no `await` between the last check of `self.pending` and this, so no edit can be left behind
+            del self.workers[key]
+            if key in self.pending:  # cancelled
+                self._resolve(self.pending.pop(key)[2], exception=asyncio.CancelledError())
+
+    def _get_channel_limit(self, channel_id: int) -> list[float]:
+        if channel_id not in self.channel_limits and len(self.channel_limits) >= self.MAX_CHANNELS:
+            # forget the channels which are not rate limited
+            self.channel_limits = {k: v for k, v in self.channel_limits.items() if v[0] > self.MIN_INTERVAL}
+        return self.channel_limits.setdefault(channel_id, [self.MIN_INTERVAL, 0])
+
+    def _slow_down(self, limit: list[float]):
+        limit[0] = min(self.MAX_INTERVAL, limit[0] * 2)
+        limit[1] = asyncio.get_running_loop().time() + limit[0]
+
+    @staticmethod
+    def _resolve(waiters: list[asyncio.Future], *, result=None, exception: BaseException = None):
+        for waiter in waiters:
+            if waiter.done():  # the caller was cancelled
+                continue
+            if isinstance(exception, asyncio.CancelledError):
+                waiter.cancel()
+            elif exception is not None:
+                waiter.set_exception(exception)
+            else:
+                waiter.set_result(result)
+
+
+message_editor = MessageEditor()
@@ -1,8 +1,11 @@
 """Module providing an interface for commonly-used player actions with the database."""
 # default modules
 import json
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from datetime import datetime
-from typing import Literal
+from typing import Callable, Literal
 
 # database
 import asyncpg
@@ -15,19 +18,91 @@ from nextcord import Embed, Interaction
 from utils import constants
 from utils.constants import SCRAP_METAL, EmbedColour
 from utils.helpers import BossItem
-from utils.postgres_db import Database
+from utils.inventory_cache import inventory_cache
+from utils.postgres_db import Database, recent_writes
+
+
+class UnitOfWork:
+    """The connection of a transaction of a player, and the functions to call after it commits."""
+
+    def __init__(self, conn: asyncpg.Connection):
+        self.conn = conn
+        self.after_commit: list[Callable[[], None]] = []
+
+
+# maps players to their units of work in the current task, see `Player.transaction()`
+# stored in a context variable instead of on the player, so that other tasks using the same player do not join it
+_units_of_work: ContextVar[dict["Player", UnitOfWork]] = ContextVar("units_of_work", default={})
 
 
 class Player:
     """Represents a BOSS player."""
 
+    # the summaries of players are cached for this number of seconds, see `Player.get_summary()`
+    SUMMARY_TTL = 5
+    # maps player ids to (the time they were cached, their summary)
+    _summaries: dict[int, tuple[float, asyncpg.Record]] = {}
+
     def __init__(self, db: Database, user: nextcord.User):
         self.db = db
         self.user = user  # the underlying `nextcord.User` object
 
+    @property
+    def unit_of_work(self) -> UnitOfWork | None:
+        """The player's current unit of work in this task, see `Player.transaction()`."""
+        return _units_of_work.get().get(self)
+
+    @property
+    def conn(self) -> asyncpg.Connection | None:
+        """The connection of the current unit of work, or `None` if the player is not in one."""
+        unit_of_work = self.unit_of_work
+        return unit_of_work.conn if unit_of_work is not None else None
+
+    @property
+    def executor(self) -> Database | asyncpg.Connection:
+        """The connection of the current unit of work if there is one, otherwise the database."""
+        conn = self.conn
+        return conn if conn is not None else self.db
+
+    @asynccontextmanager
+    async def transaction(self):
+        """
+        Run the player's methods in a single transaction, on one connection.
+        Yields the connection, so that other queries can be run in the same transaction.
+
+        If an exception is raised in the context manager, all changes are rolled back.
+        Note that `ValueError`s raised by the methods must propagate out of the context manager,
+        since the failed statement aborts the transaction.
+        Only the task which opened the transaction runs the player's methods in it.
+        """
+        if (unit_of_work := self.unit_of_work) is not None:
+            # already in a unit of work, nest it in a savepoint
+            async with unit_of_work.conn.transaction():
+                yield unit_of_work.conn
+            return
+
+        async with self.db.acquire() as conn:
+            async with conn.transaction():
+                unit_of_work = UnitOfWork(conn)
+                token = _units_of_work.set({**_units_of_work.get(), self: unit_of_work})
+                try:
+                    yield conn
+                finally:
+                    _units_of_work.reset(token)
+        # only reached if the transaction has been committed
+        for callback in unit_of_work.after_commit:
+            callback()
+
+    def after_commit(self, callback: Callable[[], None]):
+        """Call a function after the current unit of work commits, or immediately if the player is not in one."""
+        if (unit_of_work := self.unit_of_work) is None:
+            callback()
+        else:
+            unit_of_work.after_commit.append(callback)
+
     async def is_present(self):
         """Check if the player exists in BOSS's database."""
-        res = await self.db.fetchval(
+        res = await self.executor.fetchval(
             """
             SELECT *
             FROM players.players
@@ -39,7 +114,7 @@ class Player:
 
     async def create_profile(self):
         """Create a profile for the player."""
-        return await self.db.fetchval(
+        return await self.executor.fetchval(
             """
             INSERT INTO players.players (player_id)
             VALUES ($1)
@@ -49,13 +124,117 @@ class Player:
             self.user.id,
         )
 
+    async def get_command_gate(self):
+        """
+        Check whether the player can run a command, in a single round trip.
+
+        Creates the player's profile if they are new.
+        Returns a record of `present` (whether the player existed before), `created`, `in_interaction` and `experience`.
+        """
+        return await self.executor.fetchrow(
+            """
+            WITH existing AS (
+                SELECT in_interaction, experience
+                FROM players.players
+                WHERE player_id = $1
+            ), created AS (
+                INSERT INTO players.players (player_id)
+                SELECT $1
+                WHERE NOT EXISTS (SELECT 1 FROM existing)
+                ON CONFLICT DO NOTHING
+                RETURNING player_id
+            )
+            SELECT
+                EXISTS (SELECT 1 FROM existing) AS present,
+                EXISTS (SELECT 1 FROM created) AS created,
+                COALESCE((SELECT in_interaction FROM existing), FALSE) AS in_interaction,
+                COALESCE((SELECT experience FROM existing), 0) AS experience
+            """,
+            self.user.id,
+        )
+
+    async def get_summary(self, *, use_cache: bool = True) -> asyncpg.Record | None:
+        """
+        Fetch everything `/profile` and `/balance` show about the player in one round trip.
+        Returns `None` if the player does not exist.
+
+        The record contains the player's currencies, `item_worth`, `net_worth`, `experience`, `health`, `hunger`,
+        `commands_run`, `unique_items`, `total_items` and `rank`, the fraction of players with a lower net worth
+        (accurate to 0.1%, as of the last refresh of `players.net_worth_percentiles`).
+        Summaries are cached for `SUMMARY_TTL` seconds, and invalidated by the methods which modify the player.
+        Code which modifies players without their methods must call `Player.invalidate_summaries()`.
+        """
+        cached = self._summaries.get(self.user.id)
+        if use_cache and cached is not None and time.monotonic() - cached[0] < self.SUMMARY_TTL:
+            return cached[1]
+
+        summary = await self.db.fetchrow(
+            """
+            SELECT
+                p.scrap_metal, p.copper, p.safe_scrap, p.item_worth, p.net_worth,
+                p.experience, p.health, p.hunger, p.commands_run,
+                inv.unique_items, inv.total_items,
+                below.rank
+            FROM players.players AS p
+            CROSS JOIN LATERAL (
+                SELECT COUNT(DISTINCT item_id) AS unique_items, COALESCE(SUM(quantity), 0) AS total_items
+                FROM players.inventory
+                WHERE player_id = p.player_id
+            ) AS inv
+            -- look up the rank in the periodically refreshed distribution of net worths (1001 percentiles),
+            -- instead of counting every player with a lower net worth, see migrations/0002_net_worth_percentiles.sql
+            CROSS JOIN LATERAL (
+                SELECT (GREATEST(COUNT(*) - 1, 0) / 1000.0)::float AS rank
+                FROM players.net_worth_percentiles AS percentiles, unnest(percentiles.bounds) AS bound
+                WHERE bound < p.net_worth
+            ) AS below
+            WHERE p.player_id = $1
+            """,
+            self.user.id,
+            read_only=True,
+            player_id=self.user.id,
+        )
+        if summary is not None:
+            if len(self._summaries) >= 1000:
+                # remove the summary which was cached first
+                del self._summaries[next(iter(self._summaries))]
+            self._summaries.pop(self.user.id, None)
+            self._summaries[self.user.id] = (time.monotonic(), summary)
+        return summary
+
+    def invalidate_summary(self):
+        """
+        Remove the cached summary of the player, called after the player is modified.
+        In a unit of work, it is removed once the unit of work commits, so that a concurrent read
+        cannot cache the old summary again.
+        """
+        self.after_commit(lambda: self.invalidate_summaries(self.user.id))
+
+    def invalidate_inventory(self):
+        """
+        Remove the cached inventories and summary of the player, called after their inventory is modified.
+        Like `Player.invalidate_summary()`, it waits for the current unit of work to commit.
+        """
+        self.after_commit(lambda: inventory_cache.invalidate(self.user.id))
+        self.invalidate_summary()
+
+    @classmethod
+    def invalidate_summaries(cls, *player_ids: int):
+        """
+        Remove the cached summaries of players, called after they are modified without `Player`'s methods.
+        The players' data is read from the primary for a while, see `RecentWrites`.
+        """
+        recent_writes.mark(*player_ids)
+        for player_id in player_ids:
+            cls._summaries.pop(player_id, None)
+
     async def modify_currency(self, currency: Literal["scrap_metal", "copper"], value: int):
         """Modify the player's currency, scrap_metal or copper."""
         if currency not in ("scrap_metal", "copper"):
             raise ValueError("Currency must be either `scrap_metal` or `copper`.")
 
         try:
-            return await self.db.fetchval(
+            new_value = await self.executor.fetchval(
                 f"""
                 UPDATE players.players
                 SET {currency} = {currency} + $1
@@ -67,6 +246,8 @@ class Player:
             )
         except asyncpg.exceptions.CheckViolationError as exc:
             raise ValueError from exc
+        self.invalidate_summary()
+        return new_value
 
     async def modify_scrap(self, value: int):
         """The shorthand function for `Player.modify_currency("scrap_metal", value)`."""
@@ -82,7 +263,7 @@ class Player:
             raise ValueError("Currency must be either `scrap_metal` or `copper`.")
 
         try:
-            return await self.db.fetchval(
+            new_value = await self.executor.fetchval(
                 f"""
                 UPDATE players.players
                 SET {currency} = $1
@@ -94,6 +275,8 @@ class Player:
             )
         except asyncpg.exceptions.CheckViolationError as exc:
             raise ValueError from exc
+        self.invalidate_summary()
+        return new_value
 
     async def set_scrap(self, value: int):
         """The shorthand function for `Player.set_currency("scrap_metal", value)`."""
@@ -105,7 +288,7 @@ class Player:
 
     async def modify_hunger(self, value: int):
         """Modify the player's hunger"""
-        return await self.db.fetchval(
+        new_hunger = await self.executor.fetchval(
             """
             UPDATE players.players
                 SET hunger = hunger + $1
@@ -115,10 +298,12 @@ class Player:
             value,
             self.user.id,
         )
+        self.invalidate_summary()
+        return new_hunger
 
     async def modify_health(self, value: int):
         """Modify the player's health"""
-        new_health = await self.db.fetchval(
+        new_health = await self.executor.fetchval(
             """
             UPDATE players.players
                 SET health = health + $1
@@ -128,25 +313,37 @@ class Player:
             value,
             self.user.id,
         )
+        self.invalidate_summary()
         if new_health <= 0:
             embed = Embed(title="You died!", colour=EmbedColour.FAIL)
-            # Choose a random item from the user's backpack
-            lost_item = await self.db.fetchrow(
-                """
-                SELECT i.item_id, i.name, CONCAT('<:_:', i.emoji_id, '>') AS emoji, inv.quantity
-                FROM utility.items AS i
-                    INNER JOIN players.inventory AS inv
-                    ON i.item_id = inv.item_id
-                WHERE inv.inv_type = 0 AND inv.player_id = $1
-                ORDER BY RANDOM()
-                LIMIT 1
-                """,
-                self.user.id,
-            )
-            # Remove all of that item from the user's backpack
-            await self.add_item(lost_item["item_id"], -lost_item["quantity"])
-            # Remove all scrap_metal of the user
-            lost_money = await self.set_scrap(0)
+            async with self.transaction():
+                # Choose a random item from the user's backpack
+                lost_item = await self.executor.fetchrow(
+                    """
+                    SELECT i.item_id, i.name, CONCAT('<:_:', i.emoji_id, '>') AS emoji, inv.quantity
+                    FROM utility.items AS i
+                        INNER JOIN players.inventory AS inv
+                        ON i.item_id = inv.item_id
+                    WHERE inv.inv_type = 0 AND inv.player_id = $1
+                    ORDER BY RANDOM()
+                    LIMIT 1
+                    """,
+                    self.user.id,
+                )
+                # Remove all of that item from the user's backpack
+                await self.add_item(lost_item["item_id"], -lost_item["quantity"])
+                # Remove all scrap_metal of the user
+                lost_money = await self.set_scrap(0)
+                # Reset the health of the user to 100
+                await self.executor.fetchval(
+                    """
+                    UPDATE players.players
+                    SET health = 100
+                    WHERE player_id = $1
+                    RETURNING health
+                    """,
+                    self.user.id,
+                )
             embed.description = (
                 f"You lost {SCRAP_METAL} **{lost_money:,}**, and you also lost"
                 f" {lost_item['quantity']} {lost_item['emoji']} **{lost_item['name']}**"
@@ -154,21 +351,11 @@ class Player:
 
             embed.timestamp = datetime.now()
             await self.user.send(embed=embed)
-            # Reset the health of the user to 100
-            await self.db.fetchval(
-                """
-                UPDATE players.players
-                SET health = 100
-                WHERE player_id = $1
-                RETURNING health
-                """,
-                self.user.id,
-            )
         return new_health
 
     async def set_in_inter(self, value: bool):
         """Modify whether the player is running a command"""
-        return await self.db.fetchval(
+        return await self.executor.fetchval(
             """
             UPDATE players.players
                 SET in_interaction = $1
@@ -181,7 +368,7 @@ class Player:
 
     async def check_in_inter(self):
         """Check whether the player is running a command"""
-        return await self.db.fetchval(
+        return await self.executor.fetchval(
             """
             SELECT in_interaction
             FROM players.players
@@ -196,7 +383,7 @@ class Player:
 
         Returns a `tuple` containing the crops, farm_width, and farm_height.
         """
-        return await self.db.fetchrow(
+        return await self.executor.fetchrow(
             """
             SELECT farm, width, height
             FROM players.farm
@@ -207,23 +394,27 @@ class Player:
 
     async def add_item(self, item_id: int, quantity: int = 1, inv_type: int = 0):
         """Add an item into the player's inventory."""
-        async with self.db.pool.acquire() as conn:
-            async with conn.transaction():
-                quantity = await conn.fetchval(
-                    """
-                    INSERT INTO players.inventory (player_id, inv_type, item_id, quantity)
-                    VALUES ($1, $2, $3, $4)
-                    ON CONFLICT(player_id, inv_type, item_id) DO UPDATE
-                        SET quantity = inventory.quantity + $4
-                    RETURNING quantity
-                    """,
-                    self.user.id,
-                    inv_type,
-                    item_id,
-                    quantity,
-                )
-                if quantity < 0:
-                    raise ValueError()
+        if self.conn is None:
+            # run it in a transaction, so that the change is rolled back if the quantity becomes negative
+            async with self.transaction():
+                return await self.add_item(item_id, quantity, inv_type)
+
+        quantity = await self.conn.fetchval(
+            """
+            INSERT INTO players.inventory (player_id, inv_type, item_id, quantity)
+            VALUES ($1, $2, $3, $4)
+            ON CONFLICT(player_id, inv_type, item_id) DO UPDATE
+                SET quantity = inventory.quantity + $4
+            RETURNING quantity
+            """,
+            self.user.id,
+            inv_type,
+            item_id,
+            quantity,
+        )
+        self.invalidate_inventory()
+        if quantity < 0:
+            raise ValueError()
         return quantity
 
     async def update_missions(self, interaction: Interaction, mission_id: int, amount: int = 1):
@@ -232,7 +423,7 @@ class Player:
         and an optional amount to update.
         """
         # if the user has a mission of the type of the command, update its progress
-        mission = await self.db.fetchrow(
+        mission = await self.executor.fetchrow(
             """
                 UPDATE players.missions
                 SET finished_amount = finished_amount + $3
@@ -245,6 +436,7 @@ class Player:
         )
         if mission is None:  # the mission does not exist
             return
+        self.after_commit(lambda: recent_writes.mark(self.user.id))
 
         # check whether the mission has been finished (finished > total)
         # and check that it has not been finished before
@@ -273,7 +465,7 @@ class Player:
             await interaction.send(embed=embed, ephemeral=True)
 
     async def calc_combat(self):
-        return await self.db.fetchrow(
+        return await self.executor.fetchrow(
             "SELECT armour_protection, weapon_damage, combat FROM players.combat WHERE player_id = $1",
             self.user.id,
         )
@@ -0,0 +1,222 @@
+"""
+Module providing a write-behind buffer for the per-command player stats,
+so that running a command does not cost an extra `UPDATE` on `players.players`.
+"""
+# default modules
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+
+# nextcord
+from nextcord.ext import tasks
+
+# database
+import asyncpg
+from utils.player import Player
+from utils.postgres_db import Database
+
+
+@dataclass
+class PendingStats:
+    """Changes to a player's stats which have not been written to the database yet."""
+
+    experience: int = 0
+    commands_run: int = 0
+    hunger: int = 0
+
+
+class PlayerStatsBuffer:
+    """
+    Accumulates the experience, commands_run and hunger changes made after every command,
+    and writes them to the database in batches every `FLUSH_INTERVAL` seconds.
+
+    The experience of every player seen recently is kept in memory (including unflushed changes),
+    so level ups can be detected without reading from the database.
+    """
+
+    FLUSH_INTERVAL = 10
+    # the changes of a player are dropped after failing to be written this many times
+    MAX_ATTEMPTS = 3
+    # errors which mean that the database is unavailable, the changes are kept until it is available again
+    CONNECTION_ERRORS = (OSError, asyncio.TimeoutError, asyncpg.PostgresConnectionError, asyncpg.InterfaceError)
+    # drop the cached experience of players who have not run commands for this many seconds
+    IDLE_TIMEOUT = 60 * 60
+
+    def __init__(self, db: Database):
+        self.db = db
+        self.pending: dict[int, PendingStats] = {}
+        # maps player ids to their experience, including the pending changes
+        self.experience: dict[int, int] = {}
+        self.last_used: dict[int, float] = {}
+        # maps player ids to the number of times their changes have failed to be written
+        self.failures: dict[int, int] = {}
+
+    def _get_pending(self, player_id: int) -> PendingStats:
+        self.last_used[player_id] = time.monotonic()
+        return self.pending.setdefault(player_id, PendingStats())
+
+    def prime_experience(self, player_id: int, experience: int):
+        """Remember the experience of a player read from the database, if it is not known yet."""
+        if player_id not in self.experience:
+            self.experience[player_id] = experience + self.pending.get(player_id, PendingStats()).experience
+            self.last_used[player_id] = time.monotonic()
+
+    async def add_command_run(self, player_id: int, experience: int) -> tuple[int, int]:
+        """
+        Record that a player has run a command and gained `experience`.
+
+        Returns a `tuple` of the old and new experience of the player.
+        """
+        if player_id not in self.experience:
+            db_experience = await self.db.fetchval(
+                """
+                SELECT experience
+                FROM players.players
+                WHERE player_id = $1
+                """,
+                player_id,
+            )
+            self.prime_experience(player_id, db_experience or 0)
+
+        pending = self._get_pending(player_id)
+        pending.experience += experience
+        pending.commands_run += 1
+
+        old_experience = self.experience[player_id]
+        self.experience[player_id] = old_experience + experience
+        return old_experience, old_experience + experience
+
+    def modify_hunger(self, player_id: int, value: int):
+        """Record a change in the hunger of a player."""
+        self._get_pending(player_id).hunger += value
+
+    def get_pending_hunger(self, player_id: int) -> int:
+        """Get the change in hunger of a player which has not been written to the database yet."""
+        if pending := self.pending.get(player_id):
+            return pending.hunger
+        return 0
+
+    def discard(self, player_id: int, stat: str):
+        """
+        Discard the pending changes of a stat of a player.
+        This should be called whenever the stat is set directly in the database.
+        """
+        if pending := self.pending.get(player_id):
+            setattr(pending, stat, 0)
+        if stat == "experience":
+            self.experience.pop(player_id, None)
+
+    async def flush_hunger(self, player_id: int):
+        """
+        Write the pending change in hunger of a player to the database.
+        This should be called before the hunger of the player is read from or changed directly in the database,
+        so that the pending change is included and applied in order.
+        """
+        pending = self.pending.get(player_id)
+        if not pending or not pending.hunger:
+            return
+
+        hunger, pending.hunger = pending.hunger, 0
+        try:
+            await self.db.execute(
+                "UPDATE players.players SET hunger = hunger + $1 WHERE player_id = $2",
+                hunger,
+                player_id,
+            )
+        except BaseException:
+            self._get_pending(player_id).hunger += hunger
+            raise
+        Player.invalidate_summaries(player_id)
+
+    def _requeue(self, batch: dict[int, PendingStats]):
+        """Put changes back, so that they are written in the next flush."""
+        for player_id, stats in batch.items():
+            pending = self._get_pending(player_id)
+            pending.experience += stats.experience
+            pending.commands_run += stats.commands_run
+            pending.hunger += stats.hunger
+
+    async def _write(self, batch: dict[int, PendingStats]) -> list:
+        return await self.db.fetch(
+            """
+            UPDATE players.players AS p
+            SET experience = p.experience + d.experience,
+                commands_run = p.commands_run + d.commands_run,
+                hunger = p.hunger + d.hunger
+            FROM unnest($1::bigint[], $2::int[], $3::int[], $4::int[]) AS d(player_id, experience, commands_run, hunger)
+            WHERE p.player_id = d.player_id
+            RETURNING p.player_id, p.experience
+            """,
+            list(batch.keys()),
+            [i.experience for i in batch.values()],
+            [i.commands_run for i in batch.values()],
+            [i.hunger for i in batch.values()],
+        )
+
+    async def _write_one_by_one(self, batch: dict[int, PendingStats]) -> list:
+        """
+        Write the changes of every player separately, after the batch failed because of the changes of some players.
+        The changes of a player which fail `MAX_ATTEMPTS` times are dropped, so they cannot fail every flush.
+        """
+        rows = []
+        remaining = dict(batch)
+        for player_id, stats in batch.items():
+            try:
+                rows += await self._write({player_id: stats})
+            except self.CONNECTION_ERRORS + (asyncio.CancelledError,):
+                self._requeue(remaining)
+                raise
+            except Exception:  # pylint: disable=broad-except
+                self.failures[player_id] = self.failures.get(player_id, 0) + 1
+                if self.failures[player_id] >= self.MAX_ATTEMPTS:
+                    logging.exception("Dropped the stats of player %s after %s failed writes: %s", player_id, self.MAX_ATTEMPTS, stats)
+                    del self.failures[player_id]
+                else:
+                    logging.exception("Failed to write the stats of player %s.", player_id)
+                    self._requeue({player_id: stats})
+            else:
+                self.failures.pop(player_id, None)
+            del remaining[player_id]
+        return rows
+
+    async def flush(self):
+        """Write all pending changes to the database."""
+        if not self.pending:
+            return
+
+        batch, self.pending = self.pending, {}
+        try:
+            rows = await self._write(batch)
+        except self.CONNECTION_ERRORS + (asyncio.CancelledError,):
+            # put the changes back so that they are written in the next flush,
+            # also when the flush is cancelled (e.g. by `flush_loop.cancel()` when the bot closes)
+            self._requeue(batch)
+            raise
+        except Exception:  # pylint: disable=broad-except
+            # e.g. a player's stats violate a constraint, which fails the whole statement
+            rows = await self._write_one_by_one(batch)
+        else:
+            for player_id in batch:
+                self.failures.pop(player_id, None)
+        Player.invalidate_summaries(*batch)
+
+        # sync the cached experience with the database, keeping the changes made during the flush
+        for row in rows:
+            if row["player_id"] in self.experience:
+                self.experience[row["player_id"]] = row["experience"] + self.pending.get(
+                    row["player_id"], PendingStats()
+                ).experience
+
+        now = time.monotonic()
+        for player_id, last_used in list(self.last_used.items()):
+            if now - last_used > self.IDLE_TIMEOUT and player_id not in self.pending:
+                del self.last_used[player_id]
+                self.experience.pop(player_id, None)
+
+    @tasks.loop(seconds=FLUSH_INTERVAL)
+    async def flush_loop(self):
+        try:
+            await self.flush()
+        except Exception:
+            logging.exception("Failed to write the player stats to the database.")
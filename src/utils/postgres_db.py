@@ -1,19 +1,200 @@
 import os
 import asyncio
 import logging
+import random
+import re
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
 
 import asyncpg
 from asyncpg import Pool
 
 
 POSTGRES_PW = os.getenv("POSTGRES_PW")
+# the DSN of an optional read replica, which serves the queries marked as read-only
+POSTGRES_REPLICA_DSN = os.getenv("POSTGRES_REPLICA_DSN")
 
 DSN = "postgres://{user}:{password}@{host}:{port}"
 DSN_DB = DSN + "/{name}"
 
+# keyword arguments of `Database()` which are passed to `asyncpg.create_pool()`
+POOL_OPTIONS = {
+    "min_size": 2,
+    "max_size": 10,
+    # close connections which have been idle for 5 minutes, so that neon can scale down
+    "max_inactive_connection_lifetime": 300.0,
+    "statement_cache_size": 100,
+    "command_timeout": 30,
+    "setup": None,  # coroutine function called with the connection every time it is acquired
+    "init": None,  # coroutine function called with the connection every time it is created
+}
+# keyword arguments of `Database()` which configure reconnecting with exponential backoff
+RECONNECT_OPTIONS = {
+    "reconnect_attempts": 6,
+    "reconnect_base_delay": 0.5,
+    "reconnect_max_delay": 30.0,
+}
+
+# the upper bounds (in milliseconds) of the buckets of the query latency histograms
+LATENCY_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, float("inf"))
+# the maximum number of distinct queries with stats, the least recently run ones are dropped
+MAX_QUERY_STATS = 500
+
+# whether read-only queries in the current task must be sent to the primary, see `Database.primary()`
+_use_primary: ContextVar[bool] = ContextVar("use_primary", default=False)
+
 db = None
 
 
+class PoolStats:
+    """Live statistics of the connections acquired from a pool."""
+
+    def __init__(self):
+        self.acquired = 0  # number of connections currently acquired through `Database.acquire()`
+        self.waiters = 0  # number of coroutines waiting for a connection
+        self.acquires = 0
+        self.total_acquire_time = 0.0
+        self.max_acquire_time = 0.0
+
+    def record_acquire(self, duration: float):
+        self.acquires += 1
+        self.total_acquire_time += duration
+        self.max_acquire_time = max(self.max_acquire_time, duration)
+
+
+class RecentWrites:
+    """
+    Remembers which players have been modified in the last `WINDOW` seconds.
+    Read-only queries about them are sent to the primary, since the replica may not have their changes yet
+    (read your writes, also across commands).
+    """
+
+    # a little longer than the replica usually lags behind
+    WINDOW = 5
+    MAX_PLAYERS = 5000
+
+    def __init__(self):
+        # maps player ids to the time they were last modified
+        self.written_at: dict[int, float] = {}
+
+    def mark(self, *player_ids: int):
+        """Record that players have been modified, called after the changes are committed."""
+        now = time.monotonic()
+        for player_id in player_ids:
+            self.written_at.pop(player_id, None)
+            self.written_at[player_id] = now
+        while len(self.written_at) > self.MAX_PLAYERS:
+            # remove the player who was modified first
+            del self.written_at[next(iter(self.written_at))]
+
+    def __contains__(self, player_id: int) -> bool:
+        written_at = self.written_at.get(player_id)
+        return written_at is not None and time.monotonic() - written_at < self.WINDOW
+
+
+recent_writes = RecentWrites()
+
+
+class QueryStats:
+    """The latency histogram, row count and error count of a query."""
+
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+
+    def record(self, duration: float, rows: int = 0, error: bool = False):
+        self.calls += 1
+        self.rows += rows
+        self.errors += error
+        self.total_time += duration
+        self.max_time = max(self.max_time, duration)
+        self.buckets[bisect_left(LATENCY_BUCKETS, duration * 1000)] += 1
+
+    def percentile(self, percent: float) -> float:
+        """Get an upper bound of the percentile of the latency of the query, in milliseconds."""
+        target = self.calls * percent / 100
+        count = 0
+        for bound, bucket_count in zip(LATENCY_BUCKETS, self.buckets):
+            count += bucket_count
+            if count >= target:
+                return min(bound, self.max_time * 1000)
+        return self.max_time * 1000
+
+
+def normalize_sql(sql: str) -> str:
+    """Normalize a query so that the same query written with different whitespace is grouped together."""
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+def count_rows(method: str, result) -> int:
+    """Count the number of rows returned or affected by a query, executed with `method`."""
+    if result is None:
+        return 0
+    if method == "fetch":
+        return len(result)
+    if method == "execute":
+        # the status of the command, such as "UPDATE 3"
+        count = result.rsplit(" ", 1)[-1]
+        return int(count) if count.isdigit() else 0
+    return 1
+
+
+class InstrumentedConnection(asyncpg.Connection):
+    """
+    A connection which records the latency of its queries in `Database.query_stats`.
+    Every query is recorded, including those run in transactions on connections from `Database.acquire()`,
+    and only the time spent running the query is measured, not the time spent waiting for the connection.
+    """
+
+    # the database which records the queries, set when the connection is created
+    database: "Database" = None
+
+    async def _run(self, method: str, query: str, *args, **kwargs):
+        database = self.database
+        if database is None:
+            return await getattr(super(), method)(query, *args, **kwargs)
+
+        start = time.perf_counter()
+        try:
+            result = await getattr(super(), method)(query, *args, **kwargs)
+        except Exception:
+            database._record_query(method, query, time.perf_counter() - start, error=True)
+            raise
+        database._record_query(method, query, time.perf_counter() - start, result)
+        return result
+
+    async def fetch(self, query, *args, **kwargs):
+        return await self._run("fetch", query, *args, **kwargs)
+
+    async def fetchrow(self, query, *args, **kwargs):
+        return await self._run("fetchrow", query, *args, **kwargs)
+
+    async def fetchval(self, query, *args, **kwargs):
+        return await self._run("fetchval", query, *args, **kwargs)
+
+    async def execute(self, query, *args, **kwargs):
+        return await self._run("execute", query, *args, **kwargs)
+
+    async def executemany(self, query, *args, **kwargs):
+        return await self._run("executemany", query, *args, **kwargs)
+
+    async def reset(self, *args, **kwargs):
+        # do not record the query which resets the connection when it is released to the pool
+        database, self.database = self.database, None
+        try:
+            await super().reset(*args, **kwargs)
+        finally:
+            self.database = database
+
+
 class Database:
     """A connection pool to access data in BOSS neon.tech database with methods which automatically reconnects."""
 
@@ -25,10 +206,21 @@ class Database:
             "name": "neondb",
             "password": POSTGRES_PW,
         }
+        self.pool_options = {key: kwargs.pop(key, default) for key, default in POOL_OPTIONS.items()}
+        self.reconnect_options = {key: kwargs.pop(key, default) for key, default in RECONNECT_OPTIONS.items()}
+        # queries which take longer than this number of seconds are logged
+        self.slow_query_threshold = kwargs.pop("slow_query_threshold", 0.5)
+        self.replica_dsn = kwargs.pop("replica_dsn", POSTGRES_REPLICA_DSN)
         self.params.update(kwargs)
         self.pool: Pool = None
+        self.replica_pool: Pool = None
         self.listeners = []
         self.reconnecting = False
+        self.stats = PoolStats()
+        self.replica_stats = PoolStats()
+        # maps normalized queries to their stats, in the order they were last run
+        self.query_stats: OrderedDict[str, QueryStats] = OrderedDict()
+        self._connect_lock = asyncio.Lock()
 
     @property
     def connected(self) -> bool:
@@ -39,51 +231,177 @@ class Database:
             return False
         return True
 
+    @property
+    def replica_connected(self) -> bool:
+        return self.replica_pool is not None and self.replica_pool.get_size() > 0
+
     async def connect(self) -> Pool:
         """Connect to the database and return the connection."""
-        if not self.reconnecting and not self.connected:
-            logging.info("\033[0;34mConnecting to the database...\033[0m")
-            self.reconnecting = True
-            try:
-                self.pool = await asyncpg.create_pool(DSN_DB.format(**self.params))
-            except asyncpg.exceptions.InternalServerError:
-                self.reconnecting = False
-                await self.connect()
-            finally:
-                self.reconnecting = False
-            logging.info(
-                f"\033[1;36m{self.params['user']}\033[0m has connected to the \033[0;34mneon.db database!\033[0m"
-            )
+        # if it is already reconnecting, wait for it to finish instead of creating another pool
+        async with self._connect_lock:
+            if not self.connected:
+                logging.info("\033[0;34mConnecting to the database...\033[0m")
+                self.reconnecting = True
+                try:
+                    self.pool = await self._create_pool(DSN_DB.format(**self.params))
+                finally:
+                    self.reconnecting = False
+                logging.info(
+                    f"\033[1;36m{self.params['user']}\033[0m has connected to the \033[0;34mneon.db database!\033[0m"
+                )
+            if self.replica_dsn and not self.replica_connected:
+                # read-only queries are sent to the primary if the replica is unavailable
+                try:
+                    self.replica_pool = await self._create_pool(self.replica_dsn)
+                except (OSError, asyncio.TimeoutError, asyncpg.exceptions.PostgresError):
+                    logging.exception("Failed to connect to the read replica.")
+                else:
+                    logging.info("\033[0;34mConnected to the read replica!\033[0m")
         return self.pool
 
+    async def _create_pool(self, dsn: str) -> Pool:
+        """Create the pool, retrying with jittered exponential backoff if the database is unavailable."""
+        attempts = self.reconnect_options["reconnect_attempts"]
+        options = dict(self.pool_options)
+        user_init = options.pop("init")
+
+        async def init(conn: InstrumentedConnection):
+            conn.database = self
+            if user_init is not None:
+                await user_init(conn)
+
+        for attempt in range(attempts):
+            try:
+                return await asyncpg.create_pool(dsn, connection_class=InstrumentedConnection, init=init, **options)
+            except (OSError, asyncio.TimeoutError, asyncpg.exceptions.PostgresError) as exc:
+                if attempt == attempts - 1:
+                    raise
+                # "full jitter", so that reconnecting clients do not retry at the same time
+                max_delay = min(
+                    self.reconnect_options["reconnect_max_delay"],
+                    self.reconnect_options["reconnect_base_delay"] * 2**attempt,
+                )
+                delay = random.uniform(0, max_delay)
+                logging.warning(
+                    "Failed to connect to the database (%s), retrying in %.2f seconds...", type(exc).__name__, delay
+                )
+                await asyncio.sleep(delay)
+
     async def disconnect(self):
         """Disconnect to the database."""
         if self.pool:
             releases = [self.pool.release(conn) for conn in self.listeners] + [self.pool.close()]
             await asyncio.gather(*releases, return_exceptions=True)
+        if self.replica_pool:
+            await self.replica_pool.close()
 
-    async def _execute_method(self, method, *args):
+    @contextmanager
+    def primary(self):
+        """
+        Send read-only queries in the context manager to the primary.
+        Used when reading data immediately after modifying it, since the replica may lag behind.
+
+        Note that read-only queries about a player (with `player_id`) are sent to the primary automatically
+        for a few seconds after the player is modified, see `RecentWrites`.
+        """
+        token = _use_primary.set(True)
         try:
-            result = await method(*args)
+            yield
+        finally:
+            _use_primary.reset(token)
+
+    def _use_replica(self, read_only: bool, player_id: int = None) -> bool:
+        if not read_only or _use_primary.get() or not self.replica_connected:
+            return False
+        # read your writes --> the replica may not have the player's recent changes yet
+        return player_id is None or player_id not in recent_writes
+
+    @asynccontextmanager
+    async def acquire(self, *, read_only: bool = False, player_id: int = None):
+        """
+        Acquire a connection from the pool, recording the time spent waiting for it.
+        If `read_only` is True, the connection may be acquired from the replica,
+        unless the player with `player_id` (whom the queries are about) has been modified recently.
+        """
+        if self._use_replica(read_only, player_id):
+            pool, stats = self.replica_pool, self.replica_stats
+        else:
+            pool, stats = self.pool, self.stats
+
+        stats.waiters += 1
+        start = time.perf_counter()
+        try:
+            conn = await pool.acquire()
+        finally:
+            stats.waiters -= 1
+        stats.record_acquire(time.perf_counter() - start)
+
+        stats.acquired += 1
+        try:
+            yield conn
+        finally:
+            stats.acquired -= 1
+            await pool.release(conn)
+
+    def get_stats(self, replica: bool = False) -> dict:
+        """Get the live statistics of the pool, or the replica pool if `replica` is True."""
+        pool = self.replica_pool if replica else self.pool
+        stats = self.replica_stats if replica else self.stats
+        return {
+            "size": pool.get_size() if pool else 0,
+            "idle": pool.get_idle_size() if pool else 0,
+            "max_size": self.pool_options["max_size"],
+            "acquired": stats.acquired,
+            "waiters": stats.waiters,
+            "acquires": stats.acquires,
+            "avg_acquire_ms": stats.total_acquire_time / stats.acquires * 1000 if stats.acquires else 0,
+            "max_acquire_ms": stats.max_acquire_time * 1000,
+        }
+
+    def get_top_queries(self, limit: int = 10) -> list[QueryStats]:
+        """Get the queries which have taken the longest total time."""
+        return sorted(self.query_stats.values(), key=lambda stats: stats.total_time, reverse=True)[:limit]
+
+    def _record_query(self, method: str, sql: str, duration: float, result=None, error: bool = False):
+        sql = normalize_sql(sql)
+        if (stats := self.query_stats.get(sql)) is None:
+            if len(self.query_stats) >= MAX_QUERY_STATS:
+                self.query_stats.popitem(last=False)
+            stats = self.query_stats[sql] = QueryStats(sql)
+        else:
+            self.query_stats.move_to_end(sql)
+        stats.record(duration, count_rows(method, result), error)
+
+        if duration >= self.slow_query_threshold:
+            logging.warning("\033[0;33mSlow query\033[0m (%.0fms, %s): %s", duration * 1000, method, sql[:500])
+
+    async def _execute_method(self, method: str, sql: str, *args, read_only: bool = False, player_id: int = None):
+        # the query is recorded in `query_stats` by the connection, see `InstrumentedConnection`
+        try:
+            async with self.acquire(read_only=read_only, player_id=player_id) as conn:
+                return await getattr(conn, method)(sql, *args)
         except (asyncpg.exceptions.InterfaceError, AttributeError):
             await self.connect()
-            result = await method(*args)
-        return result
+            async with self.acquire(read_only=read_only, player_id=player_id) as conn:
+                return await getattr(conn, method)(sql, *args)
+
+    # the fetch methods accept `read_only=True` for queries which can be served by the read replica,
+    # and the id of the player the query is about, so that the player's recent changes can be read
 
-    async def fetch(self, sql, *args):
-        return await self._execute_method(self.pool.fetch, sql, *args)
+    async def fetch(self, sql, *args, read_only: bool = False, player_id: int = None):
+        return await self._execute_method("fetch", sql, *args, read_only=read_only, player_id=player_id)
 
-    async def fetchrow(self, sql, *args):
-        return await self._execute_method(self.pool.fetchrow, sql, *args)
+    async def fetchrow(self, sql, *args, read_only: bool = False, player_id: int = None):
+        return await self._execute_method("fetchrow", sql, *args, read_only=read_only, player_id=player_id)
 
-    async def fetchval(self, sql, *args):
-        return await self._execute_method(self.pool.fetchval, sql, *args)
+    async def fetchval(self, sql, *args, read_only: bool = False, player_id: int = None):
+        return await self._execute_method("fetchval", sql, *args, read_only=read_only, player_id=player_id)
 
     async def execute(self, sql, *args):
-        return await self._execute_method(self.pool.execute, sql, *args)
+        return await self._execute_method("execute", sql, *args)
 
     async def executemany(self, sql, *args):
-        await self._execute_method(self.pool.executemany, sql, *args)
+        await self._execute_method("executemany", sql, *args)
 
     async def __aenter__(self) -> Pool:
         await self.connect()
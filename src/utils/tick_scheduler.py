@@ -0,0 +1,113 @@
+"""Module providing a process-wide scheduler of periodic ticks, driven by a single timer wheel."""
+# default modules
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+
+class TickHandle:
+    """A callback scheduled to run every `interval` seconds. Cancel it with `cancel()`."""
+
+    __slots__ = ("callback", "interval_ticks", "rounds", "running", "cancelled")
+
+    def __init__(self, callback: Callable[[], Awaitable], interval_ticks: int):
+        self.callback = callback
+        self.interval_ticks = interval_ticks
+        # the number of full turns of the wheel to wait before the callback is due
+        self.rounds = 0
+        # whether the callback of the previous tick is still running
+        self.running = False
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TickScheduler:
+    """
+    A hashed timer wheel which runs scheduled callbacks on every tick they are due.
+
+    The wheel has `WHEEL_SIZE` slots of `RESOLUTION` seconds, and one task advances it one slot at a time,
+    so any number of callbacks (e.g. every ongoing maze) share one timer.
+    A callback is skipped for a tick if it is still running from its previous one.
+    """
+
+    RESOLUTION = 0.25
+    WHEEL_SIZE = 64
+
+    def __init__(self, resolution: float = RESOLUTION, wheel_size: int = WHEEL_SIZE):
+        self.resolution = resolution
+        self.wheel_size = wheel_size
+        self.slots: list[list[TickHandle]] = [[] for _ in range(wheel_size)]
+        self.current_tick = 0
+        self._task: Optional[asyncio.Task] = None
+        self._running_callbacks: set[asyncio.Task] = set()
+
+    def _to_ticks(self, seconds: float) -> int:
+        return max(1, round(seconds / self.resolution))
+
+    def _insert(self, handle: TickHandle, ticks: int):
+        handle.rounds, offset = divmod(ticks - 1, self.wheel_size)
+        self.slots[(self.current_tick + 1 + offset) % self.wheel_size].append(handle)
+
+    def schedule(self, callback: Callable[[], Awaitable], interval: float, delay: float = None) -> TickHandle:
+        """
+        Run `callback()` every `interval` seconds, starting after `delay` seconds (defaults to `interval`).
+        Both are rounded to the resolution of the wheel.
+        """
+        handle = TickHandle(callback, self._to_ticks(interval))
+        self._insert(handle, self._to_ticks(delay) if delay is not None else handle.interval_ticks)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return handle
+
+    async def _run_callback(self, handle: TickHandle):
+        handle.running = True
+        try:
+            await handle.callback()
+        except Exception:  # pylint: disable=broad-except
+            logging.exception("A scheduled tick failed.")
+        finally:
+            handle.running = False
+
+    def _advance(self):
+        self.current_tick = (self.current_tick + 1) % self.wheel_size
+        due, self.slots[self.current_tick] = self.slots[self.current_tick], []
+
+        for handle in due:
+            if handle.cancelled:
+                continue
+            if handle.rounds > 0:
+                handle.rounds -= 1
+                self.slots[self.current_tick].append(handle)
+                continue
+
+            if not handle.running:
+                task = asyncio.create_task(self._run_callback(handle))
+                self._running_callbacks.add(task)
+                task.add_done_callback(self._running_callbacks.discard)
+            self._insert(handle, handle.interval_ticks)
+
+    async def _run(self):
+        next_tick_at = time.monotonic()
+        while any(self.slots):
+            next_tick_at += self.resolution
+            await asyncio.sleep(max(0, next_tick_at - time.monotonic()))
+            self._advance()
+        # the task stops when nothing is scheduled, and `schedule()` starts it again
+
+    def shutdown(self):
+        """Cancel every scheduled callback and stop the wheel."""
+        for slot in self.slots:
+            for handle in slot:
+                handle.cancel()
+            slot.clear()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for task in self._running_callbacks:
+            task.cancel()
+
+
+tick_scheduler = TickScheduler()
@@ -0,0 +1,68 @@
+"""Module providing a cached, concurrent lookup of discord users by their ids."""
+# default modules
+import asyncio
+import time
+from typing import Iterable, Optional
+
+# nextcord
+import nextcord
+from nextcord.ext import commands
+
+
+class UserResolver:
+    """
+    Looks up users in the bot's cache, then in its own `TTL` cache, and fetches the rest from discord.
+
+    At most `MAX_CONCURRENT_FETCHES` users are fetched at the same time,
+    and concurrent lookups of the same user share a single request.
+    """
+
+    TTL = 10 * 60
+    MAX_USERS = 5000
+    MAX_CONCURRENT_FETCHES = 4
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        # maps user ids to (the time they were fetched, the user), `None` if the user does not exist
+        self.users: dict[int, tuple[float, Optional[nextcord.User]]] = {}
+        self.fetching: dict[int, asyncio.Future] = {}
+        self.semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_FETCHES)
+
+    async def _fetch(self, user_id: int) -> Optional[nextcord.User]:
+        async with self.semaphore:
+            try:
+                user = await self.bot.fetch_user(user_id)
+            except nextcord.NotFound:
+                user = None
+
+        if len(self.users) >= self.MAX_USERS:
+            # remove the user which was fetched first
+            del self.users[next(iter(self.users))]
+        self.users.pop(user_id, None)
+        self.users[user_id] = (time.monotonic(), user)
+        return user
+
+    async def get(self, user_id: int) -> Optional[nextcord.User]:
+        """Get a user by their id. Returns `None` if the user does not exist."""
+        if (user := self.bot.get_user(user_id)) is not None:
+            return user
+
+        cached = self.users.get(user_id)
+        if cached is not None and time.monotonic() - cached[0] < self.TTL:
+            return cached[1]
+
+        if (future := self.fetching.get(user_id)) is None:
+            future = self.fetching[user_id] = asyncio.ensure_future(self._fetch(user_id))
+            future.add_done_callback(lambda _: self.fetching.pop(user_id, None))
+        return await asyncio.shield(future)
+
+    async def get_many(self, user_ids: Iterable[int]) -> dict[int, Optional[nextcord.User]]:
+        """Get users by their ids concurrently. Maps every id to the user, or `None` if the user does not exist."""
+        user_ids = list(dict.fromkeys(user_ids))
+        users = await asyncio.gather(*(self.get(user_id) for user_id in user_ids))
+        return dict(zip(user_ids, users))
+
+    async def get_names(self, user_ids: Iterable[int]) -> dict[int, str]:
+        """Get the names of users by their ids. Users which do not exist are named by their ids."""
+        users = await self.get_many(user_ids)
+        return {user_id: user.name if user else str(user_id) for user_id, user in users.items()}